@@ -0,0 +1,219 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Lower number = served first when a slot frees up
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: 'interactive',
+    PRIORITY_BACKGROUND: 'background'
+}
+
+
+class AdmissionRejected(Exception):
+    """Raised when a model call cannot be admitted before its deadline"""
+
+
+def is_throttling_error(error):
+    """Check whether a boto3 error is Bedrock throttling us"""
+    code = getattr(error, 'response', {}).get('Error', {}).get('Code', '')
+    return code in ('ThrottlingException', 'TooManyRequestsException', 'ServiceQuotaExceededException')
+
+
+class _Waiter:
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+
+class AdmissionController:
+    """Process-wide concurrency limiter for model invocations.
+
+    Calls beyond the current limit wait in a priority queue until a slot
+    frees up or their deadline passes. The limit itself follows AIMD:
+    it grows by 1/limit on every successful call and is cut by
+    `backoff_factor` whenever Bedrock throttles us.
+
+    With `tokens_per_minute` set, token usage reported through
+    `record_tokens` is tracked over a sliding minute, and background
+    calls are turned away once `background_token_share` of the budget is
+    used, leaving the rest of the quota to interactive requests.
+    """
+
+    def __init__(self, initial_limit=8, min_limit=1, max_limit=32,
+                 queue_size=100, queue_timeout=10.0, backoff_factor=0.5,
+                 tokens_per_minute=0, background_token_share=0.7):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.backoff_factor = backoff_factor
+        self.tokens_per_minute = tokens_per_minute
+        self.background_token_share = background_token_share
+        self.in_flight = 0
+        self.queued = 0
+
+        self._lock = threading.Lock()
+        self._token_window = deque()
+        self._window_tokens = 0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._stats = {
+            'admitted': {name: 0 for name in PRIORITY_NAMES.values()},
+            'rejected': {name: 0 for name in PRIORITY_NAMES.values()},
+            'rejected_queue_full': 0,
+            'rejected_deadline': 0,
+            'rejected_token_budget': 0,
+            'throttled': 0,
+            'queue_wait_count': 0,
+            'queue_wait_total_seconds': 0.0,
+            'queue_wait_max_seconds': 0.0
+        }
+
+    def acquire(self, priority=PRIORITY_INTERACTIVE, timeout=None):
+        """Block until a slot is granted, or raise AdmissionRejected"""
+        timeout = self.queue_timeout if timeout is None else timeout
+        started = time.monotonic()
+
+        with self._lock:
+            if priority != PRIORITY_INTERACTIVE and self._over_background_budget():
+                self._record_reject(priority, 'rejected_token_budget')
+                raise AdmissionRejected("Background model calls paused: token budget for this minute is used up")
+            if not self.queued and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                self._record_admit(priority, 0.0)
+                return
+            if self.queued >= self.queue_size:
+                self._record_reject(priority, 'rejected_queue_full')
+                raise AdmissionRejected(f"Model call queue is full ({self.queue_size} waiting)")
+            waiter = _Waiter()
+            heapq.heappush(self._waiters, (priority, next(self._seq), waiter))
+            self.queued += 1
+
+        waiter.event.wait(timeout)
+
+        with self._lock:
+            if waiter.granted:
+                self._record_admit(priority, time.monotonic() - started)
+                return
+            # Leave the entry in the heap; _dispatch skips cancelled waiters
+            waiter.cancelled = True
+            self.queued -= 1
+            self._record_reject(priority, 'rejected_deadline')
+        raise AdmissionRejected(f"Timed out after {timeout}s waiting for a model call slot")
+
+    def release(self, throttled=False, succeeded=True):
+        """Return a slot and adjust the limit based on the call outcome"""
+        with self._lock:
+            self.in_flight -= 1
+            if throttled:
+                self._stats['throttled'] += 1
+                self.limit = max(self.min_limit, self.limit * self.backoff_factor)
+                print(f"Bedrock throttled us, concurrency limit now {self.limit:.1f}")
+            elif succeeded:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._dispatch()
+
+    def record_tokens(self, tokens):
+        """Count tokens used by a finished call against the per-minute budget"""
+        if not self.tokens_per_minute or not tokens:
+            return
+        with self._lock:
+            self._token_window.append((time.monotonic(), tokens))
+            self._window_tokens += tokens
+
+    def tokens_last_minute(self):
+        with self._lock:
+            self._expire_tokens()
+            return self._window_tokens
+
+    @contextmanager
+    def slot(self, priority=PRIORITY_INTERACTIVE, timeout=None):
+        """Hold a slot for the duration of one model invocation"""
+        self.acquire(priority, timeout)
+        throttled = False
+        succeeded = False
+        try:
+            yield
+            succeeded = True
+        except Exception as e:
+            throttled = is_throttling_error(e)
+            raise
+        finally:
+            self.release(throttled=throttled, succeeded=succeeded)
+
+    def stats(self):
+        """Snapshot of limiter state and counters for the metrics endpoint"""
+        with self._lock:
+            snapshot = {
+                'limit': round(self.limit, 2),
+                'in_flight': self.in_flight,
+                'queued': self.queued,
+                'admitted': dict(self._stats['admitted']),
+                'rejected': dict(self._stats['rejected'])
+            }
+            if self.tokens_per_minute:
+                self._expire_tokens()
+                snapshot['tokens_last_minute'] = self._window_tokens
+                snapshot['tokens_per_minute'] = self.tokens_per_minute
+            for key in ('rejected_queue_full', 'rejected_deadline', 'rejected_token_budget', 'throttled',
+                        'queue_wait_count', 'queue_wait_total_seconds', 'queue_wait_max_seconds'):
+                snapshot[key] = self._stats[key]
+        count = snapshot['queue_wait_count']
+        snapshot['queue_wait_avg_seconds'] = snapshot['queue_wait_total_seconds'] / count if count else 0.0
+        return snapshot
+
+    def _dispatch(self):
+        """Hand free slots to the highest-priority live waiters (lock held)"""
+        while self._waiters and self.in_flight < int(self.limit):
+            _, _, waiter = heapq.heappop(self._waiters)
+            if waiter.cancelled:
+                continue
+            waiter.granted = True
+            self.queued -= 1
+            self.in_flight += 1
+            waiter.event.set()
+
+    def _expire_tokens(self):
+        cutoff = time.monotonic() - 60
+        while self._token_window and self._token_window[0][0] < cutoff:
+            self._window_tokens -= self._token_window.popleft()[1]
+
+    def _over_background_budget(self):
+        """Whether background calls should wait for the next minute (lock held)"""
+        if not self.tokens_per_minute:
+            return False
+        self._expire_tokens()
+        return self._window_tokens >= self.tokens_per_minute * self.background_token_share
+
+    def _record_admit(self, priority, waited):
+        name = PRIORITY_NAMES.get(priority, str(priority))
+        self._stats['admitted'][name] = self._stats['admitted'].get(name, 0) + 1
+        if waited > 0:
+            self._stats['queue_wait_count'] += 1
+            self._stats['queue_wait_total_seconds'] += waited
+            self._stats['queue_wait_max_seconds'] = max(self._stats['queue_wait_max_seconds'], waited)
+
+    def _record_reject(self, priority, reason):
+        name = PRIORITY_NAMES.get(priority, str(priority))
+        self._stats['rejected'][name] = self._stats['rejected'].get(name, 0) + 1
+        self._stats[reason] += 1
+
+
+# Shared by every BedrockProvider in the process
+admission_controller = AdmissionController(
+    initial_limit=int(os.getenv('BEDROCK_MAX_CONCURRENCY', '8')),
+    max_limit=int(os.getenv('BEDROCK_MAX_CONCURRENCY_CEILING', '32')),
+    queue_size=int(os.getenv('BEDROCK_QUEUE_SIZE', '100')),
+    queue_timeout=float(os.getenv('BEDROCK_QUEUE_TIMEOUT', '10')),
+    tokens_per_minute=int(os.getenv('BEDROCK_TOKENS_PER_MINUTE', '0')),
+    background_token_share=float(os.getenv('BEDROCK_BACKGROUND_TOKEN_SHARE', '0.7'))
+)
@@ -1,9 +1,14 @@
 import requests
+import re
 import os
 from dotenv import load_dotenv
+from markdown_renderer import render_markdown
+from sentence_segmenter import ensure_natural_ending
 
 load_dotenv()
 
+UNWANTED_ENDINGS = re.compile(r'In summary,|To summarize,|In conclusion,|Overall,|Key takeaways:')
+
 class AIProvider:
     def __init__(self):
         self.gemini_key = os.getenv('GEMINI_API_KEY')
@@ -113,57 +118,14 @@ class AIProvider:
     def _ensure_natural_ending(self, text):
         """Ensure response ends naturally without cutoffs"""
         # Remove common AI endings that sound unnatural
-        unwanted_endings = [
-            "In summary,",
-            "To summarize,", 
-            "In conclusion,",
-            "Overall,",
-            "Key takeaways:"
-        ]
-        
-        for ending in unwanted_endings:
-            if ending in text:
-                text = text.split(ending)[0]
-        
-        # Find the last complete sentence
-        sentences = text.split('.')
-        complete_sentences = []
-        
-        for i, sentence in enumerate(sentences[:-1]):  # Exclude last potentially incomplete
-            sentence = sentence.strip()
-            if len(sentence) > 10:  # Only keep substantial sentences
-                complete_sentences.append(sentence)
-        
-        # Check if the last fragment is actually complete
-        last_fragment = sentences[-1].strip()
-        if last_fragment and len(last_fragment) > 10:
-            # Keep if it ends with punctuation or looks complete
-            if last_fragment.endswith(('!', '?', ')', '}', ']')) or len(last_fragment) > 30:
-                complete_sentences.append(last_fragment)
-        
-        result = '. '.join(complete_sentences)
-        if result and not result.endswith(('.', '!', '?')):
-            result += '.'
-            
-        return result if result else text
+        match = UNWANTED_ENDINGS.search(text)
+        if match:
+            text = text[:match.start()]
+        return ensure_natural_ending(text)
     
     def _format_response(self, text):
         """Convert markdown formatting to HTML"""
-        import re
-        
-        # Bold: **text** -> <strong>text</strong>
-        text = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', text)
-        
-        # Italic: *text* -> <em>text</em>
-        text = re.sub(r'\*(.*?)\*', r'<em>\1</em>', text)
-        
-        # Headers: ## text -> <h3>text</h3>
-        text = re.sub(r'^## (.*?)$', r'<h3>\1</h3>', text, flags=re.MULTILINE)
-        
-        # Bullet points: • text -> <li>text</li>
-        text = re.sub(r'^[•\-\*] (.*?)$', r'<li>\1</li>', text, flags=re.MULTILINE)
-        
-        return text
+        return render_markdown(text)
     
     def _add_youtube_video(self, topic, content):
         """Add YouTube video embed for video format"""
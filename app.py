@@ -1,65 +1,201 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, Blueprint, current_app, render_template, request, jsonify, send_from_directory
+import contextvars
+import hashlib
+import importlib
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
+from werkzeug.local import LocalProxy
 from werkzeug.utils import secure_filename
+from lazy import lazy_property
+import assets
+import compression
+import instrumentation
 from s3_storage import S3Storage
-from bedrock_provider import BedrockProvider
-try:
-    import PyPDF2
-except ImportError:
-    PyPDF2 = None
-try:
-    import docx
-except ImportError:
-    docx = None
+from storage import Storage
+from storage_backends import get_document_store
+from bedrock_provider import BedrockProvider, text_breaker, canvas_breaker, canvas_cache
+from admission import admission_controller, PRIORITY_BACKGROUND
+from usage_tracker import usage_tracker
+from rate_limiter import ip_rate_limiter, rate_limiter, rate_limited
+from http_cache import cached_json, response_cache
+from flashcard_decks import FlashcardDeckStore, FlashcardPregenerator, normalize_topic
+from semantic_cache import SemanticCache
+from single_flight import ai_generations, SingleFlightTimeout
+from keyword_matcher import KeywordMatcher
+from transcription_jobs import TranscriptionJobManager
+from transcription_backends import get_transcription_backend
 
 # Load environment variables
 load_dotenv()
 
-app = Flask(__name__)
-app.config['UPLOAD_FOLDER'] = 'uploads'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
+routes = Blueprint('routes', __name__)
 
-# Create uploads directory
-os.makedirs('uploads', exist_ok=True)
+def optional_module(name):
+    """Import an optional dependency when first needed, or None if it is not installed"""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+# Comprehensive topic-specific explanations used when the AI is unavailable
+FALLBACK_EXPLANATIONS = {
+    'cryptocurrency': {
+        'beginner': "Cryptocurrency is digital money stored on computers. Like Bitcoin, you can send it directly to others without using banks. It uses special math codes to keep transactions secure and prevent counterfeiting.",
+        'intermediate': "Cryptocurrency operates on blockchain networks using cryptographic algorithms. Miners validate transactions through proof-of-work consensus, creating immutable ledgers that eliminate intermediaries while maintaining decentralized control.",
+        'advanced': "Cryptocurrency leverages distributed ledger technology with cryptographic hash functions, merkle trees, and consensus mechanisms like PoW/PoS to achieve Byzantine fault tolerance in trustless peer-to-peer value transfer systems."
+    },
+    'machine learning': {
+        'beginner': "Machine learning teaches computers to recognize patterns by showing them lots of examples. Like teaching a child to recognize cats by showing many cat pictures, computers learn to make predictions.",
+        'intermediate': "Machine learning uses statistical algorithms to find patterns in data. Neural networks, decision trees, and regression models train on datasets to make predictions without explicit programming for each scenario.",
+        'advanced': "Machine learning employs gradient descent optimization, backpropagation, and regularization techniques across supervised, unsupervised, and reinforcement learning paradigms to minimize loss functions and generalize from training data."
+    },
+    'python': {
+        'beginner': "Python is a programming language that's easy to read and write. It uses simple English-like commands to tell computers what to do, making it perfect for beginners to learn coding.",
+        'intermediate': "Python is an interpreted, high-level language with dynamic typing and automatic memory management. Its extensive standard library and frameworks like Django make it versatile for web development, data science, and automation.",
+        'advanced': "Python implements duck typing with a global interpreter lock (GIL), uses reference counting with cycle detection for garbage collection, and supports metaclasses, decorators, and context managers for advanced programming patterns."
+    },
+    'quantum computing': {
+        'beginner': "Quantum computers use tiny particles that can be in multiple states at once, unlike regular computers that use just 0s and 1s. This lets them solve certain problems much faster.",
+        'intermediate': "Quantum computing exploits quantum superposition and entanglement to process information. Qubits can exist in multiple states simultaneously, enabling parallel computation through quantum algorithms like Shor's and Grover's.",
+        'advanced': "Quantum computing utilizes quantum mechanical phenomena including superposition, entanglement, and quantum interference. Gate-based quantum circuits manipulate qubit states through unitary operations to achieve quantum speedup for specific computational problems."
+    },
+    'blockchain': {
+        'beginner': "Blockchain is like a digital ledger that everyone can see but no one can cheat. Each new transaction gets added as a 'block' and linked to previous blocks, creating an unchangeable chain.",
+        'intermediate': "Blockchain creates immutable distributed ledgers through cryptographic hashing and consensus mechanisms. Each block contains transaction data, timestamps, and hash pointers, forming a tamper-evident chain validated by network participants.",
+        'advanced': "Blockchain implements cryptographic hash functions, merkle trees, and distributed consensus protocols (PoW, PoS, PBFT) to achieve Byzantine fault tolerance in decentralized systems while maintaining data integrity and preventing double-spending attacks."
+    }
+}
+
+# The explanations above are written for these levels
+FALLBACK_LEVELS = {
+    'primary': 'beginner',
+    'secondary': 'intermediate',
+    'foundation': 'advanced',
+    'degree': 'advanced'
+}
+
+# Topic keyword catalogues, compiled once; earlier entries win when several match.
+# Keywords must be whole words, so 'ai' doesn't match "air pressure"
+FALLBACK_TOPIC_MATCHER = KeywordMatcher((key, key) for key in FALLBACK_EXPLANATIONS)
+FALLBACK_CATEGORY_MATCHER = KeywordMatcher(
+    [(keyword, 'tech') for keyword in ['ai', 'artificial intelligence', 'neural', 'algorithm', 'data', 'computer', 'software', 'programming']] +
+    [(keyword, 'science') for keyword in ['physics', 'chemistry', 'biology', 'mathematics', 'theory', 'scientific']] +
+    [(keyword, 'business') for keyword in ['marketing', 'finance', 'economics', 'business', 'management', 'strategy']]
+)
 
 class AILearningPlatform:
     def __init__(self):
         self.learning_formats = ['chat', 'visual', 'ebook']
         self.bedrock_available = False
-        self.ai_provider = BedrockProvider()
-        self.s3_storage = S3Storage()
+        self._grading_done = {}
+        self._grading_lock = threading.Lock()
+        self._grading_sweeper = None
         
+        # Services below are created on first use, so startup needs neither AWS nor boto3
+        print("AI Learning Platform initialized with AWS Bedrock Nova Pro and full S3 cloud storage")
+    
+    @lazy_property
+    def ai_provider(self):
+        provider = BedrockProvider()
+        # Share generated images between workers through the bucket
+        if os.getenv('CANVAS_CACHE_S3', 'false').lower() == 'true':
+            canvas_cache.s3_client = self.s3_storage.s3_client
+            canvas_cache.bucket_name = self.s3_storage.bucket_name
+        return provider
+    
+    @lazy_property
+    def s3_storage(self):
+        # The provider reads s3_storage when canvas images are shared through the bucket
+        return S3Storage(ai_provider=lambda: self.ai_provider)
+    
+    @lazy_property
+    def storage(self):
+        # Community, game and forum data; the bucket is still used for audio and images
+        backend = os.getenv('STORAGE_BACKEND', 's3')
+        if backend == 's3':
+            return self.s3_storage
+        print(f"Using {backend} storage backend")
+        return Storage(get_document_store(backend), ai_provider=lambda: self.ai_provider)
+    
+    @lazy_property
+    def transcribe_client(self):
         # Initialize AWS Transcribe
         try:
             import boto3
             # Use ap-southeast-1 to match S3 bucket region
             transcribe_region = 'ap-southeast-1'
-            self.transcribe_client = boto3.client(
+            client = boto3.client(
                 'transcribe',
                 aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
                 aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
                 region_name=transcribe_region
             )
             print(f"Transcribe client initialized in region: {transcribe_region}")
-            print("AWS Transcribe client initialized")
+            return instrumentation.instrument_client(client)
         except Exception as e:
             print(f"Failed to initialize Transcribe: {e}")
-            self.transcribe_client = None
-        
-        # Using AWS Bedrock Nova Pro with full S3 storage
-        print("AI Learning Platform initialized with AWS Bedrock Nova Pro and full S3 cloud storage")
+            return None
+    
+    @lazy_property
+    def transcription_jobs(self):
+        backend = get_transcription_backend(
+            os.getenv('TRANSCRIBE_BACKEND', 'aws'), self.transcribe_client, self.s3_storage
+        )
+        return TranscriptionJobManager(backend) if backend else None
+    
+    @lazy_property
+    def grading_executor(self):
+        # Teach-back grading runs after the explanation is saved. Workers wait in the
+        # grading batcher, so filling every concurrent batch takes
+        # GRADING_BATCH_SIZE * GRADING_BATCH_CONCURRENCY of them.
+        return ThreadPoolExecutor(
+            max_workers=int(os.getenv('GRADING_WORKERS', '32')), thread_name_prefix='grading'
+        )
+    
+    @lazy_property
+    def flashcard_decks(self):
+        # Flashcard decks are served from the store; popular topics are refreshed in the background
+        store = FlashcardDeckStore(
+            os.getenv('FLASHCARD_DB_PATH', 'flashcard_decks.db'),
+            ttl=float(os.getenv('FLASHCARD_DECK_TTL_HOURS', '168')) * 3600
+        )
+        self.flashcard_pregenerator = FlashcardPregenerator(
+            store,
+            lambda topic, level: self.ai_provider.generate_flashcard_deck(topic, level, PRIORITY_BACKGROUND),
+            interval=float(os.getenv('FLASHCARD_PREGEN_INTERVAL', '600')),
+            top_n=int(os.getenv('FLASHCARD_PREGEN_TOP', '20'))
+        )
+        self.flashcard_pregenerator.start()
+        return store
+    
+    @lazy_property
+    def topic_cache(self):
+        # Reuses answers for rewordings of a topic already asked at the same level and format
+        return SemanticCache(
+            threshold=float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.7')),
+            max_entries=int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', '10000')),
+            ttl=float(os.getenv('SEMANTIC_CACHE_TTL_HOURS', '24')) * 3600
+        )
         
     def extract_text_from_file(self, filepath):
         """Extract text from uploaded files"""
+        kind = os.path.splitext(filepath)[1].lstrip('.').lower() or 'file'
+        with instrumentation.span(f"extract.{kind}", os.path.getsize(filepath)):
+            return self._extract_text(filepath)
+    
+    def _extract_text(self, filepath):
         try:
             if filepath.endswith('.txt'):
                 with open(filepath, 'r', encoding='utf-8') as f:
                     content = f.read()[:15000]  # Increased from 5000 to 15000
                     print(f"TXT: Read {len(content)} chars")
                     return content
-            elif filepath.endswith('.pdf') and PyPDF2:
+            elif filepath.endswith('.pdf') and optional_module('PyPDF2'):
+                import PyPDF2
                 with open(filepath, 'rb') as f:
                     reader = PyPDF2.PdfReader(f)
                     text = ""
@@ -85,7 +221,8 @@ class AILearningPlatform:
                     
                     print(f"PDF: Read {len(pages_to_read)} key pages from {total_pages} total, {len(text)} chars")
                     return text[:50000]  # Return up to 50k characters
-            elif filepath.endswith('.docx') and docx:
+            elif filepath.endswith('.docx') and optional_module('docx'):
+                import docx
                 doc = docx.Document(filepath)
                 text = ""
                 for para in doc.paragraphs[:50]:  # Increased from 20 to 50 paragraphs
@@ -149,58 +286,16 @@ class AILearningPlatform:
         # if topic_data:
         #     return topic_data['explanation']
         
-        # Generic fallback responses for when AI fails
-        topic_lower = topic.lower()
-        if complexity_level == 'primary':
-            return f"{topic.capitalize()} is something really cool that we can learn about! It's like when you discover how things work around you, and it helps us understand our world better."
-        elif complexity_level == 'secondary':
-            return f"{topic.capitalize()} is an important concept that connects to many things we study. It involves understanding key principles and how they work together in real situations."
-        elif complexity_level == 'foundation':
-            return f"{topic.capitalize()} involves multiple principles and concepts that work together, with practical applications and real-world implications that are relevant to your studies."
-        else:  # degree
-            return f"{topic.capitalize()} requires comprehensive analysis, theoretical understanding, and synthesis of complex interconnected concepts and methodologies within its field of study."
-        
-        # Comprehensive topic-specific explanations
-        explanations = {
-            'cryptocurrency': {
-                'beginner': "Cryptocurrency is digital money stored on computers. Like Bitcoin, you can send it directly to others without using banks. It uses special math codes to keep transactions secure and prevent counterfeiting.",
-                'intermediate': "Cryptocurrency operates on blockchain networks using cryptographic algorithms. Miners validate transactions through proof-of-work consensus, creating immutable ledgers that eliminate intermediaries while maintaining decentralized control.",
-                'advanced': "Cryptocurrency leverages distributed ledger technology with cryptographic hash functions, merkle trees, and consensus mechanisms like PoW/PoS to achieve Byzantine fault tolerance in trustless peer-to-peer value transfer systems."
-            },
-            'machine learning': {
-                'beginner': "Machine learning teaches computers to recognize patterns by showing them lots of examples. Like teaching a child to recognize cats by showing many cat pictures, computers learn to make predictions.",
-                'intermediate': "Machine learning uses statistical algorithms to find patterns in data. Neural networks, decision trees, and regression models train on datasets to make predictions without explicit programming for each scenario.",
-                'advanced': "Machine learning employs gradient descent optimization, backpropagation, and regularization techniques across supervised, unsupervised, and reinforcement learning paradigms to minimize loss functions and generalize from training data."
-            },
-            'python': {
-                'beginner': "Python is a programming language that's easy to read and write. It uses simple English-like commands to tell computers what to do, making it perfect for beginners to learn coding.",
-                'intermediate': "Python is an interpreted, high-level language with dynamic typing and automatic memory management. Its extensive standard library and frameworks like Django make it versatile for web development, data science, and automation.",
-                'advanced': "Python implements duck typing with a global interpreter lock (GIL), uses reference counting with cycle detection for garbage collection, and supports metaclasses, decorators, and context managers for advanced programming patterns."
-            },
-            'quantum computing': {
-                'beginner': "Quantum computers use tiny particles that can be in multiple states at once, unlike regular computers that use just 0s and 1s. This lets them solve certain problems much faster.",
-                'intermediate': "Quantum computing exploits quantum superposition and entanglement to process information. Qubits can exist in multiple states simultaneously, enabling parallel computation through quantum algorithms like Shor's and Grover's.",
-                'advanced': "Quantum computing utilizes quantum mechanical phenomena including superposition, entanglement, and quantum interference. Gate-based quantum circuits manipulate qubit states through unitary operations to achieve quantum speedup for specific computational problems."
-            },
-            'blockchain': {
-                'beginner': "Blockchain is like a digital ledger that everyone can see but no one can cheat. Each new transaction gets added as a 'block' and linked to previous blocks, creating an unchangeable chain.",
-                'intermediate': "Blockchain creates immutable distributed ledgers through cryptographic hashing and consensus mechanisms. Each block contains transaction data, timestamps, and hash pointers, forming a tamper-evident chain validated by network participants.",
-                'advanced': "Blockchain implements cryptographic hash functions, merkle trees, and distributed consensus protocols (PoW, PoS, PBFT) to achieve Byzantine fault tolerance in decentralized systems while maintaining data integrity and preventing double-spending attacks."
-            }
-        }
-        
         # Check for specific topics with partial matching
-        topic_lower = topic.lower()
-        for key, levels in explanations.items():
-            if key in topic_lower or any(word in topic_lower for word in key.split()):
-                return levels.get(complexity_level, levels['beginner'])
+        key = FALLBACK_TOPIC_MATCHER.first(topic, word_end=True)
+        if key:
+            levels = FALLBACK_EXPLANATIONS[key]
+            return levels.get(FALLBACK_LEVELS.get(complexity_level, complexity_level), levels['beginner'])
         
         # Enhanced dynamic responses based on topic keywords
-        tech_keywords = ['ai', 'artificial intelligence', 'neural', 'algorithm', 'data', 'computer', 'software', 'programming']
-        science_keywords = ['physics', 'chemistry', 'biology', 'mathematics', 'theory', 'scientific']
-        business_keywords = ['marketing', 'finance', 'economics', 'business', 'management', 'strategy']
+        category = FALLBACK_CATEGORY_MATCHER.first(topic, word_end=True)
         
-        if any(keyword in topic_lower for keyword in tech_keywords):
+        if category == 'tech':
             if complexity_level == 'primary':
                 return f"{topic.capitalize()} is like a smart helper that uses computers to solve problems! It's like having a robot friend that can think and help us do cool things."
             elif complexity_level == 'secondary':
@@ -210,7 +305,7 @@ class AILearningPlatform:
             else:  # degree
                 return f"{topic.capitalize()} involves complex computational algorithms, data structures, and systematic methodologies requiring deep technical understanding and implementation expertise."
         
-        elif any(keyword in topic_lower for keyword in science_keywords):
+        elif category == 'science':
             if complexity_level == 'primary':
                 return f"{topic.capitalize()} is about how nature works! It's like being a detective and discovering cool secrets about the world around us."
             elif complexity_level == 'secondary':
@@ -220,7 +315,7 @@ class AILearningPlatform:
             else:  # degree
                 return f"{topic.capitalize()} encompasses rigorous scientific methodologies, mathematical modeling, and empirical research requiring analytical reasoning and theoretical frameworks."
         
-        elif any(keyword in topic_lower for keyword in business_keywords):
+        elif category == 'business':
             if complexity_level == 'primary':
                 return f"{topic.capitalize()} is about how people work together to make and sell things! It's like running a lemonade stand but bigger."
             elif complexity_level == 'secondary':
@@ -231,12 +326,14 @@ class AILearningPlatform:
                 return f"{topic.capitalize()} requires strategic analysis, market dynamics understanding, and complex decision-making frameworks within competitive business environments."
         
         # Generic fallback
-        if complexity_level == 'beginner':
-            return f"{topic.capitalize()} is an important concept with practical applications. It involves understanding key principles and how they work together in real situations."
-        elif complexity_level == 'advanced':
-            return f"{topic.capitalize()} requires comprehensive analysis, theoretical understanding, and synthesis of complex interconnected concepts and methodologies."
-        else:
-            return f"{topic.capitalize()} involves multiple principles and concepts that work together, with practical applications and real-world implications."
+        if complexity_level == 'primary':
+            return f"{topic.capitalize()} is something really cool that we can learn about! It's like when you discover how things work around you, and it helps us understand our world better."
+        elif complexity_level == 'secondary':
+            return f"{topic.capitalize()} is an important concept that connects to many things we study. It involves understanding key principles and how they work together in real situations."
+        elif complexity_level == 'foundation':
+            return f"{topic.capitalize()} involves multiple principles and concepts that work together, with practical applications and real-world implications that are relevant to your studies."
+        else:  # degree
+            return f"{topic.capitalize()} requires comprehensive analysis, theoretical understanding, and synthesis of complex interconnected concepts and methodologies within its field of study."
         
     def simplify_topic(self, topic, complexity_level, format_type, uploaded_files=None):
         """Main function to get AI explanation for any topic"""
@@ -251,15 +348,30 @@ class AILearningPlatform:
         
         print(f"Total context: {len(context)} chars")
         
-        # Use AI for all content generation including video
-        print(f"Getting AI response for {topic}")
-        ai_content = self.ai_provider.get_ai_response(topic, complexity_level, format_type, context)
+        # Answers grounded in uploaded documents are never shared
+        ai_content = None if context else self.topic_cache.get(topic, complexity_level, format_type)
         
         if not ai_content:
-            print(f"AI returned empty, using fallback for {topic}")
-            ai_content = self.get_smart_fallback(topic, complexity_level, format_type)
-        else:
-            print(f"AI response received: {len(ai_content)} chars")
+            # Use AI for all content generation including video
+            print(f"Getting AI response for {topic}")
+            # Students asking the same thing at once share one model call
+            context_hash = hashlib.sha1(context.encode()).hexdigest() if context else ''
+            key = ('learn', normalize_topic(topic), complexity_level, format_type, context_hash)
+            try:
+                ai_content = ai_generations.do(
+                    key, lambda: self.ai_provider.get_ai_response(topic, complexity_level, format_type, context))
+            except SingleFlightTimeout as e:
+                print(f"{e}")
+                ai_content = None
+            
+            if not ai_content:
+                print(f"AI returned empty, using fallback for {topic}")
+                ai_content = self.get_smart_fallback(topic, complexity_level, format_type)
+            else:
+                print(f"AI response received: {len(ai_content)} chars")
+                # Don't pin a response whose image was still being generated
+                if not context and 'nova-canvas-pending' not in ai_content:
+                    self.topic_cache.put(topic, complexity_level, format_type, ai_content)
                 
         print(f"🎨 Formatting content for {format_type}")
         formatted_content = self.format_content(ai_content, format_type)
@@ -282,92 +394,136 @@ class AILearningPlatform:
         
         return content
     
-    def transcribe_audio(self, audio_url, filename):
-        """Transcribe audio using AWS Transcribe"""
-        if not self.transcribe_client:
+    def transcribe_audio(self, audio_bytes, filename):
+        """Queue audio with the configured transcription backend and return a job id to poll"""
+        if not self.transcription_jobs:
             return None
-            
-        try:
-            job_name = f"transcribe_{filename.replace('.', '_')}_{int(datetime.now().timestamp())}"
-            
-            # Start transcription job
-            print(f"Starting transcription job: {job_name}")
-            print(f"Audio URL: {audio_url}")
-            
-            self.transcribe_client.start_transcription_job(
-                TranscriptionJobName=job_name,
-                Media={'MediaFileUri': audio_url},
-                MediaFormat='wav',
-                LanguageCode='en-US'
-            )
-            print("Transcription job started successfully")
-            
-            # Wait for completion (polling)
-            import time
-            max_wait = 60  # Maximum 60 seconds
-            wait_time = 0
-            
-            while wait_time < max_wait:
-                response = self.transcribe_client.get_transcription_job(
-                    TranscriptionJobName=job_name
-                )
-                
-                status = response['TranscriptionJob']['TranscriptionJobStatus']
-                
-                if status == 'COMPLETED':
-                    # Get transcript
-                    transcript_uri = response['TranscriptionJob']['Transcript']['TranscriptFileUri']
-                    
-                    # Download and parse transcript
-                    import requests
-                    import json
-                    
-                    transcript_response = requests.get(transcript_uri)
-                    transcript_data = transcript_response.json()
-                    
-                    transcript_text = transcript_data['results']['transcripts'][0]['transcript']
-                    
-                    # Clean up job
-                    try:
-                        self.transcribe_client.delete_transcription_job(
-                            TranscriptionJobName=job_name
-                        )
-                    except:
-                        pass
-                    
-                    return transcript_text
-                    
-                elif status == 'FAILED':
-                    failure_reason = response['TranscriptionJob'].get('FailureReason', 'Unknown error')
-                    print(f"Transcription failed: {failure_reason}")
-                    return f"Transcription failed: {failure_reason}"
-                    
-                time.sleep(2)
-                wait_time += 2
-            
-            # Cleanup if job didn't complete
-            try:
-                self.transcribe_client.delete_transcription_job(
-                    TranscriptionJobName=job_name
-                )
-            except:
-                pass
-                
+        
+        return self.transcription_jobs.submit(audio_bytes, filename)
+    
+    def get_transcription(self, job_id):
+        """Get status and transcript of a queued transcription job"""
+        if not self.transcription_jobs:
             return None
-            
+        return self.transcription_jobs.get(job_id)
+    
+    def submit_explanation(self, user_id, topic, level, transcript):
+        """Save an explanation with a pending score and grade it in the background"""
+        result = self.storage.submit_explanation(user_id, topic, level, transcript)
+        if result.get('success'):
+            with self._grading_lock:
+                self._grading_done[result['id']] = threading.Event()
+            # Copy the context so grading calls are still attributed to this request
+            self.grading_executor.submit(contextvars.copy_context().run, self._grade_explanation,
+                                         result['id'], topic, level, transcript)
+        return result
+    
+    def requeue_pending_grading(self, older_than=None):
+        """Queue grading again for explanations left pending, e.g. by a restart; returns how many"""
+        if older_than is None:
+            older_than = float(os.getenv('GRADING_REQUEUE_AFTER', '120'))
+        requeued = 0
+        for explanation in self.storage.claim_pending_explanations(older_than):
+            with self._grading_lock:
+                if explanation['id'] in self._grading_done:
+                    continue  # Still queued in this worker
+                self._grading_done[explanation['id']] = threading.Event()
+            self.grading_executor.submit(self._grade_explanation, explanation['id'], explanation['topic'],
+                                         explanation['level'], explanation['transcript'])
+            requeued += 1
+        if requeued:
+            print(f"Re-queued grading for {requeued} pending explanations")
+        return requeued
+    
+    def start_grading_sweeper(self):
+        """Re-queue pending grading now and every GRADING_REQUEUE_INTERVAL seconds (0 disables)"""
+        interval = float(os.getenv('GRADING_REQUEUE_INTERVAL', '300'))
+        if interval <= 0 or self._grading_sweeper:
+            return
+        
+        def sweep():
+            while True:
+                try:
+                    self.requeue_pending_grading()
+                except Exception as e:
+                    print(f"Error re-queueing pending grading: {e}")
+                time.sleep(interval)
+        
+        self._grading_sweeper = threading.Thread(target=sweep, name='grading-sweeper', daemon=True)
+        self._grading_sweeper.start()
+    
+    def _grade_explanation(self, explanation_id, topic, level, transcript):
+        try:
+            score = self.ai_provider.grade_explanation(topic, level, transcript)
+            self.storage.record_explanation_score(explanation_id, score)
         except Exception as e:
-            print(f"Transcription error: {e}")
-            import traceback
-            traceback.print_exc()
-            return f"Error: {str(e)}"
+            print(f"Error grading explanation {explanation_id}: {e}")
+        finally:
+            with self._grading_lock:
+                done = self._grading_done.pop(explanation_id, None)
+            if done:
+                done.set()
+    
+    def get_explanation_status(self, explanation_id, wait=0):
+        """Grading status of an explanation, optionally waiting up to `wait` seconds for the score"""
+        with self._grading_lock:
+            done = self._grading_done.get(explanation_id)
+        if done and wait > 0:
+            done.wait(wait)
+        
+        explanation = self.storage.get_explanation(explanation_id)
+        if not explanation:
+            return None
+        return {
+            'id': explanation_id,
+            'grading_status': explanation.get('grading_status', 'graded'),
+            'clarity_score': explanation['clarity_score']
+        }
+
+    def get_flashcards(self, topic, level):
+        """Flashcards for a topic, from the deck store when possible"""
+        deck = self.flashcard_decks.get(topic, level)
+        if deck:
+            print(f"Using cached flashcard deck for: {topic} ({level})")
+            return deck
+        
+        def generate():
+            deck = self.ai_provider.generate_flashcard_deck(topic, level)
+            if deck:
+                self.flashcard_decks.put(topic, level, deck)
+            return deck
+        
+        try:
+            deck = ai_generations.do(('flashcards', normalize_topic(topic), level), generate)
+        except SingleFlightTimeout as e:
+            print(f"{e}")
+            deck = None
+        if deck:
+            return deck
+        # Generic cards are never cached so the next request retries the model
+        return self.ai_provider._generate_fallback_flashcards(topic, level)
 
-platform = AILearningPlatform()
+_platform = None
+_platform_lock = threading.Lock()
 
-@app.route('/')
+def get_platform():
+    """The shared AILearningPlatform, created on first use"""
+    global _platform
+    if _platform is None:
+        with _platform_lock:
+            if _platform is None:
+                _platform = AILearningPlatform()
+    return _platform
+
+# Routes keep using `platform`; nothing is built until a request touches it
+platform = LocalProxy(get_platform)
+
+@routes.route('/')
 def home():
     return render_template('index.html')
 
-@app.route('/learn', methods=['POST'])
+@routes.route('/learn', methods=['POST'])
+@rate_limited(cost=2)
 def learn():
     try:
         topic = request.form.get('topic')
@@ -375,6 +531,7 @@ def learn():
         format_type = request.form.get('format', 'chat')
         
         print(f"📝 Learn request: topic='{topic}', level='{level}', format='{format_type}'")
+        instrumentation.tag(level=level, format=format_type, user_id=request.form.get('user_id'))
         
         if not topic:
             return jsonify({'error': 'Topic is required'}), 400
@@ -385,7 +542,7 @@ def learn():
             for file in files:
                 if file.filename:
                     filename = secure_filename(file.filename)
-                    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+                    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
                     file.save(filepath)
                     uploaded_files.append(filepath)
         
@@ -398,27 +555,75 @@ def learn():
         traceback.print_exc()
         return jsonify({'error': f'Something went wrong, please try again. Debug: {str(e)}'}), 500
 
-@app.route('/formats')
+@routes.route('/formats')
+@cached_json(max_age=3600)
 def get_formats():
     return jsonify(platform.learning_formats)
 
-@app.route('/uploads/<filename>')
+@routes.route('/metrics')
+def get_metrics():
+    # Only report services something else already created; a scrape must not
+    # build the Bedrock client or start the flashcard pre-generator
+    created = vars(get_platform())
+    return jsonify({
+        'admission': admission_controller.stats(),
+        'circuit_breakers': {
+            'nova-pro': text_breaker.stats(),
+            'nova-canvas': canvas_breaker.stats()
+        },
+        'canvas_cache': canvas_cache.stats(),
+        'grading': created['ai_provider'].grading_batcher.stats() if 'ai_provider' in created else None,
+        'flashcard_decks': created['flashcard_decks'].stats() if 'flashcard_decks' in created else None,
+        'topic_cache': created['topic_cache'].stats() if 'topic_cache' in created else None,
+        'routes': instrumentation.route_metrics.stats(),
+        'bedrock_usage': usage_tracker.stats(),
+        'rate_limit': rate_limiter.stats() if rate_limiter else None,
+        'ip_rate_limit': ip_rate_limiter.stats() if ip_rate_limiter else None,
+        'single_flight': ai_generations.stats(),
+        'http_cache': response_cache.stats()
+    })
+
+@routes.route('/uploads/<filename>')
 def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
 
-@app.route('/forum/threads', methods=['GET'])
+@routes.route('/canvas/<filename>')
+def canvas_image(filename):
+    # Names are content hashes, so a given URL never changes
+    key, ext = os.path.splitext(filename)
+    if ext != '.png' or not canvas_cache.is_valid_key(key) or not canvas_cache.contains(key, record=False):
+        return jsonify({'error': 'Image not found'}), 404
+    
+    response = send_from_directory(canvas_cache.directory, filename, max_age=31536000)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@routes.route('/canvas/status/<image_key>')
+def canvas_image_status(image_key):
+    if not canvas_cache.is_valid_key(image_key):
+        return jsonify({'error': 'Image not found'}), 404
+    
+    status = platform.ai_provider.canvas_status(image_key)
+    result = {'status': status}
+    if status == 'ready':
+        result['url'] = f"/canvas/{canvas_cache.filename(image_key)}"
+    return jsonify(result)
+
+@routes.route('/forum/threads', methods=['GET'])
+@cached_json('forum')
 def get_forum_threads():
     try:
-        threads = platform.s3_storage.get_forum_threads()
+        threads = platform.storage.get_forum_threads()
         return jsonify({'success': True, 'threads': threads})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/forum/create_thread', methods=['POST'])
+@routes.route('/forum/create_thread', methods=['POST'])
 def create_forum_thread():
     try:
         data = request.get_json()
-        result = platform.s3_storage.create_forum_thread(
+        result = platform.storage.create_forum_thread(
             data.get('user_id'),
             data.get('title'),
             data.get('content'),
@@ -429,11 +634,11 @@ def create_forum_thread():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/forum/like_thread', methods=['POST'])
+@routes.route('/forum/like_thread', methods=['POST'])
 def like_forum_thread():
     try:
         data = request.get_json()
-        result = platform.s3_storage.like_forum_thread(
+        result = platform.storage.like_forum_thread(
             data.get('user_id'),
             data.get('thread_id')
         )
@@ -441,15 +646,17 @@ def like_forum_thread():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/leaderboard/<filter_type>', methods=['GET'])
+@routes.route('/leaderboard/<filter_type>', methods=['GET'])
+@cached_json('user_stats')
 def get_leaderboard(filter_type):
     try:
-        leaderboard = platform.s3_storage.get_knowledge_leaderboard(filter_type)
+        leaderboard = platform.storage.get_knowledge_leaderboard(filter_type)
         return jsonify({'success': True, 'leaderboard': leaderboard})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/analyze_blurting', methods=['POST'])
+@routes.route('/analyze_blurting', methods=['POST'])
+@rate_limited(cost=1)
 def analyze_blurting():
     try:
         data = request.get_json()
@@ -457,6 +664,7 @@ def analyze_blurting():
         level = data.get('level')
         blurt_text = data.get('blurt_text')
         time_spent = data.get('time_spent', 0)
+        instrumentation.tag(level=level, user_id=data.get('user_id'))
         
         if not topic or not blurt_text:
             return jsonify({'success': False, 'error': 'Topic and blurt text are required'})
@@ -472,18 +680,20 @@ def analyze_blurting():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/generate_flashcards', methods=['POST'])
+@routes.route('/generate_flashcards', methods=['POST'])
+@rate_limited(cost=1)
 def generate_flashcards():
     try:
         data = request.get_json()
         topic = data.get('topic')
         level = data.get('level')
+        instrumentation.tag(level=level, user_id=data.get('user_id'))
         
         if not topic:
             return jsonify({'success': False, 'error': 'Topic is required'})
         
-        # Generate flashcards using AI
-        flashcards = platform.ai_provider.generate_flashcards(topic, level)
+        # Served from the deck store, generated on a miss
+        flashcards = platform.get_flashcards(topic, level)
         
         if flashcards:
             return jsonify({'success': True, 'flashcards': flashcards})
@@ -493,7 +703,7 @@ def generate_flashcards():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/transcribe_audio', methods=['POST'])
+@routes.route('/transcribe_audio', methods=['POST'])
 def transcribe_audio():
     try:
         if 'audio' not in request.files:
@@ -503,89 +713,97 @@ def transcribe_audio():
         if audio_file.filename == '':
             return jsonify({'success': False, 'error': 'No audio file selected'})
         
-        # Save audio file temporarily
-        filename = secure_filename(f"audio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav")
-        audio_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        audio_file.save(audio_path)
-        
-        # Upload to S3 for Transcribe
-        s3_key = f"audio/{filename}"
-        try:
-            platform.s3_storage.s3_client.upload_file(
-                audio_path, 
-                platform.s3_storage.bucket_name, 
-                s3_key
-            )
-            audio_url = f"s3://{platform.s3_storage.bucket_name}/{s3_key}"
-        except Exception as e:
-            return jsonify({'success': False, 'error': f'S3 upload failed: {str(e)}'})
-        
-
-        
-        # Use AWS Transcribe
-        transcript = platform.transcribe_audio(audio_url, filename)
+        # Hand the bytes straight to the backend, no temp file needed
+        filename = secure_filename(f"audio_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.wav")
+        job_id = platform.transcribe_audio(audio_file.read(), filename)
         
-        # Clean up local file
-        os.remove(audio_path)
-        
-        if transcript:
-            return jsonify({'success': True, 'transcript': transcript})
+        if job_id:
+            return jsonify({'success': True, 'job_id': job_id, 'status': 'QUEUED'})
         else:
-            return jsonify({'success': False, 'error': 'Transcription failed'})
+            return jsonify({'success': False, 'error': 'Transcription is not available'})
             
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/submit_explanation', methods=['POST'])
+@routes.route('/transcribe_audio/<job_id>')
+def get_transcription(job_id):
+    try:
+        job = platform.get_transcription(job_id)
+        if not job:
+            return jsonify({'success': False, 'error': 'Transcription job not found'}), 404
+        
+        return jsonify({'success': job['status'] != 'FAILED', 'job_id': job_id, **job})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@routes.route('/submit_explanation', methods=['POST'])
+@rate_limited(cost=1)
 def submit_explanation():
     try:
         user_id = request.form.get('user_id', 'anonymous')
         topic = request.form.get('topic')
         level = request.form.get('level')
         transcript = request.form.get('transcript')
+        instrumentation.tag(level=level, user_id=user_id)
         
-        # Get AI grading from Bedrock
-        ai_score = platform.ai_provider.grade_explanation(topic, level, transcript)
-        
-        # Submit to S3 with AI score
-        result = platform.s3_storage.submit_explanation(user_id, topic, level, transcript, ai_score)
+        # Saved straight away; the AI score arrives via /explanation_status
+        result = platform.submit_explanation(user_id, topic, level, transcript)
         return jsonify(result)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/community_explanations/<topic>')
+EXPLANATION_STATUS_MAX_WAIT = 2
+
+@routes.route('/explanation_status/<explanation_id>')
+def get_explanation_status(explanation_id):
+    try:
+        # ?wait=N holds the request open until the score is ready. Kept short: a waiting
+        # request ties up one of the worker's WEB_THREADS, so clients poll with backoff
+        wait = min(float(request.args.get('wait', 0)), EXPLANATION_STATUS_MAX_WAIT)
+        status = platform.get_explanation_status(explanation_id, wait)
+        if not status:
+            return jsonify({'success': False, 'error': 'Explanation not found'}), 404
+        
+        return jsonify({'success': True, **status})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@routes.route('/community_explanations/<topic>')
+@cached_json('explanations')
 def get_community_explanations(topic):
     try:
-        explanations = platform.s3_storage.get_community_explanations(topic)
+        explanations = platform.storage.get_community_explanations(topic)
         return jsonify({'explanations': explanations})
     except Exception as e:
         return jsonify({'error': str(e)})
 
-@app.route('/upvote_explanation', methods=['POST'])
+@routes.route('/upvote_explanation', methods=['POST'])
 def upvote_explanation():
     try:
         user_id = request.form.get('user_id', 'anonymous')
         explanation_id = request.form.get('explanation_id')
         
-        result = platform.s3_storage.upvote_explanation(user_id, explanation_id)
+        result = platform.storage.upvote_explanation(user_id, explanation_id)
         return jsonify(result)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/user_stats/<user_id>')
+@routes.route('/user_stats/<user_id>')
 def get_user_stats(user_id):
     try:
-        stats = platform.s3_storage.get_user_stats(user_id)
+        stats = platform.storage.get_user_stats(user_id)
         return jsonify(stats)
     except Exception as e:
         return jsonify({'error': str(e)})
 
 # Game System Routes
-@app.route('/game/challenge/<difficulty>')
-@app.route('/game/challenge/<difficulty>/<category>')
+@routes.route('/game/challenge/<difficulty>')
+@routes.route('/game/challenge/<difficulty>/<category>')
+@rate_limited(cost=1)
 def get_challenge(difficulty, category=None):
     try:
-        challenge = platform.s3_storage.get_random_challenge(difficulty, category)
+        instrumentation.tag(level=difficulty)
+        challenge = platform.storage.get_random_challenge(difficulty, category)
         if challenge:
             # Don't send correct answer to frontend
             challenge.pop('correct_answer', None)
@@ -594,15 +812,17 @@ def get_challenge(difficulty, category=None):
     except Exception as e:
         return jsonify({'error': str(e)})
 
-@app.route('/game/categories')
+@routes.route('/game/categories')
+# Challenges are only added offline, so this is bounded by HTTP_CACHE_TTL alone
+@cached_json('challenges')
 def get_categories():
     try:
-        categories = platform.s3_storage.get_categories()
+        categories = platform.storage.get_categories()
         return jsonify({'categories': categories})
     except Exception as e:
         return jsonify({'error': str(e)})
 
-@app.route('/game/submit', methods=['POST'])
+@routes.route('/game/submit', methods=['POST'])
 def submit_challenge():
     try:
         user_id = request.form.get('user_id')
@@ -610,26 +830,45 @@ def submit_challenge():
         answer = request.form.get('answer')
         time_taken = int(request.form.get('time_taken', 0))
         
-        result = platform.s3_storage.submit_challenge_answer(user_id, challenge_id, answer, time_taken)
+        result = platform.storage.submit_challenge_answer(user_id, challenge_id, answer, time_taken)
         return jsonify(result)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/game/stats/<user_id>')
+@routes.route('/game/stats/<user_id>')
 def get_game_stats(user_id):
     try:
-        stats = platform.s3_storage.get_player_stats(user_id)
+        stats = platform.storage.get_player_stats(user_id)
         return jsonify(stats)
     except Exception as e:
         return jsonify({'error': str(e)})
 
-@app.route('/game/leaderboard')
+@routes.route('/game/leaderboard')
+@cached_json('players')
 def get_game_leaderboard():
     try:
-        leaderboard = platform.s3_storage.get_leaderboard()
+        leaderboard = platform.storage.get_leaderboard()
         return jsonify({'leaderboard': leaderboard})
     except Exception as e:
         return jsonify({'error': str(e)})
 
+def create_app():
+    """Build the Flask app; AWS clients and other services are created on first use"""
+    app = Flask(__name__)
+    app.config['UPLOAD_FOLDER'] = 'uploads'
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
+    
+    # Create uploads directory
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    
+    app.register_blueprint(routes)
+    instrumentation.init_app(app)
+    assets.init_app(app)
+    compression.init_app(app)
+    return app
+
+app = create_app()
+
 if __name__ == '__main__':
+    get_platform().start_grading_sweeper()
     app.run(host='0.0.0.0', port=8080, debug=True)
\ No newline at end of file
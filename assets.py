@@ -0,0 +1,143 @@
+"""Fingerprinted, precompressed static assets.
+
+`python assets.py` copies each stylesheet and script in static/ to
+static/dist/ under a name containing a hash of its content
+(style.css -> style.1a2b3c4d5e.css), writes gzip and brotli variants next
+to it, and records the names in static/dist/manifest.json. Run it before
+starting the server whenever static files change.
+
+Templates link assets with asset_url('style.css'). With a manifest that is
+the fingerprinted /assets/ URL, served precompressed with a one-year
+immutable Cache-Control because its content can never change; without
+one it is the plain /static/ URL, so development needs no build.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+from flask import current_app, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip variants are built
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+ASSET_EXTENSIONS = ('.css', '.js')
+ONE_YEAR = 365 * 24 * 3600
+
+# Preferred first; a variant is only used if the client accepts it and it was built
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def build(static_dir=STATIC_DIR, dist_dir=DIST_DIR, clean=False):
+    """Fingerprint and compress every asset; returns the manifest and per-file sizes"""
+    if clean and os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+    os.makedirs(dist_dir, exist_ok=True)
+
+    manifest, sizes = {}, {}
+    for name in sorted(os.listdir(static_dir)):
+        if not name.endswith(ASSET_EXTENSIONS) or not os.path.isfile(os.path.join(static_dir, name)):
+            continue
+        with open(os.path.join(static_dir, name), 'rb') as f:
+            data = f.read()
+        stem, ext = os.path.splitext(name)
+        hashed = f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+        path = os.path.join(dist_dir, hashed)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+        # mtime=0 so rebuilding unchanged files gives identical bytes
+        variants = {'identity': len(data), 'gzip': _write_if_smaller(path + '.gz', gzip.compress(data, 9, mtime=0), data)}
+        if brotli is not None:
+            variants['br'] = _write_if_smaller(path + '.br', brotli.compress(data, quality=11), data)
+        manifest[name] = hashed
+        sizes[name] = variants
+
+    with open(os.path.join(dist_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest, sizes
+
+
+def _write_if_smaller(path, compressed, data):
+    if len(compressed) >= len(data):
+        if os.path.exists(path):
+            os.remove(path)
+        return len(data)
+    with open(path, 'wb') as f:
+        f.write(compressed)
+    return len(compressed)
+
+
+def load_manifest(dist_dir=DIST_DIR):
+    try:
+        with open(os.path.join(dist_dir, 'manifest.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def init_app(app, dist_dir=DIST_DIR):
+    """Serve built assets under /assets/ and make asset_url() available to templates"""
+    manifest = load_manifest(dist_dir)
+    app.extensions['assets'] = {'dir': dist_dir, 'manifest': manifest, 'files': set(manifest.values())}
+    app.jinja_env.globals['asset_url'] = asset_url
+    app.add_url_rule('/assets/<filename>', 'assets', serve_asset)
+    if not manifest:
+        print("No asset manifest; serving unfingerprinted files from /static (run python assets.py to build)")
+
+
+def asset_url(name):
+    """URL of a static asset: fingerprinted if built, else the plain static file"""
+    hashed = current_app.extensions['assets']['manifest'].get(name)
+    if hashed:
+        return url_for('assets', filename=hashed)
+    return url_for('static', filename=name)
+
+
+def serve_asset(filename):
+    assets = current_app.extensions['assets']
+    if filename not in assets['files']:
+        return 'Not found', 404
+
+    suffix, encoding = '', None
+    for name, extension in ENCODINGS:
+        if request.accept_encodings[name] and os.path.exists(os.path.join(assets['dir'], filename + extension)):
+            suffix, encoding = extension, name
+            break
+
+    response = send_from_directory(assets['dir'], filename + suffix,
+                                   mimetype=mimetypes.guess_type(filename)[0], max_age=ONE_YEAR)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fingerprint and precompress static assets')
+    parser.add_argument('--clean', action='store_true', help='remove previous builds first')
+    args = parser.parse_args()
+
+    manifest, sizes = build(clean=args.clean)
+    if brotli is None:
+        print("brotli is not installed; building gzip variants only")
+    print(f"{'asset':<24} {'raw':>9} {'gzip':>9} {'br':>9}")
+    for name, variants in sizes.items():
+        print(f"{name:<24} {variants['identity']:>9} {variants['gzip']:>9} {variants.get('br', '-'):>9}")
+    totals = {key: sum(v.get(key, v['identity']) for v in sizes.values()) for key in ('identity', 'gzip', 'br')}
+    print(f"{'total':<24} {totals['identity']:>9} {totals['gzip']:>9} {totals['br'] if brotli else '-':>9}")
+    print(f"Wrote {len(manifest)} assets and manifest.json to {os.path.relpath(DIST_DIR)}")
+
+
+if __name__ == '__main__':
+    main()
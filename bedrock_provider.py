@@ -1,28 +1,91 @@
-import boto3
+import contextvars
 import json
 import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from dotenv import load_dotenv
+from admission import admission_controller, AdmissionRejected, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from circuit_breaker import CircuitBreaker, CircuitOpenError, LatencyTracker, hedged_call
+from flashcard_decks import parse_deck
+from grading_batcher import GradingBatcher
+from image_cache import ImageCache
+from instrumentation import instrument_client, request_labels
+from lazy import lazy_property
+from markdown_renderer import render_markdown
+from sentence_segmenter import ensure_natural_ending
+from usage_tracker import usage_tracker
 
 load_dotenv()
 
+
+def _breaker(name):
+    # Local admission rejections say nothing about Bedrock health
+    return CircuitBreaker(
+        name,
+        failure_rate_threshold=float(os.getenv('BEDROCK_BREAKER_FAILURE_RATE', '0.5')),
+        min_calls=int(os.getenv('BEDROCK_BREAKER_MIN_CALLS', '10')),
+        open_seconds=float(os.getenv('BEDROCK_BREAKER_OPEN_SECONDS', '15')),
+        ignore_exceptions=(AdmissionRejected,)
+    )
+
+# Shared by every BedrockProvider in the process, one per model
+text_breaker = _breaker('nova-pro')
+canvas_breaker = _breaker('nova-canvas')
+text_latency = LatencyTracker()
+_hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='bedrock-hedge')
+_canvas_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='nova-canvas')
+_pending_images = {}
+_pending_images_lock = threading.Lock()
+canvas_cache = ImageCache(
+    os.getenv('CANVAS_CACHE_DIR', os.path.join('uploads', 'canvas')),
+    max_entries=int(os.getenv('CANVAS_CACHE_MAX_ENTRIES', '500')),
+    max_bytes=int(os.getenv('CANVAS_CACHE_MAX_MB', '200')) * 1024 * 1024
+)
+
+SINGLE_SCORE_PATTERN = re.compile(r'\b([1-9]|10)\b')
+BATCH_SCORE_PATTERN = re.compile(r'^\W*(?:explanation\s*)?(\d+)\W*?\s*[:.)\-]\s*([1-9]|10)\b', re.MULTILINE | re.IGNORECASE)
+
 class BedrockProvider:
-    def __init__(self):
+    def __init__(self, bedrock_client=None):
         # Force us-east-1 region for Nova Lite
         self.region = 'us-east-1'
-        self.bedrock_client = boto3.client(
+        if bedrock_client is not None:
+            self.bedrock_client = bedrock_client
+        self.model_id = "amazon.nova-pro-v1:0"
+        self.canvas_model_id = "amazon.nova-canvas-v1:0"
+        self.hedging_enabled = os.getenv('BEDROCK_HEDGING', 'false').lower() == 'true'
+        self.grading_batcher = GradingBatcher(
+            self._grade_batch,
+            max_batch=int(os.getenv('GRADING_BATCH_SIZE', '8')),
+            max_wait=float(os.getenv('GRADING_BATCH_WAIT', '0.3')),
+            max_concurrency=int(os.getenv('GRADING_BATCH_CONCURRENCY', '4'))
+        )
+    
+    @lazy_property
+    def bedrock_client(self):
+        # boto3 is slow to import and build, so wait for the first model call
+        import boto3
+        client = boto3.client(
             'bedrock-runtime',
             aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
             aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
             region_name=self.region
         )
-        self.model_id = "amazon.nova-pro-v1:0"
         print(f"Bedrock client initialized with region: {self.region}")
+        return instrument_client(client)
     
     def get_ai_response(self, topic, level, format_type, context=""):
         """Get response from AWS Bedrock Nova Pro"""
         prompt = self._build_prompt(topic, level, format_type, context)
         
         try:
+            # The image prompt only needs the topic, so start it before the text
+            if format_type in ['visual', 'sketch']:
+                print(f"Generating Nova Canvas image for topic: {topic}")
+                image_key, image_future = self._start_nova_canvas(topic)
+            
             print(f"Calling Bedrock for {topic} at {level} level")
             response = self._get_bedrock_response(prompt)
             
@@ -34,14 +97,17 @@ class BedrockProvider:
             
             # Add Nova Canvas image for visual format
             if format_type in ['visual', 'sketch']:
-                print(f"Generating Nova Canvas image for topic: {topic}")
-                image_content = self._generate_nova_canvas(topic, cleaned_response)
+                image_status = self._wait_for_nova_canvas(image_key, image_future)
+                image_content = self._nova_canvas_embed(topic, cleaned_response, image_key, image_status)
                 formatted_response = self._format_response(image_content)
             else:
                 formatted_response = self._format_response(cleaned_response)
                 
             print(f"SUCCESS: Bedrock response: {len(formatted_response)} chars")
             return formatted_response
+        except (CircuitOpenError, AdmissionRejected) as e:
+            print(f"WARNING: Skipping Bedrock: {e}")
+            return None
         except Exception as e:
             print(f"ERROR: Bedrock failed: {e}")
             import traceback
@@ -101,7 +167,7 @@ class BedrockProvider:
             Provide specific facts, real examples, and actionable information about {topic}. 
             Write complete sentences and end naturally."""
     
-    def _get_bedrock_response(self, prompt):
+    def _get_bedrock_response(self, prompt, priority=PRIORITY_INTERACTIVE):
         """Get response from AWS Bedrock Nova Pro"""
         body = {
             "messages": [
@@ -116,76 +182,97 @@ class BedrockProvider:
             }
         }
         
-        response = self.bedrock_client.invoke_model(
-            modelId=self.model_id,
-            body=json.dumps(body)
-        )
+        def attempt():
+            started = time.monotonic()
+            response_body = self._invoke_model(priority, modelId=self.model_id, body=json.dumps(body))
+            text_latency.record(time.monotonic() - started)
+            return response_body
+        
+        # Only hedge interactive calls, and only once we know what "slow" means
+        hedge_delay = text_latency.percentile(0.95) if self.hedging_enabled else None
+        if hedge_delay is not None and priority == PRIORITY_INTERACTIVE:
+            response_body = text_breaker.call(hedged_call, attempt, hedge_delay, _hedge_executor)
+        else:
+            response_body = text_breaker.call(attempt)
         
-        response_body = json.loads(response['body'].read())
         return response_body['output']['message']['content'][0]['text']
     
+    def _invoke_model(self, priority, **request):
+        """Invoke a Bedrock model inside an admission slot and return the parsed body"""
+        with admission_controller.slot(priority):
+            started = time.monotonic()
+            response = self.bedrock_client.invoke_model(**request)
+            response_body = json.loads(response['body'].read())
+            latency = time.monotonic() - started
+        
+        # Nova text models report token usage; Canvas returns images instead
+        usage = response_body.get('usage') or {}
+        input_tokens = usage.get('inputTokens', 0)
+        output_tokens = usage.get('outputTokens', 0)
+        admission_controller.record_tokens(input_tokens + output_tokens)
+        usage_tracker.record(request['modelId'], input_tokens, output_tokens,
+                             images=len(response_body.get('images') or []),
+                             latency=latency, **request_labels())
+        return response_body
+    
     def _ensure_natural_ending(self, text):
         """Ensure response ends naturally without cutoffs"""
-        sentences = text.split('.')
-        complete_sentences = []
-        
-        for i, sentence in enumerate(sentences[:-1]):
-            sentence = sentence.strip()
-            if len(sentence) > 10:
-                complete_sentences.append(sentence)
-        
-        last_fragment = sentences[-1].strip()
-        if last_fragment and len(last_fragment) > 10:
-            if last_fragment.endswith(('!', '?', ')', '}', ']')) or len(last_fragment) > 30:
-                complete_sentences.append(last_fragment)
-        
-        result = '. '.join(complete_sentences)
-        if result and not result.endswith(('.', '!', '?')):
-            result += '.'
-            
-        return result if result else text
+        return ensure_natural_ending(text)
     
     def _format_response(self, text):
         """Convert markdown formatting to HTML"""
-        import re
-        
-        # Convert markdown to HTML - order matters (longest patterns first)
-        text = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', text)
-        text = re.sub(r'\*(.*?)\*', r'<em>\1</em>', text)
-        text = re.sub(r'^#### (.*?)$', r'<h4>\1</h4>', text, flags=re.MULTILINE)
-        text = re.sub(r'^### (.*?)$', r'<h3>\1</h3>', text, flags=re.MULTILINE)
-        text = re.sub(r'^## (.*?)$', r'<h2>\1</h2>', text, flags=re.MULTILINE)
-        text = re.sub(r'^# (.*?)$', r'<h1>\1</h1>', text, flags=re.MULTILINE)
-        
-        # Clean up any remaining markdown symbols
-        text = re.sub(r'^#{1,6}\s*', '', text, flags=re.MULTILINE)
-        text = re.sub(r'\*{1,2}', '', text)
-        
-        # Convert bullet points to proper lists
-        lines = text.split('\n')
-        in_list = False
-        formatted_lines = []
-        
-        for line in lines:
-            if re.match(r'^[•\-\*] ', line):
-                if not in_list:
-                    formatted_lines.append('<ul>')
-                    in_list = True
-                pattern = r'^[•\-\*] '
-                formatted_lines.append(f'<li>{re.sub(pattern, "", line)}</li>')
-            else:
-                if in_list:
-                    formatted_lines.append('</ul>')
-                    in_list = False
-                formatted_lines.append(line)
-        
-        if in_list:
-            formatted_lines.append('</ul>')
-        
-        return '\n'.join(formatted_lines)
+        return render_markdown(text)
     
     def grade_explanation(self, topic, level, explanation):
         """Grade student explanation using AI"""
+        try:
+            # Explanations arriving together are graded in one model call
+            score = self.grading_batcher.grade(topic, level, explanation)
+        except Exception as e:
+            print(f"AI Grading Error: {e}")
+            return 5  # Default score if API fails
+        
+        if score is None:
+            print("No score found in response, using default")
+            return 5  # Default score if parsing fails
+        print(f"Extracted Score: {score}")
+        return score
+    
+    def _grade_batch(self, items):
+        """Grade a batch of explanations, returning one score (or None) per item"""
+        if len(items) == 1:
+            return [self._grade_single(**items[0])]
+        
+        sections = []
+        for number, item in enumerate(items, 1):
+            sections.append(f"""Explanation {number}
+        Topic: {item['topic']}
+        Education Level: {item['level']}
+        Student Explanation: <<<{item['explanation']}>>>""")
+        explanations = '\n\n        '.join(sections)
+        
+        prompt = f"""You are an expert educator grading student explanations. 
+        
+        Grade each of the {len(items)} explanations below independently on a scale of 1-10 based on:
+        - Accuracy of information (40%)
+        - Clarity and organization (30%) 
+        - Appropriate complexity for its education level (20%)
+        - Use of examples or analogies (10%)
+        
+        {explanations}
+        
+        Respond with exactly one line per explanation in the form "<explanation number>: <score>", for example "1: 7". No other text."""
+        
+        response = self._get_bedrock_response(prompt)
+        print(f"AI Batch Grading Response: {response}")
+        
+        scores = {}
+        for match in BATCH_SCORE_PATTERN.finditer(response):
+            scores.setdefault(int(match.group(1)), int(match.group(2)))
+        return [scores.get(number) for number in range(1, len(items) + 1)]
+    
+    def _grade_single(self, topic, level, explanation):
+        """Grade one explanation with its own prompt"""
         prompt = f"""You are an expert educator grading student explanations. 
         
         Topic: {topic}
@@ -200,92 +287,110 @@ class BedrockProvider:
         
         Respond with ONLY a single number from 1-10. No other text."""
         
-        try:
-            response = self._get_bedrock_response(prompt)
-            print(f"AI Grading Response: {response}")
-            
-            # Extract number from response
-            import re
-            score_match = re.search(r'\b([1-9]|10)\b', response)
-            if score_match:
-                score = int(score_match.group(1))
-                print(f"Extracted Score: {score}")
-                return score
-            
-            print("No score found in response, using default")
-            return 5  # Default score if parsing fails
-        except Exception as e:
-            print(f"AI Grading Error: {e}")
-            return 5  # Default score if API fails
-    
-
+        response = self._get_bedrock_response(prompt)
+        print(f"AI Grading Response: {response}")
+        
+        # Extract number from response
+        score_match = SINGLE_SCORE_PATTERN.search(response)
+        return int(score_match.group(1)) if score_match else None
     
-
+    def _start_nova_canvas(self, topic):
+        """Start Nova Canvas generation in the background, returning (image_key, future)"""
+        # Nova Canvas image generation request
+        body = {
+            "taskType": "TEXT_IMAGE",
+            "textToImageParams": {
+                "text": f"Educational diagram about {topic}. Clear, simple illustration showing key concepts."
+            }
+        }
+        
+        image_key = canvas_cache.key_for(self.canvas_model_id, body)
+        if canvas_cache.contains(image_key):
+            print(f"Using cached Nova Canvas image for: {topic}")
+            return image_key, None
+        
+        # Concurrent requests for the same image share one generation
+        with _pending_images_lock:
+            future = _pending_images.get(image_key)
+            if future is None:
+                future = _canvas_executor.submit(contextvars.copy_context().run, self._generate_nova_canvas, image_key, body)
+                _pending_images[image_key] = future
+                future.add_done_callback(lambda _: _pending_images.pop(image_key, None))
+        return image_key, future
     
-    def _generate_nova_canvas(self, topic, content):
-        """Generate image using AWS Nova Canvas"""
+    def _generate_nova_canvas(self, image_key, body):
+        """Generate image using AWS Nova Canvas and store it in the image cache"""
         try:
-            # Nova Canvas image generation request
-            body = {
-                "taskType": "TEXT_IMAGE",
-                "textToImageParams": {
-                    "text": f"Educational diagram about {topic}. Clear, simple illustration showing key concepts."
-                }
-            }
-            
-            print(f"Generating Nova Canvas image for: {topic}")
-            
             # Call Nova Canvas for image generation
-            response = self.bedrock_client.invoke_model(
-                modelId="amazon.nova-canvas-v1:0",
+            response_body = canvas_breaker.call(
+                self._invoke_model,
+                PRIORITY_INTERACTIVE,
+                modelId=self.canvas_model_id,
                 body=json.dumps(body),
                 contentType="application/json",
                 accept="application/json"
             )
             
-            response_body = json.loads(response['body'].read())
-            
             # Nova Canvas returns image data
-            if 'images' in response_body:
-                image_data = response_body['images'][0]
-                
-                # Save image to uploads folder
-                import base64
-                image_filename = f"canvas_{topic.replace(' ', '_')[:20]}.png"
-                image_path = os.path.join('uploads', image_filename)
-                
-                with open(image_path, 'wb') as img_file:
-                    img_file.write(base64.b64decode(image_data))
-                
-                # Create image display with brief description
-                image_embed = f"""
-                <div class="nova-canvas-image">
-                    <div class="image-container">
-                        <img src="/uploads/{image_filename}" alt="{topic} visual" style="max-width: 100%; height: auto;">
-                    </div>
-                    <p class="image-description">{content}</p>
-                </div>
-                """
-                
-                return image_embed
-            else:
-                # Fallback if image generation fails
-                return f"""
-                <div class="nova-canvas-placeholder">
-                    <div class="image-placeholder">
-                        <p>Visual generation in progress...</p>
-                    </div>
-                </div>
-                """
-                
+            if 'images' not in response_body:
+                raise ValueError("Nova Canvas returned no images")
+            
+            import base64
+            canvas_cache.put(image_key, base64.b64decode(response_body['images'][0]))
         except Exception as e:
             print(f"Nova Canvas generation failed: {e}")
+            raise
+    
+    def _wait_for_nova_canvas(self, image_key, future):
+        """Give a running image a short grace period once the text is ready"""
+        if future is None:
+            return 'ready'
+        try:
+            future.result(timeout=float(os.getenv('CANVAS_WAIT_SECONDS', '2')))
+            return 'ready'
+        except FutureTimeout:
+            return 'pending'
+        except Exception:
+            return 'failed'
+    
+    def canvas_status(self, image_key):
+        """Status of an image for clients resolving a pending placeholder"""
+        if image_key in _pending_images:
+            return 'pending'
+        if canvas_cache.contains(image_key, record=False):
+            return 'ready'
+        return 'failed'
+    
+    def _nova_canvas_embed(self, topic, content, image_key, image_status):
+        """Build the visual format HTML around the generated text"""
+        if image_status == 'ready':
+            # Create image display with brief description
+            return f"""
+            <div class="nova-canvas-image">
+                <div class="image-container">
+                    <img src="/canvas/{canvas_cache.filename(image_key)}" alt="{topic} visual" style="max-width: 100%; height: auto;">
+                </div>
+                <p class="image-description">{content}</p>
+            </div>
+            """
+        elif image_status == 'pending':
+            # The page swaps the placeholder for the image once it is ready
+            return f"""
+            <div class="nova-canvas-image nova-canvas-pending" data-image-key="{image_key}">
+                <div class="image-container image-placeholder">
+                    <p>Visual generation in progress...</p>
+                </div>
+                <p class="image-description">{content}</p>
+            </div>
+            """
+        else:
             # Return content with placeholder
             return f"""
             <div class="nova-canvas-error">
                 <div class="image-placeholder">
                     <p>Visual temporarily unavailable</p>
                 </div>
+                <p class="image-description">{content}</p>
             </div>
             """
     
@@ -293,6 +398,7 @@ class BedrockProvider:
         """Add AWS Polly text-to-speech for audio format"""
         try:
             # Initialize Polly client
+            import boto3
             polly_client = boto3.client(
                 'polly',
                 aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
@@ -365,6 +471,12 @@ class BedrockProvider:
     
     def generate_flashcards(self, topic, level):
         """Generate flashcards using AI"""
+        deck = self.generate_flashcard_deck(topic, level)
+        # Fallback flashcards if generation or parsing fails
+        return deck or self._generate_fallback_flashcards(topic, level)
+    
+    def generate_flashcard_deck(self, topic, level, priority=PRIORITY_INTERACTIVE):
+        """Generate a validated flashcard deck, or None if the model output is unusable"""
         prompt = f"""Generate 5 flashcards for the topic '{topic}' at {level} education level.
         
         Format as JSON array with this exact structure:
@@ -380,36 +492,16 @@ class BedrockProvider:
         Return ONLY the JSON array, no other text."""
         
         try:
-            response = self._get_bedrock_response(prompt)
+            response = self._get_bedrock_response(prompt, priority)
             print(f"Flashcard Response: {response}")
             
-            # Extract JSON from response
-            import json
-            import re
-            
-            # Find JSON array in response
-            json_match = re.search(r'\[.*\]', response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-                flashcards = json.loads(json_str)
-                
-                # Validate structure
-                if isinstance(flashcards, list) and len(flashcards) > 0:
-                    for card in flashcards:
-                        if 'question' in card and 'answer' in card:
-                            continue
-                        else:
-                            raise ValueError("Invalid flashcard structure")
-                    
-                    print(f"Generated {len(flashcards)} flashcards")
-                    return flashcards
-            
-            # Fallback flashcards if parsing fails
-            return self._generate_fallback_flashcards(topic, level)
-            
+            flashcards = parse_deck(response)
+            if flashcards:
+                print(f"Generated {len(flashcards)} flashcards")
+            return flashcards
         except Exception as e:
             print(f"Flashcard generation error: {e}")
-            return self._generate_fallback_flashcards(topic, level)
+            return None
     
     def _generate_fallback_flashcards(self, topic, level):
         """Generate basic fallback flashcards"""
@@ -439,7 +531,8 @@ class BedrockProvider:
         Return ONLY the JSON object, no other text."""
         
         try:
-            response = self._get_bedrock_response(prompt)
+            # Challenge generation can wait behind interactive /learn traffic
+            response = self._get_bedrock_response(prompt, priority=PRIORITY_BACKGROUND)
             print(f"AI Challenge Response: {response}")
             
             # Extract JSON from response
@@ -0,0 +1,104 @@
+"""Benchmark response compression: CPU per MB against bytes saved.
+
+Compresses payloads shaped like the app's large responses (a /learn
+answer, the forum thread list, community explanations, the index page)
+at each gzip level and brotli quality, both in one go and streamed in
+small chunks with a flush after each (as for server-sent events). Use it
+to pick COMPRESS_GZIP_LEVEL and COMPRESS_BROTLI_QUALITY.
+
+Usage: python bench_compression.py [--min-seconds 0.2] [--chunk 512]
+"""
+
+import argparse
+import json
+import time
+
+from compression import brotli, compress, compress_stream
+from markdown_renderer import render_markdown
+
+SECTION = """## {n}. How {topic} works
+
+{topic} is easiest to understand step by step. First, **energy** enters the system;
+then it is *stored*, moved or changed into another form.
+
+- Key idea {n}: every change has a cause
+- Example: a plant leaf in sunlight
+- Common mistake: thinking energy is used up
+
+> Try it: explain {topic} to a friend in three sentences.
+"""
+
+
+def learn_payload():
+    text = '\n'.join(SECTION.format(n=n, topic='photosynthesis') for n in range(1, 9))
+    return json.dumps({'content': render_markdown(text), 'format': 'chat', 'level': 'secondary'}).encode()
+
+
+def forum_payload(count=100):
+    threads = [{
+        'id': f"thread_20261019_1200{n:02d}_user{n:04d}", 'user_id': f"user{n:04d}abcd",
+        'author': f"user{n:04d}***", 'title': f"How does question {n} work?",
+        'content': 'I read the chapter twice and still do not get why the answer changes when the numbers do.',
+        'topic': ['Photosynthesis', 'Gravity', 'Fractions'][n % 3], 'level': 'primary', 'replies': n % 4,
+        'created_at': f"2026-10-19T12:{n % 60:02d}:00.000000"
+    } for n in range(count)]
+    return json.dumps({'success': True, 'threads': threads}).encode()
+
+
+def explanations_payload(count=60):
+    explanations = [{
+        'id': f"exp_20261019_1200{n:02d}_user{n:04d}", 'user_id': f"user{n:04d}abcd", 'topic': 'Photosynthesis',
+        'level': 'primary', 'transcript': 'Plants take in light, water and carbon dioxide and make sugar and oxygen. '
+                                          f'The green part, chlorophyll, catches the light. ({n})',
+        'clarity_score': 6 + n % 4, 'grading_status': 'graded', 'upvotes': n % 7,
+        'created_at': f"2026-10-19T12:{n % 60:02d}:00.000000"
+    } for n in range(count)]
+    return json.dumps({'explanations': explanations}).encode()
+
+
+def index_payload():
+    with open('templates/index.html', 'rb') as f:
+        return f.read()
+
+
+def cpu_ms_per_mb(run, size, min_seconds):
+    """Process CPU time per MB of input, repeating until min_seconds have passed"""
+    rounds, started = 0, time.process_time()
+    while True:
+        run()
+        rounds += 1
+        elapsed = time.process_time() - started
+        if elapsed >= min_seconds:
+            return elapsed / rounds / (size / 1e6) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--min-seconds', type=float, default=0.2, help='CPU time to spend per measurement')
+    parser.add_argument('--chunk', type=int, default=512, help='bytes per chunk when streaming')
+    args = parser.parse_args()
+
+    payloads = {'learn': learn_payload(), 'forum_threads': forum_payload(),
+                'community': explanations_payload(), 'index.html': index_payload()}
+    settings = [('gzip', level) for level in (1, 3, 5, 6, 9)]
+    if brotli is not None:
+        settings += [('br', quality) for quality in (1, 4, 5, 6, 11)]
+    else:
+        print("brotli is not installed; measuring gzip only\n")
+
+    print(f"{'payload':<14} {'bytes':>7} {'encoding':<8} {'saved':>6} {'cpu ms/MB':>10} {'stream saved':>13} {'stream ms/MB':>13}")
+    for name, data in payloads.items():
+        chunks = [data[i:i + args.chunk] for i in range(0, len(data), args.chunk)]
+        for encoding, level in settings:
+            whole = len(compress(data, encoding, level))
+            streamed = sum(len(part) for part in compress_stream(iter(chunks), encoding, level))
+            whole_cpu = cpu_ms_per_mb(lambda: compress(data, encoding, level), len(data), args.min_seconds)
+            stream_cpu = cpu_ms_per_mb(lambda: list(compress_stream(iter(chunks), encoding, level)),
+                                       len(data), args.min_seconds)
+            print(f"{name:<14} {len(data):>7} {encoding + '-' + str(level):<8} {1 - whole / len(data):>6.1%} "
+                  f"{whole_cpu:>10.1f} {1 - streamed / len(data):>13.1%} {stream_cpu:>13.1f}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Measure how long `import app` takes and fail if it regresses.
+
+Usage: python bench_import_time.py [--runs 5] [--budget-ms 400] [--module app]
+
+Each run is a fresh interpreter with `-X importtime`; the reported time is
+the median cumulative import time of the module, followed by the slowest
+imports it pulled in. Exits with status 1 when the median is over budget
+or a heavy dependency is imported eagerly again.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+# Modules that must only be imported when a request needs them
+DEFERRED_MODULES = ['boto3', 'botocore', 'numpy', 'PyPDF2', 'docx', 'faster_whisper', 'requests']
+
+
+def import_profile(module):
+    """(cumulative microseconds per imported module, modules loaded) for one fresh import"""
+    code = f"import sys, {module}; print(' '.join(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, check=True)
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = int(cumulative_us)
+    return timings, set(result.stdout.split())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=400)
+    parser.add_argument('--module', default='app')
+    args = parser.parse_args()
+
+    totals = []
+    for _ in range(args.runs):
+        timings, loaded = import_profile(args.module)
+        totals.append(timings[args.module] / 1000)
+
+    median = statistics.median(totals)
+    print(f"import {args.module}: median {median:.0f}ms, min {min(totals):.0f}ms, max {max(totals):.0f}ms "
+          f"over {args.runs} runs (budget {args.budget_ms:.0f}ms)")
+    print("Slowest imports (cumulative ms):")
+    for name, cumulative_us in sorted(timings.items(), key=lambda item: -item[1])[1:11]:
+        print(f"  {cumulative_us / 1000:8.1f}  {name}")
+
+    eager = [name for name in DEFERRED_MODULES if name in loaded]
+    if eager:
+        print(f"ERROR: imported eagerly: {', '.join(eager)}")
+    if median > args.budget_ms:
+        print("ERROR: import time over budget")
+    if eager or median > args.budget_ms:
+        sys.exit(1)
+    print("SUCCESS: import time within budget")
+
+
+if __name__ == "__main__":
+    main()
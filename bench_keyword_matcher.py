@@ -0,0 +1,48 @@
+"""Microbenchmark: KeywordMatcher vs a loop of `in` checks over the same catalogue.
+
+Usage: python bench_keyword_matcher.py
+"""
+
+import random
+import string
+import timeit
+
+from keyword_matcher import KeywordMatcher
+
+
+def make_keywords(count, seed=42):
+    rng = random.Random(seed)
+    keywords = set()
+    while len(keywords) < count:
+        words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(rng.randint(1, 3))]
+        keywords.add(' '.join(words))
+    return sorted(keywords)
+
+
+def main():
+    queries = ['how does photosynthesis work in plants', 'introduction to machine learning algorithms',
+               'the french revolution and its causes']
+    print(f"{'keywords':>9} {'build ms':>9} {'linear us':>10} {'matcher us':>11} {'speedup':>8}")
+    for count in (100, 1000, 10000, 50000):
+        keywords = make_keywords(count)
+        # Make sure each query actually contains a keyword
+        keywords += ['photosynthesis', 'machine learning', 'revolution']
+        build = min(timeit.repeat(lambda: KeywordMatcher((k, k) for k in keywords), number=1, repeat=3))
+        matcher = KeywordMatcher((k, k) for k in keywords)
+
+        def linear():
+            return [[k for k in keywords if k in query] for query in queries]
+
+        def automaton():
+            return [matcher.find_all(query, word_start=False) for query in queries]
+
+        assert [sorted(m) for m in linear()] == [sorted(m) for m in automaton()], "Match sets differ"
+        number = max(3, 20000 // count)
+        linear_time = min(timeit.repeat(linear, number=number, repeat=5)) / number / len(queries)
+        matcher_time = min(timeit.repeat(automaton, number=number * 20, repeat=5)) / (number * 20) / len(queries)
+        print(f"{count:>9} {build * 1e3:>9.1f} {linear_time * 1e6:>10.1f} {matcher_time * 1e6:>11.1f} "
+              f"{linear_time / matcher_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Load test /learn through gunicorn with a slow fake Bedrock.
+
+Starts `gunicorn -c gunicorn.conf.py` on a local port with every worker's
+Bedrock client replaced by FakeBedrockClient, then sends bursts of /learn
+requests with unique topics at increasing concurrency. Pass --url to test
+an already running server instead (it will call the real model).
+
+Usage: python bench_load.py [--latency 1.0] [--concurrency 1,8,32,64] [--requests 128]
+                            [--workers 1] [--threads 32] [--url http://host:port]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def create_fake_app():
+    """App factory for gunicorn: real routes, fake Bedrock with FAKE_BEDROCK_LATENCY"""
+    from app import create_app, get_platform
+    from fake_aws import FakeBedrockClient
+
+    app = create_app()
+    get_platform().ai_provider.bedrock_client = FakeBedrockClient(
+        latency=float(os.getenv('FAKE_BEDROCK_LATENCY', '1.0')),
+        jitter=float(os.getenv('FAKE_BEDROCK_JITTER', '0.1'))
+    )
+    return app
+
+
+def start_server(port, latency, workers, threads):
+    env = dict(os.environ,
+               FAKE_BEDROCK_LATENCY=str(latency),
+               WEB_WORKERS=str(workers),
+               WEB_THREADS=str(threads),
+               LOG_LEVEL='warning',
+               RATE_LIMIT_ENABLED='false')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+         '--bind', f'127.0.0.1:{port}', '--access-logfile', '/dev/null',
+         'bench_load:create_fake_app()'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with code {server.returncode}')
+        try:
+            requests.get(f'{url}/metrics', timeout=1)
+            return server, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError('gunicorn did not start within 30s')
+
+
+def learn(session, url):
+    """One /learn request with a topic no cache has seen; returns (seconds, ok)"""
+    topic = f'load test topic {uuid.uuid4().hex}'
+    started = time.monotonic()
+    try:
+        response = session.post(f'{url}/learn',
+                                data={'topic': topic, 'level': 'primary', 'format': 'chat'},
+                                timeout=120)
+        ok = response.status_code == 200 and 'error' not in response.json()
+    except (requests.RequestException, ValueError):
+        ok = False
+    return time.monotonic() - started, ok
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run_level(url, concurrency, total):
+    sessions = [requests.Session() for _ in range(concurrency)]
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda i: learn(sessions[i % concurrency], url), range(total)))
+    elapsed = time.monotonic() - started
+
+    latencies = [seconds for seconds, ok in results if ok]
+    errors = sum(1 for _, ok in results if not ok)
+    if not latencies:
+        print(f"{concurrency:>11} | all {errors} requests failed")
+        return
+    throughput = len(latencies) / elapsed
+    mean = sum(latencies) / len(latencies)
+    # Little's law: requests actually in flight on the server
+    in_flight = throughput * mean
+    print(f"{concurrency:>11} | {throughput:>8.1f} | {percentile(latencies, 0.5) * 1000:>7.0f} | "
+          f"{percentile(latencies, 0.95) * 1000:>7.0f} | {in_flight:>9.1f} | {errors:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='benchmark a running server instead of starting one')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=1.0, help='fake Bedrock seconds per call')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--concurrency', default='1,8,32,64')
+    parser.add_argument('--requests', type=int, default=128, help='requests per concurrency level')
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if not url:
+        server, url = start_server(args.port, args.latency, args.workers, args.threads)
+        print(f"gunicorn gthread: {args.workers} workers x {args.threads} threads, "
+              f"fake Bedrock {args.latency:.2f}s")
+
+    try:
+        print("concurrency |    req/s | p50 ms  | p95 ms  | in flight | errors")
+        for level in [int(value) for value in args.concurrency.split(',')]:
+            run_level(url, level, max(args.requests, level))
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Microbenchmark: markdown_renderer vs the old regex-pass _format_response.
+
+Usage: python bench_markdown.py
+"""
+
+import random
+import re
+import timeit
+
+from markdown_renderer import MarkdownRenderer, render_markdown
+
+
+def legacy_format_response(text):
+    """BedrockProvider._format_response before markdown_renderer"""
+    text = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', text)
+    text = re.sub(r'\*(.*?)\*', r'<em>\1</em>', text)
+    text = re.sub(r'^#### (.*?)$', r'<h4>\1</h4>', text, flags=re.MULTILINE)
+    text = re.sub(r'^### (.*?)$', r'<h3>\1</h3>', text, flags=re.MULTILINE)
+    text = re.sub(r'^## (.*?)$', r'<h2>\1</h2>', text, flags=re.MULTILINE)
+    text = re.sub(r'^# (.*?)$', r'<h1>\1</h1>', text, flags=re.MULTILINE)
+
+    text = re.sub(r'^#{1,6}\s*', '', text, flags=re.MULTILINE)
+    text = re.sub(r'\*{1,2}', '', text)
+
+    lines = text.split('\n')
+    in_list = False
+    formatted_lines = []
+
+    for line in lines:
+        if re.match(r'^[•\-\*] ', line):
+            if not in_list:
+                formatted_lines.append('<ul>')
+                in_list = True
+            pattern = r'^[•\-\*] '
+            formatted_lines.append(f'<li>{re.sub(pattern, "", line)}</li>')
+        else:
+            if in_list:
+                formatted_lines.append('</ul>')
+                in_list = False
+            formatted_lines.append(line)
+
+    if in_list:
+        formatted_lines.append('</ul>')
+
+    return '\n'.join(formatted_lines)
+
+
+def sample_markdown(size, seed=42):
+    """Nova-style output: headings, paragraphs with emphasis, dash bullet lists"""
+    rng = random.Random(seed)
+    words = ['photosynthesis', 'energy', 'plants', 'light', 'chlorophyll', 'glucose',
+             'water', 'carbon', 'dioxide', 'oxygen', 'cells', 'process', 'leaf', 'sun']
+    blocks = []
+    length = 0
+    while length < size:
+        kind = rng.random()
+        if kind < 0.15:
+            block = f"{'#' * rng.randint(2, 4)} {' '.join(rng.choices(words, k=3)).title()}"
+        elif kind < 0.45:
+            block = '\n'.join(f"- **{rng.choice(words)}**: {' '.join(rng.choices(words, k=8))}."
+                              for _ in range(rng.randint(2, 5)))
+        else:
+            sentence = ' '.join(rng.choices(words, k=rng.randint(8, 20)))
+            block = f"{sentence.capitalize()} with *{rng.choice(words)}* and **{rng.choice(words)}**."
+        blocks.append(block)
+        length += len(block) + 2
+    return '\n\n'.join(blocks)[:size]
+
+
+def check_equivalence():
+    """Outputs must match on input the legacy code handled correctly (no '* ' bullets)"""
+    for size in (1000, 10000):
+        text = sample_markdown(size)
+        assert render_markdown(text) == legacy_format_response(text), f"Mismatch at {size} chars"
+
+        renderer = MarkdownRenderer()
+        streamed = ''.join(renderer.feed(text[i:i + 37]) for i in range(0, len(text), 37)) + renderer.close()
+        assert streamed == render_markdown(text), f"Streamed output differs at {size} chars"
+    print("Outputs match legacy renderer and streamed rendering")
+
+
+def main():
+    check_equivalence()
+    print(f"{'chars':>8} {'legacy us':>12} {'new us':>10} {'speedup':>8}")
+    for size in (1000, 5000, 10000, 50000):
+        text = sample_markdown(size)
+        number = max(10, 200000 // size)
+        legacy = min(timeit.repeat(lambda: legacy_format_response(text), number=number, repeat=5)) / number
+        new = min(timeit.repeat(lambda: render_markdown(text), number=number, repeat=5)) / number
+        print(f"{size:>8} {legacy * 1e6:>12.1f} {new * 1e6:>10.1f} {legacy / new:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
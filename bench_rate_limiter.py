@@ -0,0 +1,64 @@
+"""Microbenchmark: cost of one rate-limit check, per backend and key count.
+
+The in-memory limiter should stay within a few microseconds per check
+however many users it tracks; exits 1 if it doesn't (--budget-us).
+
+Usage: python bench_rate_limiter.py [--budget-us 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+
+from flask import Flask
+
+from rate_limiter import SQLiteTokenBucketLimiter, TokenBucketLimiter, client_key
+
+
+def per_check_us(limiter, keys, number):
+    index = [0]
+
+    def check():
+        index[0] += 1
+        limiter.hit(keys[index[0] % len(keys)], 1)
+
+    return min(timeit.repeat(check, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget-us', type=float, default=5.0, help='max in-memory microseconds per check')
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'keys':>8} {'us/check':>9}")
+    worst = 0.0
+    for count in (1, 1000, 100000):
+        keys = [f'user:{n}' for n in range(count)]
+        limiter = TokenBucketLimiter(rate=0.5, capacity=20)
+        cost = per_check_us(limiter, keys, 200000)
+        worst = max(worst, cost)
+        print(f"{'memory':<8} {count:>8} {cost:>9.2f}")
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'rate_limits.db')
+    for count in (1, 1000):
+        keys = [f'user:{n}' for n in range(count)]
+        limiter = SQLiteTokenBucketLimiter(db_path, rate=0.5, capacity=20)
+        print(f"{'sqlite':<8} {count:>8} {per_check_us(limiter, keys, 2000):>9.2f}")
+
+    # Working out who the client is also runs on every limited request
+    app = Flask(__name__)
+    with app.test_request_context('/learn', method='POST', data={'topic': 'gravity', 'user_id': 'abc123'}):
+        client_key()
+        key_us = min(timeit.repeat(client_key, number=100000, repeat=5)) / 100000 * 1e6
+    print(f"\nclient_key() from form data: {key_us:.2f} us")
+
+    if worst > args.budget_us:
+        print(f"ERROR: in-memory check took {worst:.2f} us, budget is {args.budget_us} us")
+        sys.exit(1)
+    print(f"SUCCESS: in-memory check within {args.budget_us} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""Benchmark every Flask route in-process against fake Bedrock, S3 and Transcribe.
+
+Each route is driven by its own burst of requests at the given concurrency.
+The report shows p50/p95/p99 latency, throughput, errors and the upstream
+calls each route made (Bedrock invocations, S3 operations, Transcribe
+calls). --output writes the results as JSON; --baseline compares against
+an earlier JSON file and exits 1 if any route's p95 regressed past
+--tolerance.
+
+Usage: python bench_routes.py [--concurrency 8] [--requests 64] [--routes learn,forum_threads]
+                              [--bedrock-latency 0.3] [--bedrock-tps 0] [--s3-latency 0.005]
+                              [--transcribe-latency 1.0] [--seed-objects 50] [--storage s3]
+                              [--output results.json] [--baseline previous.json] [--tolerance 1.25]
+"""
+
+import argparse
+import io
+import json
+import os
+import platform as host_platform
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+WORKDIR = tempfile.mkdtemp(prefix='bench_routes_')
+
+# Keep every on-disk store out of the working tree; set before the app reads them
+os.environ.update({
+    'S3_BUCKET_NAME': 'bench-bucket',
+    'TRANSCRIBE_BACKEND': 'aws',
+    'CANVAS_CACHE_S3': 'false',
+    'CANVAS_CACHE_DIR': os.path.join(WORKDIR, 'canvas'),
+    'FLASHCARD_DB_PATH': os.path.join(WORKDIR, 'flashcard_decks.db'),
+    'USAGE_DB_PATH': os.path.join(WORKDIR, 'usage.db'),
+    'RATE_LIMIT_ENABLED': 'false',
+    'FLASHCARD_PREGEN_INTERVAL': '86400',
+})
+
+from app import create_app, get_platform  # noqa: E402
+from bedrock_provider import canvas_cache  # noqa: E402
+from fake_aws import FAKE_PNG, FakeBedrockClient, FakeS3Client, FakeTranscribeClient  # noqa: E402
+from instrumentation import instrument_client  # noqa: E402
+from storage import Storage  # noqa: E402
+from storage_backends import FileDocumentStore, SQLiteDocumentStore  # noqa: E402
+
+TOPICS = ['Photosynthesis', 'Gravity', 'Fractions', 'Volcanoes',
+          'The water cycle', 'World War II', 'Electricity', 'DNA']
+SILENT_WAV = (b'RIFF$\x00\x00\x00WAVEfmt \x10\x00\x00\x00\x01\x00\x01\x00'
+              b'\x80>\x00\x00\x00}\x00\x00\x02\x00\x10\x00data\x00\x00\x00\x00')
+
+
+def respond(prompt):
+    """Fake model answers shaped like what each prompt asks for"""
+    if 'flashcards' in prompt:
+        return json.dumps([{'question': f'Question {n}?', 'answer': f'Answer {n}.'} for n in range(1, 6)])
+    if 'challenge question' in prompt:
+        return json.dumps({'question': 'What is 2 + 2?', 'options': ['3', '4', '5', '6'], 'correct_answer': '4'})
+    if 'one line per explanation' in prompt:
+        return '\n'.join(f'{n}: 7' for n in range(1, prompt.count('Student Explanation:') + 1))
+    if 'grading student explanations' in prompt:
+        return '7'
+    return ("Photosynthesis is how plants turn sunlight, water and carbon dioxide into sugar. "
+            "It happens inside chloroplasts. Oxygen is released as a by-product.")
+
+
+def unique_user():
+    return uuid.uuid4().hex[:12]
+
+
+# name -> function(client, index, state) returning a test-client response
+ROUTES = {
+    'home': lambda c, i, s: c.get('/'),
+    'formats': lambda c, i, s: c.get('/formats'),
+    'metrics': lambda c, i, s: c.get('/metrics'),
+    'learn': lambda c, i, s: c.post('/learn', data={
+        'topic': f'bench topic {uuid.uuid4().hex}', 'level': 'primary', 'format': 'chat'}),
+    'learn_repeat': lambda c, i, s: c.post('/learn', data={
+        'topic': TOPICS[i % len(TOPICS)], 'level': 'primary', 'format': 'chat'}),
+    'uploads': lambda c, i, s: c.get('/uploads/notes.txt'),
+    'canvas_image': lambda c, i, s: c.get(f"/canvas/{canvas_cache.filename(s['canvas_key'])}"),
+    'canvas_status': lambda c, i, s: c.get(f"/canvas/status/{s['canvas_key']}"),
+    'forum_threads': lambda c, i, s: c.get('/forum/threads'),
+    'forum_create_thread': lambda c, i, s: c.post('/forum/create_thread', json={
+        'user_id': unique_user(), 'title': 'How do plants eat?', 'content': 'Asking for a friend',
+        'topic': 'Photosynthesis', 'level': 'primary'}),
+    'forum_like_thread': lambda c, i, s: c.post('/forum/like_thread', json={
+        'user_id': unique_user(), 'thread_id': s['thread_ids'][i % len(s['thread_ids'])]}),
+    'leaderboard': lambda c, i, s: c.get('/leaderboard/all'),
+    'analyze_blurting': lambda c, i, s: c.post('/analyze_blurting', json={
+        'topic': 'Photosynthesis', 'level': 'primary',
+        'blurt_text': 'Plants use sunlight to make food from water and air.', 'time_spent': 60}),
+    'generate_flashcards': lambda c, i, s: c.post('/generate_flashcards', json={
+        'topic': TOPICS[i % len(TOPICS)], 'level': 'secondary'}),
+    'transcribe_audio': lambda c, i, s: c.post('/transcribe_audio', data={
+        'audio': (io.BytesIO(SILENT_WAV), 'recording.wav')}, content_type='multipart/form-data'),
+    'transcription_status': lambda c, i, s: c.get(
+        f"/transcribe_audio/{s['job_ids'][i % len(s['job_ids'])]}"),
+    'submit_explanation': lambda c, i, s: c.post('/submit_explanation', data={
+        'user_id': unique_user(), 'topic': 'Photosynthesis', 'level': 'primary',
+        'transcript': 'Plants catch sunlight with chlorophyll and turn it into sugar.'}),
+    'explanation_status': lambda c, i, s: c.get(
+        f"/explanation_status/{s['explanation_ids'][i % len(s['explanation_ids'])]}"),
+    'community_explanations': lambda c, i, s: c.get('/community_explanations/photosynthesis'),
+    'upvote_explanation': lambda c, i, s: c.post('/upvote_explanation', data={
+        'user_id': unique_user(), 'explanation_id': s['explanation_ids'][i % len(s['explanation_ids'])]}),
+    'user_stats': lambda c, i, s: c.get(f"/user_stats/{s['user_ids'][i % len(s['user_ids'])]}"),
+    'game_challenge': lambda c, i, s: c.get('/game/challenge/primary/Science'),
+    'game_categories': lambda c, i, s: c.get('/game/categories'),
+    'game_submit': lambda c, i, s: c.post('/game/submit', data={
+        'user_id': unique_user(), 'challenge_id': s['challenge_ids'][i % len(s['challenge_ids'])],
+        'answer': '4', 'time_taken': 12}),
+    'game_stats': lambda c, i, s: c.get(f"/game/stats/{s['user_ids'][i % len(s['user_ids'])]}"),
+    'game_leaderboard': lambda c, i, s: c.get('/game/leaderboard'),
+}
+
+
+def build_app(args):
+    """Create the app with every AWS client replaced by a fake"""
+    app = create_app()
+    app.config['UPLOAD_FOLDER'] = os.path.join(WORKDIR, 'uploads')
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    with open(os.path.join(app.config['UPLOAD_FOLDER'], 'notes.txt'), 'w') as f:
+        f.write('Photosynthesis notes\n' * 50)
+
+    fakes = {
+        'bedrock': FakeBedrockClient(latency=args.bedrock_latency, jitter=args.bedrock_latency / 5,
+                                     tokens_per_second=args.bedrock_tps or None, text=respond, seed=1),
+        's3': FakeS3Client(latency=args.s3_latency),
+    }
+    fakes['transcribe'] = FakeTranscribeClient(fakes['s3'], bucket_name='bench-bucket',
+                                               latency=args.transcribe_latency, seed=1)
+
+    platform = get_platform()
+    # Wrapped like the real clients, so /metrics attributes their calls to routes
+    platform.ai_provider.bedrock_client = instrument_client(fakes['bedrock'], 'bedrock-runtime')
+    platform.s3_storage.s3_client = instrument_client(fakes['s3'], 's3')
+    platform.transcribe_client = instrument_client(fakes['transcribe'], 'transcribe')
+    if args.storage != 's3':
+        # Community, game and forum data in a local store; audio and canvas still use the fake S3
+        store = (SQLiteDocumentStore(os.path.join(WORKDIR, 'storage.db')) if args.storage == 'sqlite'
+                 else FileDocumentStore(os.path.join(WORKDIR, 'storage')))
+        platform.storage = Storage(store, ai_provider=platform.ai_provider)
+    return app, platform, fakes
+
+
+def seed(platform, count):
+    """Store `count` threads, explanations, users, players and challenges"""
+    storage = platform.storage
+    state = {'thread_ids': [], 'explanation_ids': [], 'user_ids': [], 'challenge_ids': []}
+    for index in range(count):
+        user_id = f"seed{index:04d}user"
+        state['user_ids'].append(user_id)
+        state['thread_ids'].append(storage.create_forum_thread(
+            user_id, f'Question {index}', 'What is the difference?', TOPICS[index % len(TOPICS)], 'primary'
+        )['thread_id'])
+        state['explanation_ids'].append(storage.submit_explanation(
+            user_id, TOPICS[index % len(TOPICS)], 'primary',
+            'It is about how energy moves from one place to another.', clarity_score=6 + index % 4
+        )['id'])
+        storage._update_player_progress(user_id, True, 10 + index % 20)
+
+        challenge = {
+            'id': f'seed_challenge_{index}', 'title': 'Quick maths', 'category': 'Science',
+            'difficulty': 'primary', 'question': 'What is 2 + 2?', 'options': ['3', '4', '5', '6'],
+            'correct_answer': '4', 'points': 10, 'time_limit': 30
+        }
+        storage.store.put(f"challenges/primary/Science/{challenge['id']}.json", challenge)
+        state['challenge_ids'].append(challenge['id'])
+
+    state['canvas_key'] = canvas_cache.key_for('amazon.nova-canvas-v1:0', 'bench')
+    canvas_cache.put(state['canvas_key'], FAKE_PNG)
+    state['job_ids'] = [platform.transcribe_audio(SILENT_WAV, f'seed_{index}.wav') for index in range(4)]
+    for job_id in state['job_ids']:
+        while platform.get_transcription(job_id)['status'] not in ('COMPLETED', 'FAILED'):
+            time.sleep(0.05)
+    return state
+
+
+def settle(fakes, quiet=0.5, timeout=30):
+    """Wait for background work (grading, transcription polls) to stop calling upstream"""
+    deadline = time.monotonic() + timeout
+    counts = upstream_counts(fakes)
+    while time.monotonic() < deadline:
+        time.sleep(quiet)
+        latest = upstream_counts(fakes)
+        if latest == counts:
+            return
+        counts = latest
+
+
+def upstream_counts(fakes):
+    counts = {
+        'bedrock': fakes['bedrock'].calls,
+        'bedrock_output_tokens': fakes['bedrock'].output_tokens,
+        'transcribe': fakes['transcribe'].calls,
+        's3': fakes['s3'].calls,
+    }
+    counts.update({f's3.{op}': n for op, n in fakes['s3'].operations.items()})
+    return Counter(counts)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def is_error(response):
+    if response.status_code >= 400:
+        return True
+    if response.is_json:
+        body = response.get_json(silent=True)
+        return isinstance(body, dict) and (bool(body.get('error')) or body.get('success') is False)
+    return False
+
+
+def bench_route(app, name, state, fakes, concurrency, total):
+    handler = ROUTES[name]
+    clients = [app.test_client() for _ in range(concurrency)]
+
+    def one(index):
+        started = time.perf_counter()
+        try:
+            error = is_error(handler(clients[index % concurrency], index, state))
+        except Exception:
+            error = True
+        return time.perf_counter() - started, error
+
+    # One untimed request first, so template compilation and the like aren't measured
+    one(0)
+    settle(fakes)
+    before = upstream_counts(fakes)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+    upstream = upstream_counts(fakes)
+    upstream.subtract(before)
+
+    latencies = [seconds * 1000 for seconds, _ in results]
+    return {
+        'requests': total,
+        'errors': sum(1 for _, error in results if error),
+        'throughput_rps': round(total / elapsed, 2),
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'max_ms': round(max(latencies), 2),
+        'upstream_calls': {key: value for key, value in sorted(upstream.items()) if value},
+        'upstream_calls_per_request': {key: round(value / total, 2)
+                                       for key, value in sorted(upstream.items()) if value},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline_path, tolerance, out=sys.stdout):
+    """Print p95 changes against an earlier run; returns the routes that regressed"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)['routes']
+    regressed = []
+    print(f"\nAgainst {baseline_path} (p95, tolerance x{tolerance}):", file=out)
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['p95_ms'], result['p95_ms']
+        ratio = after / before if before else 1.0
+        flag = 'REGRESSED' if ratio > tolerance and after - before > 1 else ''
+        if flag:
+            regressed.append(name)
+        print(f"  {name:<24} {before:>9.1f} -> {after:>9.1f} ms  x{ratio:.2f} {flag}", file=out)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=64, help='requests per route')
+    parser.add_argument('--routes', help='comma separated subset of: ' + ', '.join(ROUTES))
+    parser.add_argument('--bedrock-latency', type=float, default=0.3, help='seconds per model call')
+    parser.add_argument('--bedrock-tps', type=float, default=0, help='output tokens per second (0 = instant)')
+    parser.add_argument('--s3-latency', type=float, default=0.005, help='seconds per S3 call')
+    parser.add_argument('--transcribe-latency', type=float, default=1.0, help='seconds until a job completes')
+    parser.add_argument('--seed-objects', type=int, default=50, help='stored threads, users, explanations, ...')
+    parser.add_argument('--storage', default='s3', choices=['s3', 'sqlite', 'filesystem'],
+                        help='document store for community, game and forum data')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--baseline', help='earlier --output file to compare p95 against')
+    parser.add_argument('--tolerance', type=float, default=1.25, help='allowed p95 ratio before failing')
+    args = parser.parse_args()
+
+    names = args.routes.split(',') if args.routes else list(ROUTES)
+    unknown = [name for name in names if name not in ROUTES]
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(unknown)}")
+
+    # The app and its background threads log with print; keep only the report on the terminal
+    report = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    app, platform, fakes = build_app(args)
+    state = seed(platform, args.seed_objects)
+
+    print(f"{args.requests} requests per route at concurrency {args.concurrency}; "
+          f"Bedrock {args.bedrock_latency}s, S3 {args.s3_latency * 1000:.0f}ms, "
+          f"{args.seed_objects} seeded objects per prefix, {args.storage} storage", file=report)
+    print(f"{'route':<24} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}  upstream calls per request",
+          file=report)
+
+    results = {}
+    for name in names:
+        result = bench_route(app, name, state, fakes, args.concurrency, args.requests)
+        results[name] = result
+        upstream = ', '.join(f"{key}={value:g}" for key, value in result['upstream_calls_per_request'].items()
+                             if not key.startswith('s3.') and key != 'bedrock_output_tokens')
+        print(f"{name:<24} {result['throughput_rps']:>8.1f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+              f"{result['p99_ms']:>8.1f} {result['errors']:>6}  {upstream}", file=report)
+
+    if args.output:
+        output = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': git_commit(),
+            'python': sys.version.split()[0],
+            'machine': host_platform.platform(),
+            'config': vars(args),
+            'routes': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+        print(f"\nWrote {args.output}", file=report)
+
+    if args.baseline and compare(results, args.baseline, args.tolerance, report):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Lookup latency and recall of the semantic topic cache.
+
+Usage: python bench_semantic_cache.py [--entries 100000] [--queries 2000]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+
+import numpy as np
+
+from semantic_cache import SemanticCache, normalize_query, same_topic
+
+SUBJECTS = ['photosynthesis', 'gravity', 'volcano', 'fractions', 'democracy', 'electricity',
+            'osmosis', 'algebra', 'magnetism', 'erosion', 'evolution', 'climate', 'atoms',
+            'friction', 'probability', 'geometry', 'digestion', 'weather', 'planets', 'tides']
+QUALIFIERS = ['in plants', 'in animals', 'for kids', 'in space', 'on earth', 'in history',
+              'in the body', 'in cities', 'at home', 'in oceans', 'basics', 'in medicine']
+REWORDINGS = ['how does {} work', 'what is {}', 'explain {}', '{}?', 'Tell me about {}']
+
+
+def make_topics(count, seed=1):
+    rng = random.Random(seed)
+    topics = set()
+    while len(topics) < count:
+        words = [rng.choice(SUBJECTS), rng.choice(QUALIFIERS), f"{rng.randrange(100000)}"]
+        topics.add(' '.join(words))
+    return list(topics)
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def timed_lookups(cache, queries):
+    latencies, results = [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for query in queries:
+            started = time.perf_counter()
+            results.append(cache.get(query, 'primary', 'chat'))
+            latencies.append(time.perf_counter() - started)
+    return latencies, results
+
+
+def misspell(topic, rng):
+    """Drop or double one letter of the first word"""
+    word, rest = topic.split(' ', 1)
+    i = rng.randrange(1, len(word) - 1)
+    word = word[:i] + word[i + 1:] if rng.random() < 0.5 else word[:i] + word[i] + word[i:]
+    return f"{word} {rest}"
+
+
+def report(name, latencies, extra=''):
+    print(f"{name}: p50 {percentile(latencies, 0.5) * 1e6:.0f}us, p99 {percentile(latencies, 0.99) * 1e6:.0f}us{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    cache = SemanticCache(max_entries=args.entries, ttl=None)
+    topics = make_topics(args.entries)
+    started = time.perf_counter()
+    for topic in topics:
+        cache.put(topic, 'primary', 'chat', topic)
+    print(f"Indexed {args.entries} topics in {time.perf_counter() - started:.1f}s")
+
+    rng = random.Random(2)
+    index = cache._partitions[('primary', 'chat')]
+    vectors = index.vectors[:len(index)].astype(np.float32)
+
+    # Rewordings normalize to a cached topic and take the exact-text path
+    originals = rng.sample(topics, args.queries)
+    reworded = [rng.choice(REWORDINGS).format(topic) for topic in originals]
+    latencies, results = timed_lookups(cache, reworded)
+    correct = sum(result == original for result, original in zip(results, originals))
+    report("Reworded topics", latencies, f", found original {correct}/{len(originals)}")
+
+    # Misspellings need the vector path; compare LSH candidates with a full matrix scan
+    misspelled = [misspell(topic, rng) for topic in originals]
+    latencies, results = timed_lookups(cache, misspelled)
+    correct = sum(result == original for result, original in zip(results, originals))
+    brute_latencies, found, agree = [], 0, 0
+    for query, result in zip(misspelled, results):
+        text = normalize_query(query)
+        vector = cache.vectorizer.transform(text)
+        started = time.perf_counter()
+        scores = vectors @ vector
+        expected = None
+        for best in np.argsort(-scores):
+            if scores[best] < cache.threshold:
+                break
+            if same_topic(text, index.texts[best]):
+                expected = index.values[best]
+                break
+        brute_latencies.append(time.perf_counter() - started)
+        found += expected is not None
+        agree += expected is not None and result == expected
+    report("Misspelled topics", latencies,
+           f", found original {correct}/{len(originals)}, LSH found {agree}/{found} of brute-force matches")
+    report("Brute-force matrix scan", brute_latencies)
+
+    unseen = [f"{rng.choice(SUBJECTS)} {rng.choice(QUALIFIERS)} {rng.randrange(100000, 200000)}"
+              for _ in range(args.queries)]
+    latencies, _ = timed_lookups(cache, unseen)
+    report("Unseen topics", latencies)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Microbenchmark: sentence_segmenter vs the old split-on-'.' _ensure_natural_ending.
+
+Usage: python bench_sentence_segmenter.py
+"""
+
+import random
+import timeit
+
+from sentence_segmenter import ensure_natural_ending
+
+
+def legacy_ensure_natural_ending(text):
+    """BedrockProvider._ensure_natural_ending before sentence_segmenter"""
+    sentences = text.split('.')
+    complete_sentences = []
+
+    for i, sentence in enumerate(sentences[:-1]):
+        sentence = sentence.strip()
+        if len(sentence) > 10:
+            complete_sentences.append(sentence)
+
+    last_fragment = sentences[-1].strip()
+    if last_fragment and len(last_fragment) > 10:
+        if last_fragment.endswith(('!', '?', ')', '}', ']')) or len(last_fragment) > 30:
+            complete_sentences.append(last_fragment)
+
+    result = '. '.join(complete_sentences)
+    if result and not result.endswith(('.', '!', '?')):
+        result += '.'
+
+    return result if result else text
+
+
+def sample_response(size, seed=42):
+    """Model-style prose with decimals and abbreviations, cut off mid-sentence"""
+    rng = random.Random(seed)
+    words = ['photosynthesis', 'energy', 'plants', 'light', 'chlorophyll', 'glucose',
+             'water', 'carbon', 'e.g.', 'about 3.5', 'oxygen', 'cells', 'Dr. Lee', 'leaf']
+    parts = []
+    length = 0
+    while length < size:
+        sentence = ' '.join(rng.choices(words, k=rng.randint(8, 20))).capitalize() + rng.choice('..!?')
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return ' '.join(parts)[:size]
+
+
+def main():
+    print(f"{'chars':>8} {'legacy us':>12} {'new us':>10} {'speedup':>8}")
+    for size in (1000, 5000, 10000, 50000):
+        text = sample_response(size)
+        number = max(10, 200000 // size)
+        legacy = min(timeit.repeat(lambda: legacy_ensure_natural_ending(text), number=number, repeat=5)) / number
+        new = min(timeit.repeat(lambda: ensure_natural_ending(text), number=number, repeat=5)) / number
+        print(f"{size:>8} {legacy * 1e6:>12.1f} {new * 1e6:>10.1f} {legacy / new:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Compare latency and throughput of the transcription backends.
+
+Usage: python bench_transcription.py recording.wav [--runs 5] [--concurrency 2] [--backends aws,local]
+"""
+
+import argparse
+import os
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from dotenv import load_dotenv
+
+from s3_storage import S3Storage
+from transcription_backends import AWSTranscribeBackend, LocalWhisperBackend
+from transcription_jobs import TranscriptionJobManager, COMPLETED, FAILED
+
+load_dotenv()
+
+
+def audio_seconds(path):
+    try:
+        with wave.open(path, 'rb') as audio:
+            return audio.getnframes() / float(audio.getframerate())
+    except Exception:
+        return None
+
+
+def build_backend(name):
+    if name == 'local':
+        return LocalWhisperBackend(model_size=os.getenv('LOCAL_WHISPER_MODEL', 'base.en'))
+    transcribe_client = boto3.client(
+        'transcribe',
+        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+        region_name='ap-southeast-1'
+    )
+    return AWSTranscribeBackend(transcribe_client, S3Storage())
+
+
+def run_one(manager, audio_bytes, index):
+    """Submit one clip and wait for it, returning end-to-end seconds"""
+    started = time.monotonic()
+    job_id = manager.submit(audio_bytes, f"bench_{index}_{int(started * 1000)}.wav")
+    while True:
+        job = manager.get(job_id)
+        if job['status'] in (COMPLETED, FAILED):
+            return time.monotonic() - started, job
+        time.sleep(0.05)
+
+
+def bench_backend(name, audio_bytes, runs, concurrency, clip_seconds):
+    try:
+        backend = build_backend(name)
+    except Exception as e:
+        print(f"{name}: skipped ({e})")
+        return
+
+    manager = TranscriptionJobManager(backend, workers=concurrency, poll_initial=0.5, poll_max=2.0)
+
+    # Warm up (model load for local, connection setup for AWS)
+    warmup, job = run_one(manager, audio_bytes, 'warmup')
+    if job['status'] == FAILED:
+        print(f"{name}: failed during warm-up: {job['error']}")
+        return
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda i: run_one(manager, audio_bytes, i), range(runs)))
+    wall = time.monotonic() - started
+
+    latencies = sorted(seconds for seconds, job in results if job['status'] == COMPLETED)
+    failures = runs - len(latencies)
+    if not latencies:
+        print(f"{name}: all {runs} runs failed")
+        return
+
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{name}: warm-up {warmup:.2f}s, p50 {p50:.2f}s, p95 {p95:.2f}s, "
+          f"throughput {len(latencies) / wall * 60:.1f} clips/min, failures {failures}")
+    if clip_seconds:
+        print(f"{name}: real-time factor {p50 / clip_seconds:.2f} (p50 latency / clip length)")
+    print(f"{name}: sample transcript: {results[0][1]['transcript']!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('audio')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=2)
+    parser.add_argument('--backends', default='aws,local')
+    args = parser.parse_args()
+
+    with open(args.audio, 'rb') as f:
+        audio_bytes = f.read()
+    clip_seconds = audio_seconds(args.audio)
+    print(f"Clip: {args.audio}, {len(audio_bytes)} bytes, {clip_seconds or 'unknown'} s")
+
+    for name in args.backends.split(','):
+        bench_backend(name.strip(), audio_bytes, args.runs, args.concurrency, clip_seconds)
+
+
+if __name__ == "__main__":
+    main()
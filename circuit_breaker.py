@@ -0,0 +1,175 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import as_completed, TimeoutError as FutureTimeout
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream that is currently failing"""
+
+
+class CircuitBreaker:
+    """Error-rate circuit breaker for a single upstream dependency.
+
+    Closed: calls pass through and outcomes are recorded in a sliding time
+    window. Once at least `min_calls` outcomes are in the window and the
+    failure ratio reaches `failure_rate_threshold`, the breaker opens and
+    every call fails immediately with CircuitOpenError. After
+    `open_seconds` a single probe call is let through (half-open); its
+    outcome decides whether the breaker closes again or re-opens.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_rate_threshold=0.5, min_calls=10,
+                 window_seconds=30.0, open_seconds=15.0, ignore_exceptions=()):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.ignore_exceptions = ignore_exceptions
+
+        self._lock = threading.Lock()
+        self._outcomes = deque()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._short_circuited = 0
+        self._times_opened = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn through the breaker, raising CircuitOpenError when open"""
+        probe = self._before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except self.ignore_exceptions:
+            self._release_probe(probe)
+            raise
+        except Exception:
+            self._record(False, probe)
+            raise
+        self._record(True, probe)
+        return result
+
+    def reset(self):
+        """Force the breaker closed and forget recorded outcomes"""
+        with self._lock:
+            self._outcomes.clear()
+            self._state = self.CLOSED
+            self._probe_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            self._prune(time.monotonic())
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            return {
+                'state': self._state,
+                'window_calls': len(self._outcomes),
+                'window_failures': failures,
+                'times_opened': self._times_opened,
+                'short_circuited': self._short_circuited
+            }
+
+    def _before_call(self):
+        with self._lock:
+            if self._state == self.CLOSED:
+                return False
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._short_circuited += 1
+        raise CircuitOpenError(f"{self.name} circuit is open, skipping call")
+
+    def _release_probe(self, probe):
+        if probe:
+            with self._lock:
+                self._probe_in_flight = False
+
+    def _record(self, ok, probe):
+        now = time.monotonic()
+        with self._lock:
+            if probe:
+                self._probe_in_flight = False
+                if ok:
+                    print(f"{self.name} circuit closed again after successful probe")
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open(now)
+                return
+
+            self._outcomes.append((now, ok))
+            self._prune(now)
+            if self._state != self.CLOSED or len(self._outcomes) < self.min_calls:
+                return
+            failures = sum(1 for _, outcome in self._outcomes if not outcome)
+            if failures / len(self._outcomes) >= self.failure_rate_threshold:
+                self._open(now)
+
+    def _open(self, now):
+        print(f"{self.name} circuit opened, failing fast for {self.open_seconds}s")
+        self._state = self.OPEN
+        self._opened_at = now
+        self._times_opened += 1
+
+    def _prune(self, now):
+        cutoff = now - self.window_seconds
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            self._outcomes.popleft()
+
+
+class LatencyTracker:
+    """Rolling sample of recent call durations used to pick hedge delays"""
+
+    def __init__(self, size=200, min_samples=20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction):
+        """Return the given percentile in seconds, or None with too few samples"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(fraction * len(ordered)))
+        return ordered[index]
+
+
+def hedged_call(fn, delay, executor):
+    """Call fn, firing a second identical attempt if the first is still running after `delay` seconds.
+
+    Returns whichever attempt succeeds first. If both fail, the first
+    error is raised. The losing attempt is left to finish in the background.
+    """
+    # Run attempts in this thread's context so their calls count towards the request
+    first = executor.submit(contextvars.copy_context().run, fn)
+    try:
+        return first.result(timeout=delay)
+    except FutureTimeout:
+        pass
+
+    print(f"Hedging slow call after {delay:.2f}s")
+    second = executor.submit(contextvars.copy_context().run, fn)
+    errors = []
+    for future in as_completed([first, second]):
+        try:
+            return future.result()
+        except Exception as e:
+            errors.append(e)
+    raise errors[0]
@@ -0,0 +1,145 @@
+"""Negotiated gzip/brotli compression of dynamic responses.
+
+/learn answers are kilobytes of HTML inside JSON and the forum and
+community routes return whole collections, all highly compressible. An
+after_request hook compresses text-like responses the client accepts
+(brotli when the Brotli package is installed and the client prefers or
+ties it, else gzip):
+
+- buffered responses of at least COMPRESS_MIN_SIZE bytes are compressed
+  in one go;
+- streamed responses (generators, server-sent events) are compressed
+  chunk by chunk, flushing after each one, so every event still reaches
+  the client as soon as it is produced.
+
+Responses that already have a Content-Encoding (the precompressed
+/assets/ files) or ask for no-transform are left alone. Levels default to
+the cheap end, where bench_compression.py shows most of the saving for a
+fraction of the CPU.
+"""
+
+import os
+import zlib
+
+from dotenv import load_dotenv
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip is offered
+    brotli = None
+
+load_dotenv()
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+SKIP_STATUSES = (204, 206, 304)
+
+
+class GzipEncoder:
+    def __init__(self, level):
+        # wbits 31: zlib stream with a gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def make_encoder(encoding, level=None):
+    if encoding == 'br':
+        return BrotliEncoder(int(os.getenv('COMPRESS_BROTLI_QUALITY', '4')) if level is None else level)
+    return GzipEncoder(int(os.getenv('COMPRESS_GZIP_LEVEL', '3')) if level is None else level)
+
+
+def compress(data, encoding, level=None):
+    """Whole-body compression with the same settings as responses"""
+    encoder = make_encoder(encoding, level)
+    return encoder.compress(data) + encoder.finish()
+
+
+def compress_stream(chunks, encoding, level=None):
+    """Compress an iterable of byte chunks, flushing after each so none is held back"""
+    encoder = make_encoder(encoding, level)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                yield encoder.compress(chunk) + encoder.flush()
+        yield encoder.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def is_compressible(mimetype):
+    return bool(mimetype) and (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES
+                               or mimetype.endswith('+json'))
+
+
+def choose_encoding(accept_encodings):
+    """'br', 'gzip' or None for a request's Accept-Encoding"""
+    gzip_quality = accept_encodings['gzip']
+    brotli_quality = accept_encodings['br'] if brotli is not None else 0
+    if brotli_quality and brotli_quality >= gzip_quality:
+        return 'br'
+    return 'gzip' if gzip_quality else None
+
+
+def init_app(app):
+    """Compress eligible responses after every request"""
+    app.after_request(compress_response)
+
+
+def compress_response(response):
+    if os.getenv('COMPRESS_ENABLED', 'true').lower() != 'true':
+        return response
+    if not is_compressible(response.mimetype) or response.status_code in SKIP_STATUSES \
+            or response.status_code < 200 or 'Content-Encoding' in response.headers \
+            or 'no-transform' in response.headers.get('Cache-Control', ''):
+        return response
+
+    # Whether or not this client gets it compressed, caches must key on the header
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.direct_passthrough = False
+        response.headers.pop('Content-Length', None)
+        # Byte ranges of the identity body don't apply to the encoded one
+        response.headers.pop('Accept-Ranges', None)
+    else:
+        data = response.get_data()
+        if len(data) < int(os.getenv('COMPRESS_MIN_SIZE', '1024')):
+            return response
+        response.set_data(compress(data, encoding))
+
+    response.headers['Content-Encoding'] = encoding
+    # The encoded bytes differ from the identity ones, so the tag can only be weak
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,94 @@
+"""Version counters for data that read-only routes are built from.
+
+Every write to a dataset (forum threads, explanations, user stats,
+player progress) bumps its counter. A cached response records the
+versions it was built from and stays valid until one of them moves, so
+checking it costs a counter lookup instead of re-reading S3.
+
+The in-memory counters are per process, so with several gunicorn
+workers a worker only sees its own writes until its cached responses
+expire. Set DATA_VERSIONS_BACKEND=sqlite to share counters through one
+SQLite file instead.
+"""
+
+import os
+import threading
+
+from dotenv import load_dotenv
+
+from instrumentation import connect_sqlite
+
+load_dotenv()
+
+
+class DataVersions:
+    """Per-dataset counters held in memory"""
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def bump(self, name):
+        with self._lock:
+            self._versions[name] = self._versions.get(name, 0) + 1
+            return self._versions[name]
+
+    def get(self, names):
+        """Current versions of `names`, as a tuple in the same order"""
+        with self._lock:
+            return tuple(self._versions.get(name, 0) for name in names)
+
+
+class SQLiteDataVersions:
+    """Per-dataset counters in a SQLite table, shared by every process using the file"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = connect_sqlite(self.db_path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS data_versions (
+                    name TEXT PRIMARY KEY,
+                    version INTEGER
+                )
+            ''')
+            self._local.conn = conn
+        return conn
+
+    def bump(self, name):
+        conn = self._connect()
+        conn.execute('''
+            INSERT INTO data_versions (name, version) VALUES (?, 1)
+            ON CONFLICT (name) DO UPDATE SET version = version + 1
+        ''', (name,))
+        return conn.execute('SELECT version FROM data_versions WHERE name = ?', (name,)).fetchone()[0]
+
+    def get(self, names):
+        """Current versions of `names`, as a tuple in the same order"""
+        rows = dict(self._connect().execute(
+            f"SELECT name, version FROM data_versions WHERE name IN ({', '.join('?' * len(names))})",
+            tuple(names)
+        ).fetchall())
+        return tuple(rows.get(name, 0) for name in names)
+
+
+def build_data_versions():
+    if os.getenv('DATA_VERSIONS_BACKEND', 'memory') == 'sqlite':
+        return SQLiteDataVersions(os.getenv('DATA_VERSIONS_DB_PATH', 'data_versions.db'))
+    return DataVersions()
+
+
+data_versions = build_data_versions()
+
+
+def bump_quietly(name):
+    """Bump after a successful write; a failure here must not fail the write"""
+    try:
+        data_versions.bump(name)
+    except Exception as e:
+        print(f"Data version error for {name}: {e}")
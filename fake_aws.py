@@ -0,0 +1,293 @@
+"""In-process stand-ins for AWS clients, used by tests and benchmarks"""
+
+import base64
+import io
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from botocore.exceptions import ClientError
+
+# 1x1 transparent PNG returned by the fake Nova Canvas
+FAKE_PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=='
+)
+
+
+class FakeBedrockClient:
+    """Fault-injecting bedrock-runtime client.
+
+    Each invoke_model call sleeps for `latency` seconds (plus optional
+    jitter), then fails with `error_code` with probability `failure_rate`,
+    otherwise returns a Nova-shaped response. `slow_rate` makes a fraction
+    of calls take `slow_latency` instead, to exercise hedging. With
+    `tokens_per_second`, text responses also take time proportional to the
+    number of output tokens, like a streaming model would. `text` may be a
+    function of the prompt, to answer different prompts differently.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0,
+                 error_code='ServiceUnavailableException', slow_rate=0.0,
+                 slow_latency=0.0, text=None, seed=None, tokens_per_second=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.error_code = error_code
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.text = text or (
+            "Photosynthesis is how plants turn sunlight, water and carbon dioxide into sugar. "
+            "It happens inside chloroplasts. Oxygen is released as a by-product."
+        )
+        self.tokens_per_second = tokens_per_second
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def invoke_model(self, modelId, body, **kwargs):
+        with self._lock:
+            self.calls += 1
+            slow = self._random.random() < self.slow_rate
+            fail = self._random.random() < self.failure_rate
+            jitter = self._random.uniform(0, self.jitter) if self.jitter else 0.0
+
+        prompt = text = None
+        if 'canvas' not in modelId:
+            prompt = json.loads(body)['messages'][0]['content'][0]['text']
+            text = self.text(prompt) if callable(self.text) else self.text
+
+        delay = (self.slow_latency if slow else self.latency) + jitter
+        if self.tokens_per_second and text is not None:
+            delay += (len(text) // 4) / self.tokens_per_second
+        time.sleep(delay)
+
+        if fail:
+            raise ClientError(
+                {'Error': {'Code': self.error_code, 'Message': 'Injected fault'}},
+                'InvokeModel'
+            )
+
+        if text is None:
+            payload = {'images': [base64.b64encode(FAKE_PNG).decode('ascii')]}
+        else:
+            payload = {
+                'output': {'message': {'role': 'assistant', 'content': [{'text': text}]}},
+                'usage': {'inputTokens': len(prompt) // 4, 'outputTokens': len(text) // 4},
+                'stopReason': 'end_turn'
+            }
+            with self._lock:
+                self.input_tokens += payload['usage']['inputTokens']
+                self.output_tokens += payload['usage']['outputTokens']
+        return {'body': io.BytesIO(json.dumps(payload).encode('utf-8'))}
+
+
+class FakeS3Client:
+    """S3 client kept in memory, or under `root` on disk if given.
+
+    Implements the calls S3Storage, ImageCache and the transcription
+    backend make. Each call sleeps `latency` seconds and is counted in
+    `operations`, so N+1 access patterns show up as call counts. Buckets
+    are not separated; keys from every bucket share one namespace.
+    """
+
+    def __init__(self, root=None, latency=0.0):
+        self.root = root
+        self.latency = latency
+        self.calls = 0
+        self.operations = Counter()
+        self._objects = {}
+        self._lock = threading.Lock()
+        if root:
+            os.makedirs(root, exist_ok=True)
+
+    def put_object(self, Bucket, Key, Body=b'', ContentType=None, **kwargs):
+        self._record('PutObject')
+        if isinstance(Body, str):
+            Body = Body.encode('utf-8')
+        elif hasattr(Body, 'read'):
+            Body = Body.read()
+        self._write(Key, bytes(Body))
+        return {'ETag': f'"{len(Body):x}"'}
+
+    def get_object(self, Bucket, Key, **kwargs):
+        self._record('GetObject')
+        data = self._read(Key, 'GetObject')
+        return {'Body': io.BytesIO(data), 'ContentLength': len(data)}
+
+    def head_object(self, Bucket, Key, **kwargs):
+        self._record('HeadObject')
+        data = self._read(Key, 'HeadObject', error_code='404')
+        return {'ContentLength': len(data)}
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        self._record('DeleteObject')
+        if self.root:
+            try:
+                os.remove(self._path(Key))
+            except FileNotFoundError:
+                pass
+        else:
+            with self._lock:
+                self._objects.pop(Key, None)
+        return {}
+
+    def upload_file(self, Filename, Bucket, Key, **kwargs):
+        self._record('PutObject')
+        with open(Filename, 'rb') as f:
+            self._write(Key, f.read())
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, **kwargs):
+        self._record('PutObject')
+        self._write(Key, Fileobj.read())
+
+    def list_objects_v2(self, Bucket, Prefix='', Delimiter=None, MaxKeys=1000,
+                        ContinuationToken=None, StartAfter=None, **kwargs):
+        """One page of keys in order, with CommonPrefixes when Delimiter is set"""
+        self._record('ListObjectsV2')
+        after = ContinuationToken or StartAfter or ''
+        contents, prefixes = [], []
+        truncated = False
+        for key in self._keys():
+            if not key.startswith(Prefix) or key <= after:
+                continue
+            if len(contents) + len(prefixes) >= MaxKeys:
+                truncated = True
+                break
+            if Delimiter and Delimiter in key[len(Prefix):]:
+                common = key[:key.index(Delimiter, len(Prefix)) + len(Delimiter)]
+                if not prefixes or prefixes[-1] != common:
+                    prefixes.append(common)
+                continue
+            contents.append({'Key': key, 'Size': len(self._read(key, 'ListObjectsV2')),
+                             'LastModified': datetime.now(timezone.utc)})
+
+        response = {'KeyCount': len(contents) + len(prefixes), 'IsTruncated': truncated}
+        if contents:
+            response['Contents'] = contents
+        if prefixes:
+            response['CommonPrefixes'] = [{'Prefix': prefix} for prefix in prefixes]
+        if truncated:
+            response['NextContinuationToken'] = (contents[-1]['Key'] if contents else prefixes[-1])
+        return response
+
+    def _record(self, operation):
+        with self._lock:
+            self.calls += 1
+            self.operations[operation] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def _write(self, key, data):
+        if not self.root:
+            with self._lock:
+                self._objects[key] = data
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _read(self, key, operation, error_code='NoSuchKey'):
+        try:
+            if self.root:
+                with open(self._path(key), 'rb') as f:
+                    return f.read()
+            with self._lock:
+                return self._objects[key]
+        except (KeyError, FileNotFoundError, IsADirectoryError):
+            raise ClientError({'Error': {'Code': error_code, 'Message': 'Not Found'}}, operation)
+
+    def _keys(self):
+        if not self.root:
+            with self._lock:
+                return sorted(self._objects)
+        keys = []
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if not name.endswith('.tmp'):
+                    relative = os.path.relpath(os.path.join(directory, name), self.root)
+                    keys.append(relative.replace(os.sep, '/'))
+        return sorted(keys)
+
+
+class FakeTranscribeClient:
+    """AWS Transcribe client whose jobs complete `latency` seconds after starting.
+
+    Finished transcripts are written to `s3_client` under transcripts/ and
+    reported with an s3:// TranscriptFileUri, which AWSTranscribeBackend
+    reads back through S3 instead of over HTTP.
+    """
+
+    def __init__(self, s3_client, bucket_name='fake-bucket', latency=1.0, failure_rate=0.0,
+                 transcript='Photosynthesis turns sunlight into chemical energy.', seed=None):
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.transcript = transcript
+        self.calls = 0
+        self.operations = Counter()
+        self._jobs = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def start_transcription_job(self, TranscriptionJobName, Media, **kwargs):
+        with self._lock:
+            self._record('StartTranscriptionJob')
+            if TranscriptionJobName in self._jobs:
+                raise ClientError({'Error': {'Code': 'ConflictException',
+                                             'Message': 'Job name already exists'}},
+                                  'StartTranscriptionJob')
+            self._jobs[TranscriptionJobName] = {
+                'started': time.monotonic(),
+                'fail': self._random.random() < self.failure_rate,
+                'media': Media['MediaFileUri']
+            }
+        return {'TranscriptionJob': {'TranscriptionJobName': TranscriptionJobName,
+                                     'TranscriptionJobStatus': 'IN_PROGRESS'}}
+
+    def get_transcription_job(self, TranscriptionJobName):
+        with self._lock:
+            self._record('GetTranscriptionJob')
+            job = self._jobs.get(TranscriptionJobName)
+        if job is None:
+            raise ClientError({'Error': {'Code': 'BadRequestException',
+                                         'Message': 'The requested job could not be found'}},
+                              'GetTranscriptionJob')
+
+        result = {'TranscriptionJobName': TranscriptionJobName}
+        if time.monotonic() - job['started'] < self.latency:
+            result['TranscriptionJobStatus'] = 'IN_PROGRESS'
+        elif job['fail']:
+            result['TranscriptionJobStatus'] = 'FAILED'
+            result['FailureReason'] = 'Injected fault'
+        else:
+            key = f"transcripts/{TranscriptionJobName}.json"
+            if not job.get('written'):
+                document = {'results': {'transcripts': [{'transcript': self.transcript}]}}
+                self.s3_client.put_object(Bucket=self.bucket_name, Key=key, Body=json.dumps(document))
+                job['written'] = True
+            result['TranscriptionJobStatus'] = 'COMPLETED'
+            result['Transcript'] = {'TranscriptFileUri': f"s3://{self.bucket_name}/{key}"}
+        return {'TranscriptionJob': result}
+
+    def delete_transcription_job(self, TranscriptionJobName):
+        with self._lock:
+            self._record('DeleteTranscriptionJob')
+            self._jobs.pop(TranscriptionJobName, None)
+        return {}
+
+    def _record(self, operation):
+        self.calls += 1
+        self.operations[operation] += 1
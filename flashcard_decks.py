@@ -0,0 +1,237 @@
+import json
+import re
+import threading
+import time
+from collections import Counter
+
+from instrumentation import connect_sqlite
+
+# Bump when the flashcard prompt or card format changes to retire old decks
+DECK_VERSION = 1
+MAX_CARDS = 20
+
+_decoder = json.JSONDecoder()
+
+
+def normalize_topic(topic):
+    """Cache key for a topic: case, punctuation and spacing don't matter"""
+    return ' '.join(re.sub(r'[^\w\s]', ' ', topic.lower()).split())
+
+
+def validate_deck(cards):
+    """Return the cards as clean {'question', 'answer'} dicts, or None if any is malformed"""
+    if not isinstance(cards, list) or not 0 < len(cards) <= MAX_CARDS:
+        return None
+    deck = []
+    for card in cards:
+        if not isinstance(card, dict):
+            return None
+        question, answer = card.get('question'), card.get('answer')
+        if not isinstance(question, str) or not isinstance(answer, str) or not question.strip() or not answer.strip():
+            return None
+        deck.append({'question': question.strip(), 'answer': answer.strip()})
+    return deck
+
+
+def parse_deck(text):
+    """Find the first JSON array of flashcards in model output.
+
+    Decodes from each '[' with raw_decode instead of a greedy `\\[.*\\]`
+    match, so text after the array (or a second array) can't corrupt it.
+    """
+    start = text.find('[')
+    while start != -1:
+        try:
+            cards, _ = _decoder.raw_decode(text, start)
+        except ValueError:
+            cards = None
+        deck = validate_deck(cards)
+        if deck:
+            return deck
+        start = text.find('[', start + 1)
+    return None
+
+
+class FlashcardDeckStore:
+    """Validated flashcard decks in SQLite, keyed by (normalized topic, level).
+
+    Decks expire after `ttl` seconds and are ignored once DECK_VERSION
+    changes. Requests are counted in memory and flushed with
+    `flush_requests`, so a cache hit costs a single indexed read.
+    """
+
+    def __init__(self, db_path='flashcard_decks.db', ttl=7 * 24 * 3600):
+        self.db_path = db_path
+        self.ttl = ttl
+        self._requests = Counter()
+        self._topics = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.init_database()
+
+    def _connect(self):
+        return connect_sqlite(self.db_path, timeout=10)
+
+    def init_database(self):
+        """Initialize database tables"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS flashcard_decks (
+                topic_key TEXT,
+                level TEXT,
+                topic TEXT,
+                cards TEXT,
+                version INTEGER,
+                created_at REAL,
+                expires_at REAL,
+                PRIMARY KEY (topic_key, level)
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS flashcard_requests (
+                topic_key TEXT,
+                level TEXT,
+                topic TEXT,
+                request_count INTEGER DEFAULT 0,
+                last_requested REAL,
+                PRIMARY KEY (topic_key, level)
+            )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def get(self, topic, level):
+        """Cached deck for topic and level, or None if missing, expired or outdated"""
+        topic_key = normalize_topic(topic)
+        with self._lock:
+            self._requests[(topic_key, level)] += 1
+            self._topics[(topic_key, level)] = topic
+
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                'SELECT cards FROM flashcard_decks WHERE topic_key = ? AND level = ? AND version = ? AND expires_at > ?',
+                (topic_key, level, DECK_VERSION, time.time())
+            ).fetchone()
+        finally:
+            conn.close()
+
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return json.loads(row[0]) if row else None
+
+    def put(self, topic, level, cards):
+        """Store a validated deck"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('''
+                INSERT OR REPLACE INTO flashcard_decks
+                (topic_key, level, topic, cards, version, created_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (normalize_topic(topic), level, topic, json.dumps(cards), DECK_VERSION, now, now + self.ttl))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def flush_requests(self):
+        """Add in-memory request counts to the database"""
+        with self._lock:
+            counts, self._requests = self._requests, Counter()
+            topics, self._topics = self._topics, {}
+        if not counts:
+            return
+
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.executemany('''
+                INSERT INTO flashcard_requests (topic_key, level, topic, request_count, last_requested)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(topic_key, level) DO UPDATE SET
+                    request_count = request_count + excluded.request_count,
+                    topic = excluded.topic,
+                    last_requested = excluded.last_requested
+            ''', [(key[0], key[1], topics[key], count, now) for key, count in counts.items()])
+            conn.commit()
+        finally:
+            conn.close()
+
+    def decks_to_refresh(self, limit=20, refresh_within=3600):
+        """Most requested (topic, level) pairs whose deck is missing, outdated or about to expire"""
+        conn = self._connect()
+        try:
+            rows = conn.execute('''
+                SELECT r.topic, r.level FROM flashcard_requests r
+                LEFT JOIN flashcard_decks d ON d.topic_key = r.topic_key AND d.level = r.level
+                WHERE d.topic_key IS NULL OR d.version != ? OR d.expires_at < ?
+                ORDER BY r.request_count DESC
+                LIMIT ?
+            ''', (DECK_VERSION, time.time() + refresh_within, limit)).fetchall()
+        finally:
+            conn.close()
+        return rows
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+class FlashcardPregenerator:
+    """Background thread that keeps decks warm for the most requested topics.
+
+    Every `interval` seconds it flushes request counts and regenerates up
+    to `top_n` missing or soon-to-expire decks through `generate_deck`,
+    which returns a validated deck or None.
+    """
+
+    def __init__(self, store, generate_deck, interval=600, top_n=20):
+        self.store = store
+        self.generate_deck = generate_deck
+        self.interval = interval
+        self.top_n = top_n
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='flashcard-pregen', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self):
+        """Refresh the most requested stale decks, returning how many were stored"""
+        self.store.flush_requests()
+        stored = 0
+        for topic, level in self.store.decks_to_refresh(self.top_n, refresh_within=self.interval * 2):
+            if self._stop.is_set():
+                break
+            try:
+                deck = self.generate_deck(topic, level)
+            except Exception as e:
+                print(f"Flashcard pre-generation error for {topic}: {e}")
+                continue
+            if deck:
+                self.store.put(topic, level, deck)
+                stored += 1
+        if stored:
+            print(f"Pre-generated {stored} flashcard decks")
+        return stored
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Flashcard pre-generation error: {e}")
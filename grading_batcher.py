@@ -0,0 +1,93 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class GradingBatcher:
+    """Collects grading requests and grades them several at a time.
+
+    Callers block in `grade` while a collector thread gathers items for up
+    to `max_wait` seconds (or until `max_batch` are queued) and hands the
+    whole batch to `grade_batch` on a pool of `max_concurrency` threads,
+    so a burst of submissions has several batches in flight at once.
+    `grade_batch` must return one score per item, in order (None where no
+    score could be produced). A failed batch resolves every waiting item
+    to None so callers can apply their own default. Each batch runs in the
+    context of its first caller, keeping usage and instrumentation
+    attributed to the route that submitted it.
+    """
+
+    def __init__(self, grade_batch, max_batch=8, max_wait=0.3, max_concurrency=4):
+        self.grade_batch = grade_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+
+        self._items = []
+        self._cond = threading.Condition()
+        self._worker = None
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='grading-batch')
+        self.batches = 0
+        self.items_graded = 0
+        self.in_flight = 0
+
+    def grade(self, topic, level, explanation, timeout=60):
+        """Queue one explanation and wait for its score"""
+        future = Future()
+        with self._cond:
+            self._items.append(({'topic': topic, 'level': level, 'explanation': explanation}, future,
+                                contextvars.copy_context()))
+            self._ensure_worker()
+            self._cond.notify()
+        return future.result(timeout=timeout)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'batches': self.batches,
+                'items': self.items_graded,
+                'items_per_call': round(self.items_graded / self.batches, 2) if self.batches else None,
+                'queued': len(self._items),
+                'in_flight': self.in_flight
+            }
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='grading-batcher', daemon=True)
+            self._worker.start()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._items:
+                self._cond.wait()
+            # Give other requests a short window to join the batch
+            deadline = time.monotonic() + self.max_wait
+            while len(self._items) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, self._items = self._items[:self.max_batch], self._items[self.max_batch:]
+            self.batches += 1
+            self.items_graded += len(batch)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            with self._cond:
+                self.in_flight += 1
+            context = batch[0][2]
+            self._executor.submit(context.run, self._grade, batch)
+
+    def _grade(self, batch):
+        try:
+            scores = self.grade_batch([item for item, _, _ in batch])
+        except Exception as e:
+            print(f"Batch grading error: {e}")
+            scores = []
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+        for index, (_, future, _) in enumerate(batch):
+            future.set_result(scores[index] if index < len(scores) else None)
@@ -0,0 +1,39 @@
+"""Production server settings: gunicorn -c gunicorn.conf.py wsgi:app
+
+Handlers spend most of their time waiting on Bedrock, Transcribe and S3,
+so each worker process runs many threads (gthread) instead of relying on
+more processes. Every worker has its own AILearningPlatform, admission
+controller and caches, so total Bedrock concurrency is up to
+WEB_WORKERS x BEDROCK_MAX_CONCURRENCY_CEILING.
+
+One worker by default: transcription jobs and images still being drawn
+by Nova Canvas are tracked in the process that started them, so a poll
+routed to another worker would get 404 or 'failed'. Raise WEB_WORKERS
+only behind a load balancer with sticky sessions.
+"""
+
+import os
+
+bind = os.getenv('BIND', f"0.0.0.0:{os.getenv('PORT', '8080')}")
+
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_WORKERS', '1'))
+# Concurrent requests per worker; most of them are blocked on network I/O
+threads = int(os.getenv('WEB_THREADS', '32'))
+
+# Nova Canvas and long Nova Pro answers can take close to a minute
+timeout = int(os.getenv('WEB_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then so slow leaks can't build up
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', '2000'))
+max_requests_jitter = 200
+
+# Don't preload: the platform starts background threads and holds clients,
+# which must be created in each worker rather than forked from the master
+preload_app = False
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info')
@@ -0,0 +1,149 @@
+"""Response caching with ETags for read-only JSON routes.
+
+A route decorated with @cached_json('forum') keeps its last response
+body per URL, along with the data versions it was built from. While
+those versions are unchanged and the entry is younger than
+HTTP_CACHE_TTL seconds, requests are answered from the entry: a 304 when
+the client's If-None-Match matches its ETag, otherwise the stored body.
+Either way the route's S3 reads are skipped.
+
+The ETag is a digest of the body, so every worker building the same
+body hands out the same tag. Cache-Control allows clients and proxies to
+reuse a response for a few seconds and to serve it stale while they
+revalidate.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from dotenv import load_dotenv
+from flask import current_app, request
+
+from data_versions import data_versions
+from single_flight import SingleFlight, SingleFlightTimeout
+
+load_dotenv()
+
+
+class CachedResponse:
+    def __init__(self, body, status, versions, cacheable):
+        self.body = body
+        self.status = status
+        self.versions = versions
+        self.cacheable = cacheable
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        self.created = time.monotonic()
+
+
+class ResponseCache:
+    """Last response per URL, in LRU order, dropped beyond `max_entries`"""
+
+    def __init__(self, ttl=60.0, max_entries=1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.not_modified = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshes = SingleFlight(timeout=ttl)
+
+    def lookup(self, key, versions):
+        """The entry for `key` if it was built from `versions` and hasn't expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.versions != versions or time.monotonic() - entry.created > self.ttl:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def refresh(self, key, versions, build):
+        """Build a fresh entry; concurrent misses for the same URL share one build"""
+        def run():
+            entry = build()
+            if entry.cacheable:
+                with self._lock:
+                    self._entries[key] = entry
+                    self._entries.move_to_end(key)
+                    if len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            return entry
+        return self._refreshes.do(('http_cache', key, versions), run)
+
+    def count(self, outcome):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits,
+                    'not_modified': self.not_modified, 'misses': self.misses}
+
+
+response_cache = ResponseCache(
+    ttl=float(os.getenv('HTTP_CACHE_TTL', '60')),
+    max_entries=int(os.getenv('HTTP_CACHE_MAX_ENTRIES', '1000'))
+)
+
+
+def _is_cacheable(response):
+    # These routes report failures as {'error': ...} with a 200; never keep those
+    if response.status_code != 200 or response.mimetype != 'application/json':
+        return False
+    data = response.get_json(silent=True)
+    if isinstance(data, dict):
+        return not data.get('error') and data.get('success') is not False
+    return data is not None
+
+
+def cached_json(*datasets, max_age=None):
+    """Route decorator caching the JSON response until one of `datasets` is written"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if os.getenv('HTTP_CACHE_ENABLED', 'true').lower() != 'true':
+                return view(*args, **kwargs)
+            key = request.full_path
+            try:
+                versions = data_versions.get(datasets)
+            except Exception as e:
+                # Without versions there is no telling whether an entry is current
+                print(f"HTTP cache error: {e}")
+                return view(*args, **kwargs)
+
+            entry = response_cache.lookup(key, versions)
+            if entry is None:
+                response_cache.count('misses')
+
+                def build():
+                    response = current_app.make_response(view(*args, **kwargs))
+                    return CachedResponse(response.get_data(), response.status_code, versions,
+                                          _is_cacheable(response))
+                try:
+                    entry = response_cache.refresh(key, versions, build)
+                except SingleFlightTimeout:
+                    return view(*args, **kwargs)
+            elif request.if_none_match.contains_weak(entry.etag):
+                response_cache.count('not_modified')
+            else:
+                response_cache.count('hits')
+
+            response = current_app.response_class(entry.body, status=entry.status, mimetype='application/json')
+            if not entry.cacheable:
+                return response
+            response.set_etag(entry.etag)
+            seconds = int(os.getenv('HTTP_CACHE_MAX_AGE', '5')) if max_age is None else max_age
+            stale = int(os.getenv('HTTP_CACHE_STALE_WHILE_REVALIDATE', '30'))
+            response.headers['Cache-Control'] = f"public, max-age={seconds}, stale-while-revalidate={stale}"
+            # Answers 304 with no body when If-None-Match matches
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
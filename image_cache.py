@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+KEY_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+class ImageCache:
+    """Content-addressed cache for generated images.
+
+    Images are stored as `<sha256>.png` under `directory`, keyed on the
+    model id and the full generation request (prompt text plus params), so
+    identical requests map to the same file and different topics can never
+    collide. Recency is tracked in memory and mirrored to file mtimes, and
+    the least recently used images are evicted past `max_entries` or
+    `max_bytes`. If an S3 client is attached, images are also written to
+    `canvas/<key>.png` so other workers can serve them.
+    """
+
+    def __init__(self, directory, max_entries=500, max_bytes=200 * 1024 * 1024,
+                 s3_client=None, bucket_name=None):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def key_for(model_id, request_body):
+        """Stable cache key for a model request"""
+        payload = json.dumps({'model': model_id, 'request': request_body}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def is_valid_key(key):
+        return bool(KEY_PATTERN.match(key))
+
+    def filename(self, key):
+        return f"{key}.png"
+
+    def path(self, key):
+        return os.path.join(self.directory, self.filename(key))
+
+    def contains(self, key, record=True):
+        """Check for a cached image, on disk or in S3 if another worker made it"""
+        with self._lock:
+            hit = key in self._entries
+            if hit:
+                self._entries.move_to_end(key)
+        if hit:
+            try:
+                os.utime(self.path(key))
+            except OSError:
+                # Removed by another worker's eviction since we indexed it
+                self._drop_entry(key)
+                hit = False
+        if not hit:
+            hit = self._adopt_file(key) or self._fetch_from_s3(key)
+
+        if record:
+            with self._lock:
+                if hit:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        return hit
+
+    def put(self, key, data):
+        """Store image bytes under key"""
+        tmp_path = f"{self.path(key)}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path(key))
+        self._add_entry(key, len(data))
+
+        if self.s3_client:
+            try:
+                self.s3_client.put_object(
+                    Bucket=self.bucket_name,
+                    Key=f"canvas/{self.filename(key)}",
+                    Body=data,
+                    ContentType='image/png'
+                )
+            except Exception as e:
+                print(f"Error uploading cached image to S3: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def _adopt_file(self, key):
+        """Index an image another worker wrote to the shared directory"""
+        try:
+            size = os.path.getsize(self.path(key))
+        except OSError:
+            return False
+        self._add_entry(key, size)
+        return True
+
+    def _fetch_from_s3(self, key):
+        if not self.s3_client:
+            return False
+        try:
+            content = self.s3_client.get_object(Bucket=self.bucket_name, Key=f"canvas/{self.filename(key)}")
+            data = content['Body'].read()
+        except Exception:
+            return False
+        tmp_path = f"{self.path(key)}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path(key))
+        self._add_entry(key, len(data))
+        return True
+
+    def _drop_entry(self, key):
+        with self._lock:
+            size = self._entries.pop(key, None)
+            if size is not None:
+                self._total_bytes -= size
+
+    def _add_entry(self, key, size):
+        evicted = []
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)
+            self._entries[key] = size
+            self._total_bytes += size
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+                old_key, old_size = self._entries.popitem(last=False)
+                self._total_bytes -= old_size
+                evicted.append(old_key)
+
+        for old_key in evicted:
+            try:
+                os.remove(self.path(old_key))
+            except OSError:
+                pass
+
+    def _load_index(self):
+        """Rebuild the LRU order from files left by a previous run"""
+        files = []
+        for name in os.listdir(self.directory):
+            key, ext = os.path.splitext(name)
+            if ext == '.png' and self.is_valid_key(key):
+                stat = os.stat(os.path.join(self.directory, name))
+                files.append((stat.st_mtime, key, stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
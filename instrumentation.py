@@ -0,0 +1,295 @@
+"""Per-request accounting of upstream calls.
+
+Work done while a request is handled (boto3 calls to S3, Bedrock and
+Transcribe, SQLite queries, file extraction) is attributed to that
+request through a context variable. When the request ends its totals go
+into per-route latency histograms, served on /metrics, and one JSON log
+line. Work on background threads (grading, pre-generation) is not part of
+any request and is only timed if the thread copies the request's context.
+"""
+
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, request
+
+# Upper bounds in milliseconds; the last bucket catches everything slower
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    """Upstream calls made while handling one request"""
+
+    def __init__(self, method, route):
+        self.method = method
+        self.route = route
+        self.started = time.perf_counter()
+        # name -> [count, seconds, bytes, errors]
+        self.calls = {}
+        # Labels for usage accounting, e.g. level, format, user_id
+        self.tags = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds, nbytes=0, error=False):
+        with self._lock:
+            entry = self.calls.setdefault(name, [0, 0.0, 0, 0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += nbytes
+            entry[3] += int(error)
+
+    def summary(self):
+        with self._lock:
+            return {
+                name: {'count': count, 'ms': round(seconds * 1000, 2), 'bytes': nbytes, 'errors': errors}
+                for name, (count, seconds, nbytes, errors) in sorted(self.calls.items())
+            }
+
+
+def record(name, seconds, nbytes=0, error=False):
+    """Attribute one upstream call to the current request, if there is one"""
+    stats = _current.get()
+    if stats is not None:
+        stats.add(name, seconds, nbytes, error)
+
+
+def tag(**tags):
+    """Label the current request (level, format, user_id, ...); empty values are ignored"""
+    stats = _current.get()
+    if stats is not None:
+        stats.tags.update({name: value for name, value in tags.items() if value})
+
+
+def request_labels():
+    """Route and tags of the current request; outside one, the background thread's name"""
+    stats = _current.get()
+    if stats is None:
+        # Pool threads are named like 'grading_3'
+        return {'route': 'background:' + threading.current_thread().name.rsplit('_', 1)[0]}
+    return {'route': f"{stats.method} {stats.route}", **stats.tags}
+
+
+@contextmanager
+def span(name, nbytes=0):
+    """Time the enclosed block as one call named e.g. 'extract.pdf'"""
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        record(name, time.perf_counter() - started, nbytes, error)
+
+
+class RouteMetrics:
+    """Latency histograms and upstream call totals per route"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def observe(self, key, seconds, status, calls):
+        ms = seconds * 1000
+        bucket = next((i for i, bound in enumerate(self.buckets) if ms <= bound), len(self.buckets))
+        with self._lock:
+            route = self._routes.get(key)
+            if route is None:
+                route = self._routes[key] = {
+                    'count': 0, 'errors': 0, 'total_ms': 0.0,
+                    'histogram': [0] * (len(self.buckets) + 1), 'calls': {}
+                }
+            route['count'] += 1
+            route['errors'] += int(status >= 500)
+            route['total_ms'] += ms
+            route['histogram'][bucket] += 1
+            for name, (count, call_seconds, _, _) in calls.items():
+                totals = route['calls'].setdefault(name, [0, 0.0])
+                totals[0] += count
+                totals[1] += call_seconds * 1000
+
+    def _quantile(self, histogram, count, fraction):
+        """Upper bound of the bucket holding the given quantile"""
+        target = fraction * count
+        seen = 0
+        for bound, n in zip(self.buckets + (None,), histogram):
+            seen += n
+            if seen >= target:
+                return bound
+        return None
+
+    def stats(self):
+        with self._lock:
+            routes = {key: dict(route, histogram=list(route['histogram']),
+                                calls={name: list(t) for name, t in route['calls'].items()})
+                      for key, route in self._routes.items()}
+        labels = [str(bound) for bound in self.buckets] + ['inf']
+        result = {}
+        for key, route in sorted(routes.items()):
+            count = route['count']
+            result[key] = {
+                'count': count,
+                'errors': route['errors'],
+                'mean_ms': round(route['total_ms'] / count, 2),
+                'p50_ms_le': self._quantile(route['histogram'], count, 0.5),
+                'p95_ms_le': self._quantile(route['histogram'], count, 0.95),
+                'p99_ms_le': self._quantile(route['histogram'], count, 0.99),
+                'histogram_ms': dict(zip(labels, route['histogram'])),
+                'calls_per_request': {name: round(n / count, 2) for name, (n, _) in sorted(route['calls'].items())},
+                'upstream_ms_per_request': {name: round(ms / count, 2) for name, (_, ms) in sorted(route['calls'].items())},
+            }
+        return result
+
+
+route_metrics = RouteMetrics()
+
+
+# boto3 clients: botocore emits before-call/after-call around every API call
+def instrument_client(client, service=None):
+    """Attribute a client's API calls to the current request; returns the client to use.
+
+    botocore clients are hooked through their event system. Anything else
+    (the fakes in fake_aws.py) is wrapped in a proxy that times each method.
+    """
+    events = getattr(getattr(client, 'meta', None), 'events', None)
+    if events is None:
+        return _InstrumentedProxy(client, service or type(client).__name__)
+    events.register_first('before-call.*.*', _before_call)
+    events.register('after-call.*.*', _after_call)
+    events.register('after-call-error.*.*', _after_call_error)
+    return client
+
+
+def _before_call(params=None, context=None, **kwargs):
+    if context is not None and _current.get() is not None:
+        body = (params or {}).get('body')
+        context['instrumentation'] = (time.perf_counter(), len(body) if isinstance(body, (bytes, str)) else 0)
+
+
+def _finish_call(event_name, context, response_bytes=0, error=False):
+    started = (context or {}).pop('instrumentation', None)
+    if started is None:
+        return
+    # event_name is e.g. 'after-call.s3.GetObject'
+    _, service, operation = event_name.split('.', 2)
+    record(f"{service}.{operation}", time.perf_counter() - started[0], started[1] + response_bytes, error)
+
+
+def _after_call(http_response=None, context=None, event_name='after-call.unknown.unknown', **kwargs):
+    size = 0
+    if http_response is not None:
+        try:
+            size = int(http_response.headers.get('content-length', 0))
+        except (TypeError, ValueError):
+            pass
+    _finish_call(event_name, context, size)
+
+
+def _after_call_error(context=None, event_name='after-call-error.unknown.unknown', **kwargs):
+    _finish_call(event_name, context, error=True)
+
+
+class _InstrumentedProxy:
+    """Times every public method call on a non-botocore client"""
+
+    def __init__(self, client, service):
+        self._client = client
+        self._service = service
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        operation = ''.join(part.capitalize() for part in name.split('_'))
+
+        def call(*args, **kwargs):
+            with span(f"{self._service}.{operation}"):
+                return attr(*args, **kwargs)
+        return call
+
+
+# SQLite
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3 connection timing execute/executemany/commit as 'sqlite.<VERB>'"""
+
+    def execute(self, sql, *args):
+        with span(f"sqlite.{sql.split(None, 1)[0].upper()}"):
+            return super().execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        with span(f"sqlite.{sql.split(None, 1)[0].upper()}"):
+            return super().executemany(sql, *args)
+
+    def commit(self):
+        with span('sqlite.COMMIT'):
+            return super().commit()
+
+
+def connect_sqlite(path, **kwargs):
+    """sqlite3.connect with queries attributed to the current request"""
+    return sqlite3.connect(path, factory=InstrumentedConnection, **kwargs)
+
+
+# Flask
+def init_app(app):
+    """Track every request: histogram on /metrics plus a JSON summary line"""
+    app.before_request(_start_request)
+    app.after_request(_record_status)
+    app.teardown_request(_finish_request)
+
+
+def _start_request():
+    rule = request.url_rule.rule if request.url_rule else '<unmatched>'
+    stats = RequestStats(request.method, rule)
+    g._instrumentation = (stats, _current.set(stats))
+
+
+def _record_status(response):
+    g._instrumentation_status = response.status_code
+    return response
+
+
+def _finish_request(exc=None):
+    started = g.pop('_instrumentation', None)
+    if started is None:
+        return
+    stats, token = started
+    try:
+        _current.reset(token)
+    except ValueError:
+        _current.set(None)
+
+    seconds = time.perf_counter() - stats.started
+    status = g.pop('_instrumentation_status', 500)
+    route_metrics.observe(f"{stats.method} {stats.route}", seconds, status, stats.calls)
+
+    if os.getenv('REQUEST_LOG', 'true').lower() != 'true':
+        return
+    calls = stats.summary()
+    repeat_threshold = int(os.getenv('REQUEST_LOG_REPEAT_THRESHOLD', '10'))
+    entry = {
+        'event': 'request',
+        'method': stats.method,
+        'route': stats.route,
+        'path': request.path,
+        'status': status,
+        'ms': round(seconds * 1000, 2),
+        'upstream_ms': round(sum(call['ms'] for call in calls.values()), 2),
+        'calls': calls,
+    }
+    if stats.tags:
+        entry['tags'] = stats.tags
+    # The same call made many times in one request is usually an N+1 loop
+    repeated = [name for name, call in calls.items() if call['count'] >= repeat_threshold]
+    if repeated:
+        entry['repeated_calls'] = repeated
+    print(json.dumps(entry))
@@ -0,0 +1,123 @@
+"""Multi-keyword matching in a single pass over the text (Aho-Corasick).
+
+Keywords are compiled once into a trie with failure links, so finding
+every keyword in a query costs time proportional to the query length
+plus the number of matches, however many keywords there are. Matching is
+case-insensitive and, by default, only counts matches that start at the
+beginning of a word ("ai" matches "AI ethics" but not "chair"; "algorithm"
+still matches "algorithms"). With word_end the match must also end a
+word, apart from a plural 's' ("ai" no longer matches "air pressure" or
+"aim", "algorithm" still matches "algorithms").
+"""
+
+from collections import deque
+
+
+def _ends_word(text, end):
+    """Whether a match ending at `end` is followed by a word boundary, allowing a plural 's'"""
+    if end < len(text) and text[end] == 's':
+        end += 1
+    return end == len(text) or not text[end].isalnum()
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton mapping keywords to values.
+
+    Values keep the order they were added in; `first` uses that order to
+    break ties the same way a loop over the original list would.
+    """
+
+    def __init__(self, keywords=()):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        # Lowest keyword order in each node's subtree, for prefix lookups
+        self._subtree_first = [None]
+        self._values = []
+        for keyword, value in keywords:
+            self.add(keyword, value)
+        self.build()
+
+    def __len__(self):
+        return len(self._values)
+
+    def add(self, keyword, value):
+        """Add a keyword; call build() before matching again"""
+        keyword = keyword.lower()
+        order = len(self._values)
+        self._values.append(value)
+        node = 0
+        for char in keyword:
+            if self._subtree_first[node] is None:
+                self._subtree_first[node] = order
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+                self._subtree_first.append(None)
+            node = next_node
+        if self._subtree_first[node] is None:
+            self._subtree_first[node] = order
+        self._out[node] = self._out[node] + ((order, len(keyword)),)
+
+    def build(self):
+        """Compute failure links and merge outputs along them (breadth first)"""
+        queue = deque(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                queue.append(child)
+
+    def iter_matches(self, text, word_start=True, word_end=False):
+        """Yield (start, end, order) for every keyword occurrence in text"""
+        goto, fail, out = self._goto, self._fail, self._out
+        text = text.lower()
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for order, length in out[node]:
+                start = index - length + 1
+                if word_start and start > 0 and text[start - 1].isalnum():
+                    continue
+                if word_end and not _ends_word(text, index + 1):
+                    continue
+                yield start, index + 1, order
+
+    def find_all(self, text, word_start=True, word_end=False):
+        """Every distinct matching value, in order of first occurrence in text"""
+        values = []
+        for _, _, order in self.iter_matches(text, word_start, word_end):
+            value = self._values[order]
+            if value not in values:
+                values.append(value)
+        return values
+
+    def first(self, text, word_start=True, word_end=False):
+        """Matching value that was added earliest, or None"""
+        best = None
+        for _, _, order in self.iter_matches(text, word_start, word_end):
+            if best is None or order < best:
+                best = order
+        return None if best is None else self._values[best]
+
+    def completion(self, prefix):
+        """Earliest-added value whose keyword starts with prefix, or None"""
+        node = 0
+        for char in prefix.lower():
+            node = self._goto[node].get(char)
+            if node is None:
+                return None
+        order = self._subtree_first[node]
+        return None if order is None else self._values[order]
@@ -59,7 +59,7 @@ class KnowledgeBarterSystem:
         """Submit user explanation and get AI clarity score"""
         try:
             # Score explanation clarity using AI
-            clarity_score = self._score_explanation_clarity(topic, transcript)
+            clarity_score = self._score_explanation_clarity(topic, level, transcript)
             
             # Calculate knowledge points (1-10 based on clarity)
             knowledge_points = max(1, clarity_score)
@@ -96,29 +96,11 @@ class KnowledgeBarterSystem:
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
-    def _score_explanation_clarity(self, topic, transcript):
+    def _score_explanation_clarity(self, topic, level, transcript):
         """Use AI to score explanation clarity (1-10)"""
-        prompt = f"""
-        Score this student explanation of '{topic}' for clarity and accuracy on a scale of 1-10.
-        
-        Student explanation: {transcript}
-        
-        Consider:
-        - Accuracy of information
-        - Clarity of explanation
-        - Use of examples
-        - Logical flow
-        
-        Respond with only a number from 1-10.
-        """
-        
-        try:
-            response = self.ai_provider._get_gemini_response(prompt)
-            # Extract number from response
-            score = int(''.join(filter(str.isdigit, response))[:1] or '5')
-            return min(max(score, 1), 10)  # Ensure 1-10 range
-        except:
-            return 5  # Default score if AI fails
+        # Shares the provider's batched grader with /submit_explanation
+        score = self.ai_provider.grade_explanation(topic, level, transcript)
+        return min(max(score, 1), 10)  # Ensure 1-10 range
     
     def get_community_explanations(self, topic, limit=5):
         """Get peer explanations for upvoting"""
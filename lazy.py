@@ -0,0 +1,32 @@
+import threading
+
+
+class lazy_property:
+    """Compute an attribute on first access and keep it on the instance.
+
+    Like functools.cached_property, but creation is guarded by a lock so
+    concurrent first requests build a client or thread pool only once.
+    Assigning the attribute (e.g. a fake client in tests) skips creation.
+    """
+
+    _lock = threading.RLock()
+
+    def __init__(self, func):
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            pass
+        with self._lock:
+            if self.name not in instance.__dict__:
+                instance.__dict__[self.name] = self.func(instance)
+            return instance.__dict__[self.name]
@@ -0,0 +1,111 @@
+"""Markdown to HTML for model output.
+
+Handles the subset Nova and Gemini actually produce: `#`-`####` headings,
+`**strong**` / `*em*`, `-`, `*` and `•` bullet lists, and plain paragraph
+lines. Paragraph lines are passed through with inline formatting applied;
+the page renders them with `white-space: pre-line`, so no <p> wrapping is
+added. Anything that is not at column 0 (such as the indented HTML of the
+visual format) is left alone apart from emphasis.
+"""
+
+import re
+
+INLINE_PATTERN = re.compile(r'\*\*(.*?)\*\*|\*(.*?)\*')
+HEADING_PATTERN = re.compile(r'#{1,6}')
+BULLET_CHARS = '•-*'
+BLOCK_START_CHARS = '#' + BULLET_CHARS
+
+
+def _inline_match(match):
+    strong = match.group(1)
+    if strong is not None:
+        return f'<strong>{render_inline(strong)}</strong>'
+    return f'<em>{match.group(2)}</em>'
+
+
+def render_inline(text):
+    """Apply emphasis and drop any stray asterisks"""
+    if '*' not in text:
+        return text
+    return INLINE_PATTERN.sub(_inline_match, text).replace('*', '')
+
+
+class MarkdownRenderer:
+    """Line-at-a-time renderer that can be fed streamed chunks.
+
+    Every call to `feed` returns the HTML for the lines completed so far,
+    and `close` flushes the last partial line. Concatenating all returned
+    pieces gives exactly `render_markdown(full_text)`.
+    """
+
+    def __init__(self):
+        self._pending = ''
+        self._in_list = False
+        self._started = False
+
+    def feed(self, chunk):
+        """Render every complete line in chunk, buffering the trailing partial one"""
+        if not chunk:
+            return ''
+        lines = (self._pending + chunk).split('\n')
+        self._pending = lines.pop()
+        out = []
+        for line in lines:
+            self._render_line(line, out)
+        return self._join(out)
+
+    def close(self):
+        """Flush the buffered line and close any open list"""
+        out = []
+        self._render_line(self._pending, out)
+        self._pending = ''
+        if self._in_list:
+            out.append('</ul>')
+            self._in_list = False
+        return self._join(out)
+
+    def _join(self, out):
+        if not out:
+            return ''
+        text = '\n'.join(out)
+        if self._started:
+            return '\n' + text
+        self._started = True
+        return text
+
+    def _render_line(self, line, out):
+        first = line[:1]
+        if first and first in BLOCK_START_CHARS:
+            if first == '#':
+                out.append(self._heading(line))
+                return
+            if line[1:2] == ' ':
+                if not self._in_list:
+                    out.append('<ul>')
+                    self._in_list = True
+                out.append(f'<li>{render_inline(line[2:])}</li>')
+                return
+
+        if self._in_list:
+            out.append('</ul>')
+            self._in_list = False
+        out.append(render_inline(line))
+
+    def _heading(self, line):
+        if self._in_list:
+            prefix = '</ul>\n'
+            self._in_list = False
+        else:
+            prefix = ''
+
+        level = HEADING_PATTERN.match(line).end()
+        if level <= 4 and line[level:level + 1] == ' ':
+            return f'{prefix}<h{level}>{render_inline(line[level + 1:])}</h{level}>'
+        # Unsupported heading depth or missing space: keep the text only
+        return prefix + render_inline(line[level:].lstrip())
+
+
+def render_markdown(text):
+    """Render a complete markdown string to HTML"""
+    renderer = MarkdownRenderer()
+    return renderer.feed(text) + renderer.close()
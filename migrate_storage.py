@@ -0,0 +1,256 @@
+"""Copy community, game and forum documents between storage backends.
+
+Moves every document under the prefixes Storage uses (explanations,
+upvotes, user and player stats, attempts, challenges, forum threads)
+from one document store to another, e.g. out of the S3 bucket into
+SQLite before switching STORAGE_BACKEND, or back again:
+
+- keys are read in order and fetched concurrently, a batch ahead of the
+  writes, so only a couple of batches are ever held in memory. A failed
+  read is retried with backoff; keys that still can't be read are kept
+  in the checkpoint and retried, on their own, by the next run;
+- each batch is written in one transaction on SQLite (concurrently on
+  S3 and the filesystem), then the last key written is saved to the
+  checkpoint file. An interrupted run picks up after that key;
+- when every prefix is copied, the counts are compared and any source
+  key missing from the destination is reported (exit status 1).
+
+Nothing is ever deleted: documents already in the destination are
+overwritten by the source's copy and other keys are left alone.
+
+Usage: python migrate_storage.py --from s3 --to sqlite [--prefix users/ ...]
+                                 [--batch-size 500] [--workers 16]
+                                 [--checkpoint migrate_storage.checkpoint.json]
+                                 [--restart] [--verify-only]
+                                 [--sqlite-path storage.db] [--dir storage]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from storage_backends import FileDocumentStore, SQLiteDocumentStore
+
+load_dotenv()
+
+PREFIXES = ['explanations/', 'upvotes/', 'users/', 'players/', 'attempts/', 'challenges/', 'forum/threads/']
+BACKENDS = ['s3', 'sqlite', 'filesystem']
+
+
+def open_store(name, sqlite_path=None, directory=None):
+    """Document store for a backend name, defaulting to the app's configuration"""
+    if name == 'sqlite':
+        return SQLiteDocumentStore(sqlite_path or os.getenv('STORAGE_DB_PATH', 'storage.db'))
+    if name == 'filesystem':
+        return FileDocumentStore(directory or os.getenv('STORAGE_DIR', 'storage'))
+    if name == 's3':
+        from s3_storage import S3Storage
+        return S3Storage().store
+    raise ValueError(f"Unknown backend {name!r}; use {', '.join(BACKENDS)}")
+
+
+class Checkpoint:
+    """Progress per prefix, saved as JSON after every batch"""
+
+    def __init__(self, path, source, destination):
+        self.path = path
+        self.state = {'source': source, 'destination': destination, 'prefixes': {}}
+
+    def load(self):
+        """Resume from an earlier run between the same two stores"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            state = json.load(f)
+        if (state.get('source'), state.get('destination')) != (self.state['source'], self.state['destination']):
+            raise ValueError(f"{self.path} is for {state.get('source')} -> {state.get('destination')}; "
+                             f"pass --restart to start over")
+        self.state = state
+
+    def progress(self, prefix):
+        progress = self.state['prefixes'].setdefault(prefix, {'last_key': '', 'copied': 0, 'done': False})
+        progress.setdefault('failed', [])
+        return progress
+
+    def save(self):
+        if not self.path:
+            return
+        # Write then rename, so an interrupted save never loses the previous checkpoint
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _batches(keys, size):
+    for start in range(0, len(keys), size):
+        yield keys[start:start + size]
+
+
+def _get(store, key, attempts=3, retry_delay=0.5):
+    """A document, or None if it vanished; read errors are retried with exponential backoff"""
+    for attempt in range(attempts):
+        try:
+            return store.get(key)
+        except Exception as e:
+            if attempt == attempts - 1:
+                raise
+            print(f"Error reading {key}, retrying: {e}")
+            time.sleep(retry_delay * 2 ** attempt)
+
+
+def copy_prefix(source, destination, prefix, checkpoint, pool, batch_size=500, retry_delay=0.5, out=sys.stdout):
+    """Copy every document under `prefix` not yet recorded in the checkpoint; returns (copied, skipped, failed)"""
+    progress = checkpoint.progress(prefix)
+    failed = set(progress['failed'])
+    if progress['done'] and not failed:
+        print(f"{prefix:<16} already copied ({progress['copied']} documents)", file=out)
+        return 0, 0, 0
+
+    # Keys an earlier run couldn't read come first, then everything after the last batch written
+    keys = sorted(failed) + [key for key in source.keys(prefix) if key > progress['last_key']]
+    copied = skipped = 0
+    started = time.monotonic()
+
+    def fetch(batch):
+        return [(key, pool.submit(_get, source, key, retry_delay=retry_delay)) for key in batch]
+
+    batches = _batches(keys, batch_size)
+    pending = fetch(next(batches, []))
+    while pending:
+        # Start fetching the next batch while this one is written
+        upcoming = fetch(next(batches, []))
+        documents = []
+        for key, future in pending:
+            try:
+                document = future.result()
+            except Exception as e:
+                print(f"Error reading {key}: {e}")
+                failed.add(key)
+                continue
+            failed.discard(key)
+            if document is None:
+                skipped += 1
+            else:
+                documents.append((key, document))
+
+        if isinstance(destination, SQLiteDocumentStore):
+            destination.put_many(documents)
+        else:
+            for future in [pool.submit(destination.put, key, document) for key, document in documents]:
+                future.result()
+
+        copied += len(documents)
+        progress['last_key'] = max(progress['last_key'], pending[-1][0])
+        progress['copied'] += len(documents)
+        progress['failed'] = sorted(failed)
+        checkpoint.save()
+        pending = upcoming
+
+    progress['done'] = True
+    checkpoint.save()
+    elapsed = time.monotonic() - started
+    rate = copied / elapsed if elapsed > 0 else 0
+    print(f"{prefix:<16} {copied:>8} copied {skipped:>6} skipped {len(failed):>6} failed "
+          f"{elapsed:>8.1f}s {rate:>10.1f} objects/s", file=out)
+    return copied, skipped, len(failed)
+
+
+def verify(source, destination, prefixes, out=sys.stdout):
+    """Compare counts per prefix; returns the number of source keys missing from the destination"""
+    missing_total = 0
+    for prefix in prefixes:
+        source_keys = source.keys(prefix)
+        missing = sorted(set(source_keys) - set(destination.keys(prefix)))
+        missing_total += len(missing)
+        status = 'ok' if not missing else f"{len(missing)} missing, e.g. {missing[0]}"
+        print(f"{prefix:<16} source {len(source_keys):>8} destination {destination.count(prefix):>8}  {status}",
+              file=out)
+    return missing_total
+
+
+def migrate(source, destination, prefixes=PREFIXES, checkpoint=None, batch_size=500, workers=16,
+            retry_delay=0.5, out=sys.stdout):
+    """Copy `prefixes` from one store to another and verify; returns a summary dict"""
+    checkpoint = checkpoint or Checkpoint(None, source.name, destination.name)
+    checkpoint.load()
+    copied = skipped = failed = 0
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='migrate') as pool:
+        for prefix in prefixes:
+            prefix_copied, prefix_skipped, prefix_failed = copy_prefix(
+                source, destination, prefix, checkpoint, pool,
+                batch_size=batch_size, retry_delay=retry_delay, out=out)
+            copied += prefix_copied
+            skipped += prefix_skipped
+            failed += prefix_failed
+    elapsed = time.monotonic() - started
+    rate = copied / elapsed if elapsed > 0 else 0
+    print(f"{'total':<16} {copied:>8} copied {skipped:>6} skipped {failed:>6} failed "
+          f"{elapsed:>8.1f}s {rate:>10.1f} objects/s", file=out)
+
+    print("\nVerifying...", file=out)
+    missing = verify(source, destination, prefixes, out=out)
+    # Keep the checkpoint while any key is unread, so the next run retries just those
+    if not missing and not failed:
+        checkpoint.remove()
+    return {'copied': copied, 'skipped': skipped, 'failed': failed, 'missing': missing,
+            'seconds': elapsed, 'objects_per_second': rate}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--from', dest='source', required=True, choices=BACKENDS)
+    parser.add_argument('--to', dest='destination', required=True, choices=BACKENDS)
+    parser.add_argument('--prefix', action='append', help='copy only this prefix (repeatable); default: all of '
+                                                          + ', '.join(PREFIXES))
+    parser.add_argument('--batch-size', type=int, default=500, help='documents per transaction and checkpoint')
+    parser.add_argument('--workers', type=int, default=16, help='concurrent reads and writes')
+    parser.add_argument('--checkpoint', default='migrate_storage.checkpoint.json',
+                        help='progress file; removed once a run verifies cleanly')
+    parser.add_argument('--restart', action='store_true', help='ignore an existing checkpoint')
+    parser.add_argument('--verify-only', action='store_true', help='only compare the two stores')
+    parser.add_argument('--sqlite-path', help='SQLite database (default STORAGE_DB_PATH or storage.db)')
+    parser.add_argument('--dir', help='filesystem store directory (default STORAGE_DIR or storage)')
+    args = parser.parse_args()
+
+    if args.source == args.destination:
+        parser.error('--from and --to must be different backends')
+    prefixes = args.prefix or PREFIXES
+    source = open_store(args.source, args.sqlite_path, args.dir)
+    destination = open_store(args.destination, args.sqlite_path, args.dir)
+
+    if args.verify_only:
+        sys.exit(1 if verify(source, destination, prefixes) else 0)
+
+    checkpoint = Checkpoint(args.checkpoint, args.source, args.destination)
+    if args.restart:
+        checkpoint.remove()
+    print(f"Copying {args.source} -> {args.destination} in batches of {args.batch_size} with {args.workers} workers")
+    try:
+        result = migrate(source, destination, prefixes, checkpoint, args.batch_size, args.workers)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted; run again to resume from {args.checkpoint}")
+        sys.exit(130)
+    if result['failed']:
+        print(f"\n{result['failed']} documents could not be read from {args.source}; "
+              f"run again to retry only those")
+        sys.exit(1)
+    if result['missing']:
+        print(f"\n{result['missing']} documents missing from {args.destination}; "
+              f"run again with --restart to copy everything again")
+        sys.exit(1)
+    print(f"\nDone: {result['copied']} documents at {result['objects_per_second']:.1f} objects/s")
+
+
+if __name__ == '__main__':
+    main()
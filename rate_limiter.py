@@ -0,0 +1,220 @@
+"""Per-user token-bucket rate limiting for routes that call Bedrock.
+
+Each user (or client IP when no user_id is sent) gets a bucket holding up
+to `capacity` tokens that refills at `rate` tokens per second. A route
+takes its cost from the bucket; when there aren't enough tokens the
+request gets a 429 with Retry-After saying when there will be.
+
+user_id is whatever the client sends, so every request is also charged
+to a larger bucket per client IP. Rotating user ids then can't buy more
+than RATE_LIMIT_IP_PER_MINUTE, while a classroom behind one address
+still gets a bucket per pupil.
+
+The in-memory limiter is per process. With several gunicorn workers, set
+RATE_LIMIT_BACKEND=sqlite so they share buckets through one SQLite file.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from dotenv import load_dotenv
+from flask import jsonify, request
+
+from instrumentation import connect_sqlite
+
+load_dotenv()
+
+
+class TokenBucketLimiter:
+    """In-process token buckets, refilled lazily when a key is seen.
+
+    A check is a dict lookup and a little arithmetic. Buckets are kept in
+    LRU order and the least recently used is dropped beyond `max_keys`;
+    by then it has usually refilled, so dropping it loses nothing.
+    """
+
+    def __init__(self, rate, capacity, max_keys=100000, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self.clock = clock
+        self.allowed = 0
+        self.limited = 0
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, cost=1):
+        """Take `cost` tokens; returns 0 if allowed, else seconds until it would be"""
+        cost = min(cost, self.capacity)
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = self.capacity
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                tokens = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+                self._buckets.move_to_end(key)
+
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                self.allowed += 1
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            self.limited += 1
+            return (cost - tokens) / self.rate
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'memory', 'keys': len(self._buckets),
+                    'allowed': self.allowed, 'limited': self.limited}
+
+
+class SQLiteTokenBucketLimiter:
+    """Token buckets in a SQLite table, shared by every process using the file.
+
+    Each check is one short write transaction on a per-thread connection.
+    Buckets idle long enough to have refilled are deleted now and then.
+    """
+
+    def __init__(self, db_path, rate, capacity, clock=time.time, prune_every=1000, table='rate_limit_buckets'):
+        self.db_path = db_path
+        self.table = table
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.prune_every = prune_every
+        self.allowed = 0
+        self.limited = 0
+        self._hits = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit, so BEGIN IMMEDIATE below controls the transaction
+            conn = connect_sqlite(self.db_path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL,
+                    updated REAL
+                )
+            ''')
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key, cost=1):
+        """Take `cost` tokens; returns 0 if allowed, else seconds until it would be"""
+        cost = min(cost, self.capacity)
+        conn = self._connect()
+        now = self.clock()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(f'SELECT tokens, updated FROM {self.table} WHERE key = ?', (key,)).fetchone()
+            tokens = self.capacity if row is None else min(self.capacity, row[0] + max(0.0, now - row[1]) * self.rate)
+            allowed = tokens >= cost
+            conn.execute(f'INSERT OR REPLACE INTO {self.table} (key, tokens, updated) VALUES (?, ?, ?)',
+                         (key, tokens - cost if allowed else tokens, now))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        with self._lock:
+            self._hits += 1
+            prune = self._hits % self.prune_every == 0
+            if allowed:
+                self.allowed += 1
+            else:
+                self.limited += 1
+        if prune:
+            conn.execute(f'DELETE FROM {self.table} WHERE updated < ?', (now - self.capacity / self.rate,))
+        return 0.0 if allowed else (cost - tokens) / self.rate
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'sqlite', 'allowed': self.allowed, 'limited': self.limited}
+
+
+def build_rate_limiter(per_minute='RATE_LIMIT_PER_MINUTE', burst='RATE_LIMIT_BURST',
+                       defaults=('30', '20'), table='rate_limit_buckets'):
+    """Limiter configured from the environment, or None when disabled"""
+    if os.getenv('RATE_LIMIT_ENABLED', 'true').lower() != 'true':
+        return None
+    rate = float(os.getenv(per_minute, defaults[0])) / 60
+    capacity = float(os.getenv(burst, defaults[1]))
+    if os.getenv('RATE_LIMIT_BACKEND', 'memory') == 'sqlite':
+        return SQLiteTokenBucketLimiter(os.getenv('RATE_LIMIT_DB_PATH', 'rate_limits.db'), rate, capacity,
+                                        table=table)
+    return TokenBucketLimiter(rate, capacity)
+
+
+rate_limiter = build_rate_limiter()
+# Shared by everyone behind one address, so a fresh user_id per request doesn't escape the limit
+ip_rate_limiter = build_rate_limiter('RATE_LIMIT_IP_PER_MINUTE', 'RATE_LIMIT_IP_BURST', ('300', '100'),
+                                     table='rate_limit_ip_buckets')
+
+
+def client_ip():
+    """The client's address, from X-Forwarded-For only when the proxy is trusted"""
+    if os.getenv('RATE_LIMIT_TRUST_PROXY', 'false').lower() == 'true' and request.access_route:
+        return request.access_route[0]
+    return request.remote_addr
+
+
+def client_key():
+    """Bucket key for the current request: the user_id if one was sent, else the client IP"""
+    user_id = request.values.get('user_id')
+    if not user_id and request.is_json:
+        data = request.get_json(silent=True)
+        user_id = data.get('user_id') if isinstance(data, dict) else None
+    if user_id and user_id != 'anonymous':
+        return f"user:{user_id}"
+    return f"ip:{client_ip()}"
+
+
+def _retry_after(cost):
+    """Seconds until the request is allowed by both the IP and the user bucket, 0 if now"""
+    # The IP bucket goes first, so a request it turns away doesn't spend the user's tokens
+    for limiter, key in ((ip_rate_limiter, lambda: f"ip:{client_ip()}"), (rate_limiter, client_key)):
+        if limiter is None:
+            continue
+        try:
+            retry_after = limiter.hit(key(), cost)
+        except Exception as e:
+            # Never fail a request because the limiter's store is unavailable
+            print(f"Rate limiter error: {e}")
+            retry_after = 0.0
+        if retry_after > 0:
+            return retry_after
+    return 0.0
+
+
+def rate_limited(cost=1):
+    """Route decorator charging `cost` tokens per request, answering 429 when out"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            retry_after = _retry_after(cost)
+            if retry_after > 0:
+                seconds = max(1, math.ceil(retry_after))
+                response = jsonify({
+                    'success': False,
+                    'error': f"You're going a little fast! Please try again in {seconds} seconds.",
+                    'retry_after': seconds
+                })
+                response.status_code = 429
+                response.headers['Retry-After'] = str(seconds)
+                return response
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
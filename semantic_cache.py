@@ -0,0 +1,282 @@
+"""Reuse answers for differently-worded requests about the same topic.
+
+Topics are reduced to their content words, without question filler
+("how does ... work") or plural endings, so "photosynthesis", "how does
+photosynthesis work" and "Photosynthesis?" share one key. Misspellings
+("photosynthsis") are found through hashed character n-gram vectors:
+each (level, format) partition keeps its vectors in one NumPy matrix,
+candidates come from random-hyperplane LSH buckets and are scored
+exactly with cosine similarity, which keeps the median lookup under a
+millisecond at 100k entries (bench_semantic_cache.py). A candidate is
+only served if its content words match the query's word for word, up to
+one typo in words of five or more letters. Similar-looking but different
+topics ("aerobic" / "anaerobic respiration", "DNA" / "RNA replication")
+miss rather than return the wrong answer, and so does a topic with an
+extra qualifier ("photosynthesis in plants"). Vectors are
+float32, so a full partition of 10k entries holds about 10MB. The least
+recently used entry is replaced once a partition is full.
+
+NumPy is optional: without it the cache reports itself disabled and
+every lookup misses.
+"""
+
+import re
+import threading
+import time
+import zlib
+
+# Imported by the first SemanticCache so importing this module stays cheap
+np = None
+
+
+def _import_numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+    return np
+
+FILLER_WORDS = frozenset([
+    'a', 'an', 'the', 'of', 'in', 'on', 'to', 'for', 'and', 'is', 'are', 'was', 'were',
+    'what', 'whats', 'how', 'why', 'does', 'do', 'did', 'can', 'you', 'me', 'please',
+    'explain', 'explained', 'explanation', 'describe', 'define', 'tell', 'about', 'work',
+    'works', 'working', 'concept', 'meaning', 'introduction', 'intro', 'basics', 'overview', 'learn',
+    's'
+])
+# Words this short must match exactly; one letter separates DNA from RNA
+MIN_TYPO_LENGTH = 5
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def _stem(word):
+    """Drop a plural 's' ("plants" -> "plant") but not from "process" or "photosynthesis\""""
+    if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'is', 'us')):
+        return word[:-1]
+    return word
+
+
+def normalize_query(topic):
+    """Sorted, singular content words of a topic, without question filler"""
+    words = WORD_PATTERN.findall(topic.lower())
+    content = [word for word in words if word not in FILLER_WORDS]
+    return ' '.join(sorted(_stem(word) for word in content or words))
+
+
+def _within_one_edit(a, b):
+    """Whether b is a with one letter dropped, added, changed or two letters swapped"""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    swapped = i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+    return swapped or a[i + 1:] == b[i + 1:]
+
+
+def same_topic(query, cached):
+    """Whether two normalized topics have the same words, allowing a typo in longer ones"""
+    query_words, cached_words = query.split(), cached.split()
+    if len(query_words) != len(cached_words):
+        return False
+    remaining = list(cached_words)
+    for word in query_words:
+        for index, candidate in enumerate(remaining):
+            if word == candidate or (
+                    min(len(word), len(candidate)) >= MIN_TYPO_LENGTH and word[0] == candidate[0]
+                    and _within_one_edit(word, candidate)):
+                del remaining[index]
+                break
+        else:
+            return False
+    return True
+
+
+class NgramVectorizer:
+    """Unit-length signed feature-hashing vectors of character n-grams"""
+
+    def __init__(self, dim=256, ngram_sizes=(3, 4, 5)):
+        self.dim = dim
+        self.ngram_sizes = ngram_sizes
+
+    def transform(self, text):
+        padded = f" {text} "
+        hashes = [zlib.crc32(padded[i:i + n].encode('utf-8'))
+                  for n in self.ngram_sizes for i in range(len(padded) - n + 1)]
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if not hashes:
+            return vector
+        hashes = np.array(hashes, dtype=np.uint32)
+        # The top bit picks a sign so hash collisions cancel out on average
+        signs = np.where(hashes >> 31, -1.0, 1.0).astype(np.float32)
+        np.add.at(vector, (hashes % self.dim).astype(np.intp), signs)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SemanticIndex:
+    """One partition of the cache: vectors, LSH buckets and LRU bookkeeping"""
+
+    def __init__(self, planes, max_entries, ttl):
+        self.planes = planes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        tables, bits, dim = planes.shape
+        self._powers = (1 << np.arange(bits)).astype(np.int64)
+        self._buckets = [{} for _ in range(tables)]
+
+        capacity = min(max_entries, 1024)
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.signatures = np.zeros((capacity, tables), dtype=np.int64)
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+        self.created = np.zeros(capacity, dtype=np.float64)
+        self.texts = []
+        self.values = []
+        self._by_text = {}
+        self._clock = 0
+
+    def __len__(self):
+        return len(self.texts)
+
+    def signature(self, vector):
+        bits = (self.planes @ vector) > 0
+        return bits.astype(np.int64) @ self._powers
+
+    def lookup(self, text, vector, threshold):
+        """(slot, similarity) of the best fresh match at or above threshold, else None"""
+        slot = self._by_text.get(text)
+        if slot is not None:
+            return self._touch(slot, 1.0)
+
+        signature = self.signature(vector)
+        candidates = set().union(*(self._buckets[table].get(key, ()) for table, key in enumerate(signature.tolist())))
+        if not candidates:
+            return None
+
+        slots = np.fromiter(candidates, dtype=np.intp, count=len(candidates))
+        scores = self.vectors[slots] @ vector
+        # Most similar first; n-gram similarity alone can't tell "aerobic" from "anaerobic"
+        for best in np.argsort(-scores):
+            if scores[best] < threshold:
+                break
+            slot = int(slots[best])
+            if same_topic(text, self.texts[slot]):
+                return self._touch(slot, float(scores[best]))
+        return None
+
+    def add(self, text, vector, value):
+        slot = self._by_text.get(text)
+        if slot is not None:
+            self._unlink(slot)
+        elif len(self.texts) < self.max_entries:
+            slot = len(self.texts)
+            self._grow(slot + 1)
+            self.texts.append(text)
+            self.values.append(value)
+        else:
+            slot = int(np.argmin(self.last_used))
+            self._unlink(slot)
+        self._by_text[text] = slot
+        self.texts[slot] = text
+        self.values[slot] = value
+
+        self.vectors[slot] = vector
+        self.signatures[slot] = self.signature(vector)
+        for table, key in enumerate(self.signatures[slot].tolist()):
+            self._buckets[table].setdefault(key, []).append(slot)
+        self.created[slot] = time.time()
+        self._touch(slot, 1.0)
+
+    def _touch(self, slot, score):
+        if self.ttl and time.time() - self.created[slot] > self.ttl:
+            return None
+        self._clock += 1
+        self.last_used[slot] = self._clock
+        return slot, score
+
+    def _unlink(self, slot):
+        del self._by_text[self.texts[slot]]
+        for table, key in enumerate(self.signatures[slot].tolist()):
+            bucket = self._buckets[table][key]
+            bucket.remove(slot)
+            if not bucket:
+                del self._buckets[table][key]
+
+    def _grow(self, size):
+        capacity = len(self.vectors)
+        if size <= capacity:
+            return
+        capacity = min(self.max_entries, capacity * 2)
+        self.vectors = np.resize(self.vectors, (capacity, self.vectors.shape[1]))
+        self.signatures = np.resize(self.signatures, (capacity, self.signatures.shape[1]))
+        # Unused slots must never look least recently used
+        last_used = np.full(capacity, np.iinfo(np.int64).max, dtype=np.int64)
+        last_used[:len(self.last_used)] = self.last_used
+        self.last_used = last_used
+        self.created = np.resize(self.created, capacity)
+
+
+class SemanticCache:
+    """Near-duplicate topic cache partitioned by (level, format)"""
+
+    def __init__(self, threshold=0.7, max_entries=10000, ttl=24 * 3600,
+                 dim=256, tables=16, bits=12, seed=0):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = _import_numpy() is not None
+        self.hits = 0
+        self.misses = 0
+        self._partitions = {}
+        self._lock = threading.Lock()
+        if self.enabled:
+            self.vectorizer = NgramVectorizer(dim)
+            self._planes = np.random.default_rng(seed).standard_normal((tables, bits, dim)).astype(np.float32)
+        else:
+            print("WARNING: numpy not installed, semantic topic cache disabled")
+
+    def get(self, topic, level, format_type):
+        """Cached value for a topic worded like an earlier one, or None"""
+        if not self.enabled:
+            return None
+        text = normalize_query(topic)
+        vector = self.vectorizer.transform(text)
+        with self._lock:
+            index = self._partitions.get((level, format_type))
+            match = index.lookup(text, vector, self.threshold) if index else None
+            if match is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            slot, score = match
+            print(f"Semantic cache hit: '{topic}' ~ '{index.texts[slot]}' ({score:.2f})")
+            return index.values[slot]
+
+    def put(self, topic, level, format_type, value):
+        if not self.enabled:
+            return
+        text = normalize_query(topic)
+        vector = self.vectorizer.transform(text)
+        with self._lock:
+            index = self._partitions.get((level, format_type))
+            if index is None:
+                index = self._partitions[(level, format_type)] = SemanticIndex(self._planes, self.max_entries, self.ttl)
+            index.add(text, vector, value)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'entries': sum(len(index) for index in self._partitions.values()),
+                'partitions': len(self._partitions),
+                'hits': self.hits,
+                'misses': self.misses
+            }
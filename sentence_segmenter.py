@@ -0,0 +1,166 @@
+"""Find where the last complete sentence of model output ends.
+
+A boundary is a newline, or a `.`, `!` or `?` (plus any closing quotes or
+brackets) followed by whitespace. Dots that belong to abbreviations
+("e.g.", "Dr."), initials ("J. K."), numbered-list markers at the start
+of a line ("2.") and decimals or URLs (no whitespace after the dot) are
+not boundaries. A number elsewhere ("in 1905.") ends its sentence. The
+scan walks backwards from the end and stops at the first boundary, so it
+only touches the trailing fragment and allocates nothing per sentence.
+
+A last line without terminal punctuation is kept when it reads as
+finished: a heading or list item of two words or more, or a line longer
+than COMPLETE_LINE_LENGTH. Model answers often end with a bullet list.
+"""
+
+import re
+
+TERMINATORS = '.!?'
+CLOSERS = '"\')]}”’'
+# A trailing fragment ending in one of these is treated as complete
+COMPLETE_FRAGMENT_ENDINGS = ')]}'
+# A final line this long, or a heading or list item of two words or more, is kept as it is
+COMPLETE_LINE_LENGTH = 30
+HEADING_OR_LIST_ITEM = re.compile(r'(?:#{1,6}|[-*•]|\d+[.)])\s+\S+\s+\S')
+# Words that are also ordinary sentence endings ("no", "co", "est") are left out
+ABBREVIATIONS = frozenset([
+    'e.g', 'i.e', 'etc', 'vs', 'cf', 'al', 'approx', 'ca', 'fig', 'vol',
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'mt', 'inc', 'ltd',
+    'corp', 'dept', 'u.s', 'u.k', 'a.m', 'p.m', 'ph.d', 'jan', 'feb',
+    'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec'
+])
+# Abbreviations only when a number follows, as in "No. 5"
+NUMBER_ABBREVIATIONS = frozenset(['no'])
+MAX_ABBREVIATION_LENGTH = 6
+
+
+def _is_abbreviation_dot(text, dot):
+    """Whether the '.' at index `dot` ends an abbreviation, initial or list number"""
+    start = dot
+    while start > 0 and dot - start <= MAX_ABBREVIATION_LENGTH and not text[start - 1].isspace():
+        start -= 1
+    # Skip leading punctuation such as "(e.g."
+    while start < dot and not text[start].isalnum():
+        start += 1
+    word = text[start:dot]
+    if not word:
+        return False
+    if len(word) == 1 and word.isalpha():
+        return True
+    if word.isdigit():
+        return _starts_line(text, start)
+    if word.lower() in NUMBER_ABBREVIATIONS:
+        return _number_follows(text, dot)
+    return word.lower() in ABBREVIATIONS
+
+
+def _starts_line(text, start):
+    """Whether only indentation precedes index `start` on its line"""
+    i = start - 1
+    while i >= 0 and text[i] != '\n':
+        if not text[i].isspace():
+            return False
+        i -= 1
+    return True
+
+
+def _number_follows(text, dot):
+    """Whether a digit comes next; True if nothing has arrived yet, so streams wait for it"""
+    i = dot + 1
+    while i < len(text) and text[i].isspace():
+        i += 1
+    return i == len(text) or text[i].isdigit()
+
+
+def last_sentence_end(text, final=True):
+    """Index just past the last complete sentence or line in text, or 0 if there is none.
+
+    With final=True a terminator at the very end of the text counts as a
+    boundary. Streaming callers pass final=False because the next chunk
+    might turn "3." into "3.14".
+    """
+    end = len(text)
+    while end > 0 and text[end - 1].isspace() and text[end - 1] != '\n':
+        end -= 1
+
+    i = end - 1
+    while i >= 0:
+        c = text[i]
+        if c == '\n':
+            return i + 1
+        if c in TERMINATORS:
+            # Extend over closing quotes/brackets that belong to the sentence
+            stop = i + 1
+            while stop < end and text[stop] in CLOSERS:
+                stop += 1
+            if stop == len(text):
+                # Nothing follows yet; only trust it once the text is complete
+                if final:
+                    return stop
+            elif stop == end or text[stop].isspace():
+                if c != '.' or not _is_abbreviation_dot(text, i):
+                    return stop
+        i -= 1
+    return 0
+
+
+def _is_complete_line(line):
+    """Whether a last line without terminal punctuation reads as finished"""
+    line = line.strip()
+    return len(line) > COMPLETE_LINE_LENGTH or HEADING_OR_LIST_ITEM.match(line) is not None
+
+
+def ensure_natural_ending(text):
+    """Drop a trailing incomplete sentence, keeping everything before it verbatim"""
+    stripped = text.rstrip()
+    if not stripped or stripped[-1] in COMPLETE_FRAGMENT_ENDINGS:
+        return stripped
+    boundary = last_sentence_end(stripped)
+    if boundary == 0:
+        # No complete sentence at all; better than returning nothing
+        return stripped
+    if stripped[boundary - 1] == '\n' and _is_complete_line(stripped[boundary:]):
+        return stripped
+    return stripped[:boundary].rstrip()
+
+
+class SentenceSegmenter:
+    """Streams text out one complete sentence (or line) at a time.
+
+    `feed` returns the newly completed prefix and holds back the
+    incomplete tail; `close` returns whatever is left, dropping a trailing
+    incomplete sentence when earlier sentences were already emitted. The
+    concatenated output equals `ensure_natural_ending(full_text)` up to
+    trailing whitespace.
+    """
+
+    def __init__(self):
+        self._buffer = ''
+        self._emitted = False
+        self._at_line_start = True
+
+    def feed(self, chunk):
+        self._buffer += chunk
+        boundary = last_sentence_end(self._buffer, final=False)
+        if boundary == 0:
+            return ''
+        ready, self._buffer = self._buffer[:boundary], self._buffer[boundary:]
+        self._emitted = True
+        self._at_line_start = ready.endswith('\n')
+        return ready
+
+    def close(self):
+        tail, self._buffer = self._buffer, ''
+        stripped = tail.rstrip()
+        if not stripped:
+            return ''
+        if stripped[-1] in COMPLETE_FRAGMENT_ENDINGS:
+            return stripped
+        boundary = last_sentence_end(stripped)
+        if boundary:
+            if stripped[boundary - 1] == '\n' and _is_complete_line(stripped[boundary:]):
+                return stripped
+            return stripped[:boundary].rstrip()
+        if self._emitted and not (self._at_line_start and _is_complete_line(stripped)):
+            return ''
+        return stripped
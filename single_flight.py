@@ -0,0 +1,89 @@
+"""Coalescing of identical in-flight AI generations.
+
+When a class asks for the same topic at once, every request used to make
+its own Bedrock call for the same answer. SingleFlight lets the first
+caller for a key (the leader) run the generation while later callers with
+the same key wait for its result instead of calling the model again.
+Nothing is kept once the leader finishes; caching is the stores' job.
+"""
+
+import os
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from instrumentation import span
+
+
+class SingleFlightTimeout(Exception):
+    """Raised to a waiting caller when the shared call takes longer than its timeout"""
+
+
+class SingleFlight:
+    """At most one call per key at a time; concurrent callers share its outcome.
+
+    Keys are tuples whose first element names the kind of work, e.g.
+    ('flashcards', 'photosynthesis', 'primary'), which is what stats()
+    groups by. The leader runs `fn` on its own thread, so its upstream
+    calls are attributed to its request; waiters record a
+    'single_flight.wait' span instead. Exceptions raised by `fn` are
+    re-raised to every caller sharing it.
+    """
+
+    def __init__(self, timeout=60.0):
+        self.timeout = timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        # kind -> [leaders, shared, timeouts, errors]
+        self._counts = {}
+
+    def do(self, key, fn, timeout=None):
+        """Result of fn(), or of the identical call already in flight for `key`"""
+        kind = key[0] if isinstance(key, tuple) else key
+        with self._lock:
+            counts = self._counts.setdefault(kind, [0, 0, 0, 0])
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                counts[0] += 1
+            else:
+                counts[1] += 1
+
+        if leader:
+            try:
+                result = fn()
+            except BaseException as e:
+                future.set_exception(e)
+                with self._lock:
+                    counts[3] += 1
+                raise
+            else:
+                future.set_result(result)
+                return result
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+
+        try:
+            with span('single_flight.wait'):
+                return future.result(self.timeout if timeout is None else timeout)
+        except FutureTimeout:
+            with self._lock:
+                counts[2] += 1
+            raise SingleFlightTimeout(f"Timed out waiting for shared {kind} generation") from None
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'kinds': {kind: {'leaders': leaders, 'shared': shared, 'timeouts': timeouts, 'errors': errors}
+                          for kind, (leaders, shared, timeouts, errors) in sorted(self._counts.items())}
+            }
+
+
+# Shared by /learn, flashcards and challenge generation in this process
+ai_generations = SingleFlight(timeout=float(os.getenv('SINGLE_FLIGHT_TIMEOUT', '60')))
@@ -0,0 +1,1689 @@
+// History System Functions
+let learningHistory = JSON.parse(localStorage.getItem('learningHistory') || '[]');
+
+
+
+function addToHistory(topic, level, format) {
+    const historyItem = {
+        id: Date.now(),
+        topic: topic,
+        level: level,
+        format: format,
+        timestamp: new Date().toISOString(),
+        date: new Date().toLocaleDateString()
+    };
+    
+    // Remove duplicates and add to beginning
+    learningHistory = learningHistory.filter(item => 
+        !(item.topic === topic && item.level === level && item.format === format)
+    );
+    learningHistory.unshift(historyItem);
+    
+    // Keep only last 50 items
+    learningHistory = learningHistory.slice(0, 50);
+    
+    localStorage.setItem('learningHistory', JSON.stringify(learningHistory));
+    updateHistoryDisplay();
+}
+
+function updateHistoryDisplay() {
+    const historyList = document.getElementById('historyList');
+    if (learningHistory.length === 0) {
+        historyList.innerHTML = '<p class="no-history">No learning history yet. Start exploring topics!</p>';
+        return;
+    }
+    
+    historyList.innerHTML = '';
+    learningHistory.forEach(item => {
+        const historyItem = document.createElement('div');
+        historyItem.className = 'history-item';
+        historyItem.innerHTML = `
+            <div class="history-content" onclick="loadFromHistory('${item.topic}', '${item.level}', '${item.format}')">
+                <div class="history-topic">${item.topic}</div>
+                <div class="history-meta">
+                    <span class="history-level">${item.level}</span>
+                    <span class="history-format">${getFormatEmoji(item.format)} ${item.format}</span>
+                </div>
+                <div class="history-date">${item.date}</div>
+            </div>
+            <button class="remove-history" onclick="removeFromHistory(${item.id})">×</button>
+        `;
+        historyList.appendChild(historyItem);
+    });
+}
+
+function getFormatEmoji(format) {
+    const emojis = {
+        'chat': '💬',
+        'sketch': '✏️',
+        'video': '🎥',
+        'ebook': '📚',
+        'flashcards': '📚',
+        'blurting': '📝'
+    };
+    return emojis[format] || '💬';
+}
+
+function loadFromHistory(topic, level, format) {
+    document.getElementById('topic').value = topic;
+    document.getElementById('level').value = level;
+    
+
+    
+    // Load the content
+    if (format === 'flashcards') {
+        showFlashcards();
+    } else if (format === 'blurting') {
+        showBlurting();
+    } else {
+        learn(format);
+    }
+}
+
+function removeFromHistory(id) {
+    learningHistory = learningHistory.filter(item => item.id !== id);
+    localStorage.setItem('learningHistory', JSON.stringify(learningHistory));
+    updateHistoryDisplay();
+}
+
+function filterHistory(filter) {
+    document.querySelectorAll('.filter-btn').forEach(btn => btn.classList.remove('active'));
+    event.target.classList.add('active');
+    
+    const now = new Date();
+    let filteredHistory = learningHistory;
+    
+    if (filter === 'today') {
+        const today = now.toLocaleDateString();
+        filteredHistory = learningHistory.filter(item => item.date === today);
+    } else if (filter === 'week') {
+        const weekAgo = new Date(now.getTime() - 7 * 24 * 60 * 60 * 1000);
+        filteredHistory = learningHistory.filter(item => new Date(item.timestamp) >= weekAgo);
+    }
+    
+    const historyList = document.getElementById('historyList');
+    if (filteredHistory.length === 0) {
+        historyList.innerHTML = `<p class="no-history">No learning history for ${filter}.</p>`;
+        return;
+    }
+    
+    historyList.innerHTML = '';
+    filteredHistory.forEach(item => {
+        const historyItem = document.createElement('div');
+        historyItem.className = 'history-item';
+        historyItem.innerHTML = `
+            <div class="history-content" onclick="loadFromHistory('${item.topic}', '${item.level}', '${item.format}')">
+                <div class="history-topic">${item.topic}</div>
+                <div class="history-meta">
+                    <span class="history-level">${item.level}</span>
+                    <span class="history-format">${getFormatEmoji(item.format)} ${item.format}</span>
+                </div>
+                <div class="history-date">${item.date}</div>
+            </div>
+            <button class="remove-history" onclick="removeFromHistory(${item.id})">×</button>
+        `;
+        historyList.appendChild(historyItem);
+    });
+}
+
+function clearHistory() {
+    if (confirm('Are you sure you want to clear all learning history?')) {
+        learningHistory = [];
+        localStorage.removeItem('learningHistory');
+        updateHistoryDisplay();
+        showNotification('Learning history cleared!', 'success');
+    }
+}
+
+// Initialize history on page load
+document.addEventListener('DOMContentLoaded', function() {
+    updateHistoryDisplay();
+});
+
+async function learn(format) {
+    const topic = document.getElementById('topic').value;
+    const level = document.getElementById('level').value;
+    const files = document.getElementById('document').files;
+    
+    // Add to history
+    if (topic.trim()) {
+        addToHistory(topic, level, format);
+    }
+    
+    // Allow empty topic if files are uploaded and format is ebook (summary)
+    if (!topic.trim() && (files.length === 0 || format !== 'ebook')) {
+        showNotification('Please enter a topic to learn about!', 'error');
+        return;
+    }
+    
+    // Show loading
+    document.getElementById('loading').style.display = 'block';
+    document.getElementById('result').classList.remove('show');
+    
+    const formData = new FormData();
+    formData.append('topic', topic || 'Document Summary');
+    formData.append('level', level);
+    formData.append('format', format);
+    formData.append('user_id', currentUserId);
+    
+    for (let file of files) {
+        formData.append('documents', file);
+    }
+    
+    try {
+        const response = await fetch('/learn', {
+            method: 'POST',
+            body: formData
+        });
+        
+        const result = await response.json();
+        
+        // Hide loading
+        document.getElementById('loading').style.display = 'none';
+        
+        if (response.status === 429) {
+            showNotification(result.error, 'error');
+            return;
+        }
+        
+        // Show result with animation
+        const resultDiv = document.getElementById('result');
+        resultDiv.className = `result-area format-${format}`;
+        
+        const formatEmojis = {
+            'chat': '💬',
+            'sketch': '✏️',
+            'visual': '✏️',
+            'ebook': '📚'
+        };
+        
+        // Special handling for visual format with mermaid diagrams
+        if (result.content.includes('```mermaid')) {
+            // Extract mermaid code and render it
+            const mermaidMatch = result.content.match(/```mermaid([\s\S]*?)```/);
+            if (mermaidMatch) {
+                const mermaidCode = mermaidMatch[1].trim();
+                result.content = result.content.replace(/```mermaid[\s\S]*?```/, `<div class="mermaid">${mermaidCode}</div>`);
+            }
+        }
+        
+
+        
+        const formatName = format === 'sketch' ? 'VISUAL' : format.toUpperCase();
+        resultDiv.innerHTML = `
+            <h3>${formatEmojis[format]} ${formatName} Format - ${level.charAt(0).toUpperCase() + level.slice(1)} Level</h3>
+            <div class="content">${result.content}</div>
+        `;
+        
+        // Images that were still generating arrive in a follow-up fetch
+        resolvePendingImages(resultDiv);
+        
+        // Render Mermaid diagrams if present
+        if (result.content.includes('```mermaid')) {
+            setTimeout(() => {
+                mermaid.init(undefined, resultDiv.querySelectorAll('.mermaid'));
+            }, 100);
+        }
+        
+        setTimeout(() => {
+            resultDiv.classList.add('show');
+        }, 100);
+        
+    } catch (error) {
+        document.getElementById('loading').style.display = 'none';
+        showNotification('Something went wrong. Please try again!', 'error');
+    }
+}
+
+function resolvePendingImages(container) {
+    container.querySelectorAll('.nova-canvas-pending[data-image-key]').forEach(async (placeholder) => {
+        const imageContainer = placeholder.querySelector('.image-container');
+        
+        for (let attempt = 0; attempt < 30; attempt++) {
+            await new Promise(resolve => setTimeout(resolve, 2000));
+            try {
+                const response = await fetch(`/canvas/status/${placeholder.dataset.imageKey}`);
+                const status = await response.json();
+                
+                if (status.status === 'ready') {
+                    imageContainer.classList.remove('image-placeholder');
+                    imageContainer.innerHTML = `<img src="${status.url}" alt="Visual" style="max-width: 100%; height: auto;">`;
+                    placeholder.classList.remove('nova-canvas-pending');
+                    return;
+                }
+                if (status.status !== 'pending') break;
+            } catch (error) {
+                break;
+            }
+        }
+        
+        imageContainer.innerHTML = '<p>Visual temporarily unavailable</p>';
+    });
+}
+
+// Add enter key support
+document.getElementById('topic').addEventListener('keypress', function(e) {
+    if (e.key === 'Enter') {
+        learn('chat'); // Default to chat format
+    }
+});
+
+// File upload feedback
+document.getElementById('document').addEventListener('change', function(e) {
+    const files = e.target.files;
+    const label = document.querySelector('label[for="document"]');
+    const clearBtn = document.getElementById('clearFiles');
+    const summaryBtn = document.getElementById('summaryBtn');
+    
+    if (files.length > 0) {
+        const fileNames = Array.from(files).map(f => f.name).join(', ');
+        label.innerHTML = `📄 ${files.length} file(s) selected: ${fileNames.substring(0, 50)}${fileNames.length > 50 ? '...' : ''}`;
+        label.style.backgroundColor = '#e8f5e8';
+        label.style.borderColor = '#4caf50';
+        label.style.color = '#2e7d32';
+        clearBtn.style.display = 'inline-block';
+        summaryBtn.style.display = 'inline-block';
+    } else {
+        label.innerHTML = '📄 Upload supporting documents (optional)';
+        label.style.backgroundColor = '';
+        label.style.borderColor = '';
+        label.style.color = '';
+        clearBtn.style.display = 'none';
+        summaryBtn.style.display = 'none';
+    }
+});
+
+// Initialize Mermaid
+mermaid.initialize({ startOnLoad: true, theme: 'default' });
+
+
+
+// Clear files functionality
+document.getElementById('clearFiles').addEventListener('click', function() {
+    const fileInput = document.getElementById('document');
+    const label = document.querySelector('label[for="document"]');
+    const clearBtn = document.getElementById('clearFiles');
+    const summaryBtn = document.getElementById('summaryBtn');
+    
+    fileInput.value = '';
+    label.innerHTML = '📄 Upload supporting documents (optional)';
+    label.style.backgroundColor = '';
+    label.style.borderColor = '';
+    label.style.color = '';
+    clearBtn.style.display = 'none';
+    summaryBtn.style.display = 'none';
+});
+
+// Notification System
+function showNotification(message, type = 'info') {
+    const notification = document.getElementById('notification');
+    notification.textContent = message;
+    notification.className = `notification ${type} show`;
+    
+    setTimeout(() => {
+        notification.classList.remove('show');
+    }, 4000);
+}
+
+// Knowledge Barter System Functions
+let mediaRecorder;
+let audioChunks = [];
+let isRecording = false;
+let currentUserId = 'user_' + Math.random().toString(36).substr(2, 9); // Persistent user ID
+
+function showTeachBack() {
+    const resultDiv = document.getElementById('result');
+    resultDiv.className = 'result-area format-barter';
+    
+    resultDiv.innerHTML = `
+        <h3>🤝 TEACH BACK - Community Knowledge Barter</h3>
+        
+        <div class="barter-tabs">
+            <button class="tab-btn active" onclick="showBarterTab('teach')">Teach Back</button>
+            <button class="tab-btn" onclick="showBarterTab('borrow')">Community Posts</button>
+            <button class="tab-btn" onclick="showBarterTab('stats')">My Points</button>
+        </div>
+        
+        <!-- Teach Back Tab -->
+        <div id="teachTab" class="barter-tab">
+            <div class="record-section">
+                <p>Record your explanation of the topic:</p>
+                <button id="recordBtn" onclick="toggleRecording()">🎤 Start Recording</button>
+                <div id="recordingStatus"></div>
+                <textarea id="transcriptArea" placeholder="Or type your explanation here..." rows="4"></textarea>
+                <button onclick="submitExplanation()">Submit for AI Scoring</button>
+            </div>
+        </div>
+        
+        <!-- Community Posts Tab -->
+        <div id="borrowTab" class="barter-tab" style="display: none;">
+            <div id="communityExplanations"></div>
+            <button onclick="loadCommunityExplanations()">Load Community Posts</button>
+            <button onclick="loadAllExplanations()">Show All Posts</button>
+        </div>
+        
+        <!-- Stats Tab -->
+        <div id="statsTab" class="barter-tab" style="display: none;">
+            <div id="userStats"></div>
+            <button onclick="loadUserStats()">Refresh Stats</button>
+        </div>
+    `;
+    
+    setTimeout(() => {
+        resultDiv.classList.add('show');
+    }, 100);
+}
+
+function showBarterTab(tabName) {
+    document.querySelectorAll('.barter-tab').forEach(tab => tab.style.display = 'none');
+    document.querySelectorAll('.tab-btn').forEach(btn => btn.classList.remove('active'));
+    
+    document.getElementById(tabName + 'Tab').style.display = 'block';
+    event.target.classList.add('active');
+}
+
+async function toggleRecording() {
+    const recordBtn = document.getElementById('recordBtn');
+    const status = document.getElementById('recordingStatus');
+    
+    if (!isRecording) {
+        try {
+            const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
+            mediaRecorder = new MediaRecorder(stream);
+            audioChunks = [];
+            
+            mediaRecorder.ondataavailable = event => audioChunks.push(event.data);
+            mediaRecorder.onstop = () => {
+                const audioBlob = new Blob(audioChunks, { type: 'audio/wav' });
+                transcribeAudio(audioBlob);
+            };
+            
+            mediaRecorder.start();
+            isRecording = true;
+            recordBtn.textContent = '⏹️ Stop Recording';
+            status.textContent = 'Recording... Speak your explanation now!';
+        } catch (error) {
+            status.textContent = 'Microphone access denied. Please type your explanation.';
+        }
+    } else {
+        mediaRecorder.stop();
+        isRecording = false;
+        recordBtn.textContent = '🎤 Start Recording';
+        status.textContent = 'Processing audio...';
+    }
+}
+
+async function transcribeAudio(audioBlob) {
+    const status = document.getElementById('recordingStatus');
+    status.textContent = 'Transcribing audio...';
+    
+    try {
+        const formData = new FormData();
+        formData.append('audio', audioBlob, 'recording.wav');
+        
+        const response = await fetch('/transcribe_audio', {
+            method: 'POST',
+            body: formData
+        });
+        
+        let result = await response.json();
+        const jobId = result.job_id;
+        
+        // Transcription runs in the background; poll until it finishes
+        while (result.success && result.status !== 'COMPLETED') {
+            await new Promise(resolve => setTimeout(resolve, 1500));
+            const statusResponse = await fetch(`/transcribe_audio/${jobId}`);
+            result = await statusResponse.json();
+        }
+        
+        if (result.success) {
+            document.getElementById('transcriptArea').value = result.transcript;
+            status.textContent = 'Audio transcribed successfully! Review and submit your explanation.';
+        } else {
+            status.textContent = 'Transcription failed. Please type your explanation manually.';
+            showNotification('Transcription error: ' + result.error, 'error');
+        }
+    } catch (error) {
+        status.textContent = 'Transcription failed. Please type your explanation manually.';
+        showNotification('Failed to transcribe audio', 'error');
+    }
+}
+
+async function submitExplanation() {
+    const topic = document.getElementById('topic').value;
+    const level = document.getElementById('level').value;
+    const transcript = document.getElementById('transcriptArea').value;
+    
+    if (!topic || !transcript) {
+        showNotification('Please enter a topic and your explanation!', 'error');
+        return;
+    }
+    
+    const formData = new FormData();
+    formData.append('user_id', currentUserId);
+    formData.append('topic', topic);
+    formData.append('level', level);
+    formData.append('transcript', transcript);
+    
+    try {
+        const response = await fetch('/submit_explanation', {
+            method: 'POST',
+            body: formData
+        });
+        
+        const result = await response.json();
+        
+        if (result.success) {
+            showNotification(`${result.message} Grading your explanation...`, 'success');
+            document.getElementById('transcriptArea').value = '';
+            showClarityScore(result);
+        } else {
+            showNotification('Error: ' + result.error, 'error');
+        }
+    } catch (error) {
+        showNotification('Failed to submit explanation', 'error');
+    }
+}
+
+// Grading happens in the background; poll with short requests and backoff until the score is stored
+async function showClarityScore(result) {
+    try {
+        let delay = 1000;
+        for (let attempt = 0; result.grading_status === 'pending' && attempt < 12; attempt++) {
+            await new Promise(resolve => setTimeout(resolve, delay));
+            const response = await fetch(`/explanation_status/${result.id}?wait=1`);
+            result = await response.json();
+            if (!result.success) return;
+            delay = Math.min(delay * 2, 8000);
+        }
+        if (result.grading_status === 'graded') {
+            showNotification(`Clarity Score: ${result.clarity_score}/10`, 'success');
+        }
+    } catch (error) {
+        console.error('Error fetching clarity score:', error);
+    }
+}
+
+function formatClarityScore(score) {
+    return score === 'pending' ? 'grading...' : `${score}/10`;
+}
+
+async function loadCommunityExplanations() {
+    const topic = document.getElementById('topic').value;
+    if (!topic) {
+        // Load all explanations if no topic specified
+        loadAllExplanations();
+        return;
+    }
+    
+    try {
+        // Always revalidate: the browser sends If-None-Match and gets a 304 while nothing changed
+        const response = await fetch(`/community_explanations/${encodeURIComponent(topic)}`, { cache: 'no-cache' });
+        const data = await response.json();
+        
+        const container = document.getElementById('communityExplanations');
+        container.innerHTML = '';
+        
+        if (data.explanations && data.explanations.length > 0) {
+            data.explanations.forEach(exp => {
+                const expDiv = document.createElement('div');
+                expDiv.className = 'community-explanation';
+                expDiv.innerHTML = `
+                    <div class="post-header">
+                        <h4>${exp.topic} (${exp.level})</h4>
+                        <div class="post-stats">
+                            <span class="clarity-score">Clarity: ${formatClarityScore(exp.clarity_score)}</span>
+                            <div class="upvote-section">
+                                <button class="upvote-btn" onclick="upvoteExplanation(${exp.id})">↑</button>
+                                <span class="upvote-count">${exp.upvotes}</span>
+                            </div>
+                        </div>
+                    </div>
+                    <p class="post-content">${exp.transcript}</p>
+                `;
+                container.appendChild(expDiv);
+            });
+        } else {
+            container.innerHTML = '<p>No community explanations found for this topic yet. Be the first to contribute!</p>';
+        }
+    } catch (error) {
+        console.error('Error loading explanations:', error);
+        const container = document.getElementById('communityExplanations');
+        container.innerHTML = '<p>Error loading community posts. Please try again.</p>';
+    }
+}
+
+// Load all explanations if no topic specified
+async function loadAllExplanations() {
+    try {
+        const response = await fetch('/community_explanations/all', { cache: 'no-cache' });
+        const data = await response.json();
+        
+        const container = document.getElementById('communityExplanations');
+        container.innerHTML = '';
+        
+        if (data.explanations && data.explanations.length > 0) {
+            data.explanations.forEach(exp => {
+                const expDiv = document.createElement('div');
+                expDiv.className = 'community-explanation';
+                expDiv.innerHTML = `
+                    <div class="post-header">
+                        <h4>${exp.topic} (${exp.level})</h4>
+                        <div class="post-stats">
+                            <span class="clarity-score">Clarity: ${formatClarityScore(exp.clarity_score)}</span>
+                            <div class="upvote-section">
+                                <button class="upvote-btn" onclick="upvoteExplanation(${exp.id})">↑</button>
+                                <span class="upvote-count">${exp.upvotes}</span>
+                            </div>
+                        </div>
+                    </div>
+                    <p class="post-content">${exp.transcript}</p>
+                `;
+                container.appendChild(expDiv);
+            });
+        } else {
+            container.innerHTML = '<p>No community posts yet. Be the first to contribute!</p>';
+        }
+    } catch (error) {
+        showNotification('Failed to load community explanations', 'error');
+    }
+}
+
+async function upvoteExplanation(explanationId) {
+    const formData = new FormData();
+    formData.append('user_id', currentUserId);
+    formData.append('explanation_id', explanationId);
+    
+    try {
+        const response = await fetch('/upvote_explanation', {
+            method: 'POST',
+            body: formData
+        });
+        
+        const result = await response.json();
+        showNotification(result.message || 'Upvoted!', 'success');
+        loadCommunityExplanations(); // Refresh to show updated count
+    } catch (error) {
+        showNotification('Failed to upvote', 'error');
+    }
+}
+
+async function loadUserStats() {
+    try {
+        const response = await fetch(`/user_stats/${currentUserId}`);
+        const stats = await response.json();
+        
+        const container = document.getElementById('userStats');
+        container.innerHTML = `
+            <div class="stats-card">
+                <h4>🏆 Your Knowledge Points: ${stats.total_points}</h4>
+                <p>🎓 Explanations Shared: ${stats.explanations_count}</p>
+                <p>⬆️ Upvotes Given: ${stats.upvotes_given}</p>
+                
+                <div class="rewards">
+                    <h5>Available Rewards:</h5>
+                    ${stats.can_redeem_mentorship ? '<p>✅ Mentorship Session (50 points)</p>' : '<p>❌ Mentorship Session (Need 50 points)</p>'}
+                    ${stats.can_redeem_bonus_ai ? '<p>✅ Bonus AI Simulations (20 points)</p>' : '<p>❌ Bonus AI Simulations (Need 20 points)</p>'}
+                </div>
+            </div>
+        `;
+    } catch (error) {
+        showNotification('Failed to load user stats', 'error');
+    }
+}
+
+// Game System Functions
+let currentChallenge = null;
+let challengeTimer = null;
+let timeRemaining = 0;
+let startTime = 0;
+
+function showChallenges() {
+    const resultDiv = document.getElementById('result');
+    resultDiv.className = 'result-area format-game';
+    
+    resultDiv.innerHTML = `
+        <h3>🎮 CHALLENGES - Gamified Learning</h3>
+        
+        <div class="game-tabs">
+            <button class="tab-btn active" onclick="showGameTab('play')">Play Challenge</button>
+            <button class="tab-btn" onclick="showGameTab('stats')">My Progress</button>
+            <button class="tab-btn" onclick="showGameTab('leaderboard')">Leaderboard</button>
+        </div>
+        
+        <!-- Play Challenge Tab -->
+        <div id="playTab" class="game-tab">
+            <div class="category-selector">
+                <h4>Choose Category:</h4>
+                <div class="custom-dropdown">
+                    <div class="dropdown-selected" id="dropdownSelected">
+                        <span>All Categories</span>
+                        <span class="dropdown-arrow">▼</span>
+                    </div>
+                    <div class="dropdown-options" id="dropdownOptions">
+                        <div class="dropdown-option" data-value="">All Categories</div>
+                    </div>
+                </div>
+            </div>
+            
+            <div class="difficulty-selector">
+                <h4>Choose Difficulty:</h4>
+                <div class="difficulty-buttons">
+                    <button class="difficulty-btn" onclick="startChallenge('primary')">🌈 Primary</button>
+                    <button class="difficulty-btn" onclick="startChallenge('secondary')">🎓 Secondary</button>
+                    <button class="difficulty-btn" onclick="startChallenge('foundation')">🎆 Foundation</button>
+                    <button class="difficulty-btn" onclick="startChallenge('degree')">🏫 Degree</button>
+                </div>
+            </div>
+            
+            <div id="challengeArea" class="challenge-area" style="display: none;">
+                <div class="challenge-header">
+                    <h4 id="challengeTitle"></h4>
+                    <div class="timer-points">
+                        <span id="timer">⏱️ 30s</span>
+                        <span id="pointsDisplay">📎 0 pts</span>
+                    </div>
+                </div>
+                
+                <div class="challenge-content">
+                    <p id="challengeQuestion"></p>
+                    <div id="challengeOptions" class="options-grid"></div>
+                </div>
+                
+                <div class="challenge-result" id="challengeResult" style="display: none;"></div>
+            </div>
+        </div>
+        
+        <!-- Progress Tab -->
+        <div id="gameStatsTab" class="game-tab" style="display: none;">
+            <div id="gameStats"></div>
+            <button onclick="loadGameStats()">Refresh Progress</button>
+        </div>
+        
+        <!-- Leaderboard Tab -->
+        <div id="leaderboardTab" class="game-tab" style="display: none;">
+            <div id="leaderboard"></div>
+            <button onclick="loadLeaderboard()">Refresh Leaderboard</button>
+        </div>
+    `;
+    
+    setTimeout(() => {
+        resultDiv.classList.add('show');
+        loadCategories(); // Load categories when showing challenges
+    }, 100);
+}
+
+let selectedCategory = '';
+
+async function loadCategories() {
+    try {
+        const response = await fetch('/game/categories', { cache: 'no-cache' });
+        const data = await response.json();
+        
+        const optionsContainer = document.getElementById('dropdownOptions');
+        if (!optionsContainer) {
+            console.error('Dropdown options container not found');
+            return;
+        }
+        
+        optionsContainer.innerHTML = '<div class="dropdown-option" data-value="">All Categories</div>';
+        
+        if (data.categories && data.categories.length > 0) {
+            data.categories.forEach(category => {
+                const option = document.createElement('div');
+                option.className = 'dropdown-option';
+                option.setAttribute('data-value', category);
+                option.textContent = category;
+                option.onclick = () => selectCategory(category, category);
+                optionsContainer.appendChild(option);
+            });
+        } else {
+            // Add default categories if none loaded
+            const defaultCategories = ['Mathematics', 'Science', 'English', 'History', 'Geography', 'Programming'];
+            defaultCategories.forEach(category => {
+                const option = document.createElement('div');
+                option.className = 'dropdown-option';
+                option.setAttribute('data-value', category);
+                option.textContent = category;
+                option.onclick = () => selectCategory(category, category);
+                optionsContainer.appendChild(option);
+            });
+        }
+        
+        // Add click handler for "All Categories"
+        optionsContainer.firstChild.onclick = () => selectCategory('', 'All Categories');
+        
+        // Add dropdown toggle functionality
+        setupDropdown();
+        
+    } catch (error) {
+        console.error('Failed to load categories:', error);
+        // Add default categories on error
+        const optionsContainer = document.getElementById('dropdownOptions');
+        if (optionsContainer) {
+            const defaultCategories = ['Mathematics', 'Science', 'English', 'History', 'Geography', 'Programming'];
+            optionsContainer.innerHTML = '<div class="dropdown-option" data-value="">All Categories</div>';
+            defaultCategories.forEach(category => {
+                const option = document.createElement('div');
+                option.className = 'dropdown-option';
+                option.setAttribute('data-value', category);
+                option.textContent = category;
+                option.onclick = () => selectCategory(category, category);
+                optionsContainer.appendChild(option);
+            });
+            optionsContainer.firstChild.onclick = () => selectCategory('', 'All Categories');
+            setupDropdown();
+        }
+    }
+}
+
+function setupDropdown() {
+    const selected = document.getElementById('dropdownSelected');
+    const options = document.getElementById('dropdownOptions');
+    
+    selected.onclick = () => {
+        options.style.display = options.style.display === 'block' ? 'none' : 'block';
+    };
+    
+    // Close dropdown when clicking outside
+    document.addEventListener('click', (e) => {
+        if (!e.target.closest('.custom-dropdown')) {
+            options.style.display = 'none';
+        }
+    });
+}
+
+function selectCategory(value, text) {
+    selectedCategory = value;
+    document.getElementById('dropdownSelected').querySelector('span').textContent = text;
+    document.getElementById('dropdownOptions').style.display = 'none';
+}
+
+function showGameTab(tabName) {
+    document.querySelectorAll('.game-tab').forEach(tab => tab.style.display = 'none');
+    document.querySelectorAll('.game-tabs .tab-btn').forEach(btn => btn.classList.remove('active'));
+    
+    if (tabName === 'stats') {
+        document.getElementById('gameStatsTab').style.display = 'block';
+    } else {
+        document.getElementById(tabName + 'Tab').style.display = 'block';
+    }
+    event.target.classList.add('active');
+}
+
+async function startChallenge(difficulty) {
+    try {
+        const url = selectedCategory ? `/game/challenge/${difficulty}/${encodeURIComponent(selectedCategory)}` : `/game/challenge/${difficulty}`;
+        const response = await fetch(`${url}?user_id=${encodeURIComponent(currentUserId)}`);
+        const challenge = await response.json();
+        
+        if (challenge.error) {
+            showNotification(challenge.error, 'error');
+            return;
+        }
+        
+        currentChallenge = challenge;
+        displayChallenge(challenge);
+        startTimer(challenge.time_limit);
+        
+    } catch (error) {
+        console.error('Challenge error:', error);
+        showNotification('Failed to load challenge', 'error');
+    }
+}
+
+function displayChallenge(challenge) {
+    document.getElementById('challengeTitle').textContent = `${challenge.title} (${challenge.category})`;
+    document.getElementById('challengeQuestion').textContent = challenge.question;
+    document.getElementById('pointsDisplay').textContent = `💎 ${challenge.points} pts`;
+    
+    const optionsDiv = document.getElementById('challengeOptions');
+    optionsDiv.innerHTML = '';
+    
+    challenge.options.forEach(option => {
+        const button = document.createElement('button');
+        button.className = 'option-btn';
+        button.textContent = option;
+        button.onclick = () => submitAnswer(option);
+        optionsDiv.appendChild(button);
+    });
+    
+    document.getElementById('challengeArea').style.display = 'block';
+    document.getElementById('challengeResult').style.display = 'none';
+    startTime = Date.now();
+}
+
+function startTimer(seconds) {
+    timeRemaining = seconds;
+    updateTimerDisplay();
+    
+    challengeTimer = setInterval(() => {
+        timeRemaining--;
+        updateTimerDisplay();
+        
+        if (timeRemaining <= 0) {
+            clearInterval(challengeTimer);
+            submitAnswer(''); // Time's up
+        }
+    }, 1000);
+}
+
+function updateTimerDisplay() {
+    document.getElementById('timer').textContent = `⏱️ ${timeRemaining}s`;
+    
+    // Change color based on time remaining
+    const timerEl = document.getElementById('timer');
+    if (timeRemaining <= 5) {
+        timerEl.style.color = '#dc3545';
+    } else if (timeRemaining <= 10) {
+        timerEl.style.color = '#ffc107';
+    } else {
+        timerEl.style.color = '#28a745';
+    }
+}
+
+async function submitAnswer(answer) {
+    if (!currentChallenge) return;
+    
+    clearInterval(challengeTimer);
+    const timeTaken = Math.floor((Date.now() - startTime) / 1000);
+    
+    // Disable all option buttons
+    document.querySelectorAll('.option-btn').forEach(btn => btn.disabled = true);
+    
+    const formData = new FormData();
+    formData.append('user_id', currentUserId);
+    formData.append('challenge_id', currentChallenge.id);
+    formData.append('answer', answer);
+    formData.append('time_taken', timeTaken);
+    
+    try {
+        const response = await fetch('/game/submit', {
+            method: 'POST',
+            body: formData
+        });
+        
+        const result = await response.json();
+        displayResult(result);
+        
+    } catch (error) {
+        showNotification('Failed to submit answer', 'error');
+    }
+}
+
+function displayResult(result) {
+    const resultDiv = document.getElementById('challengeResult');
+    const pointsEarned = result.points_earned || 0;
+    const message = result.message || 'Challenge completed';
+    
+    resultDiv.innerHTML = `
+        <div class="result-content ${result.is_correct ? 'correct' : 'incorrect'}">
+            <h4>${result.is_correct ? '✅ Correct!' : '❌ Incorrect'}</h4>
+            <p>${message}</p>
+            <p><strong>Points Earned:</strong> ${pointsEarned}</p>
+            <button onclick="resetChallenge()" class="play-again-btn">Play Again</button>
+        </div>
+    `;
+    resultDiv.style.display = 'block';
+    
+    showNotification(message, result.is_correct ? 'success' : 'error');
+}
+
+async function loadGameStats() {
+    try {
+        const response = await fetch(`/game/stats/${currentUserId}`);
+        const stats = await response.json();
+        
+        const container = document.getElementById('gameStats');
+        container.innerHTML = `
+            <div class="game-stats-card">
+                <h4>🎮 Your Gaming Progress</h4>
+                <div class="stats-grid">
+                    <div class="stat-item">
+                        <span class="stat-value">${stats.total_points}</span>
+                        <span class="stat-label">Total Points</span>
+                    </div>
+                    <div class="stat-item">
+                        <span class="stat-value">${stats.challenges_completed}</span>
+                        <span class="stat-label">Challenges Completed</span>
+                    </div>
+                    <div class="stat-item">
+                        <span class="stat-value">${stats.current_streak}</span>
+                        <span class="stat-label">Current Streak</span>
+                    </div>
+                    <div class="stat-item">
+                        <span class="stat-value">${stats.best_streak}</span>
+                        <span class="stat-label">Best Streak</span>
+                    </div>
+                </div>
+                
+                <div class="level-progress">
+                    <h5>Level ${stats.level}</h5>
+                    <div class="progress-bar">
+                        <div class="progress-fill" style="width: ${stats.progress_to_next_level}%"></div>
+                    </div>
+                    <p>${stats.progress_to_next_level}% to Level ${stats.level + 1}</p>
+                </div>
+            </div>
+        `;
+    } catch (error) {
+        showNotification('Failed to load game stats', 'error');
+    }
+}
+
+async function loadLeaderboard() {
+    try {
+        const response = await fetch('/game/leaderboard', { cache: 'no-cache' });
+        const data = await response.json();
+        
+        const container = document.getElementById('leaderboard');
+        container.innerHTML = '<h4>🏆 Top Players</h4>';
+        
+        if (data.leaderboard && data.leaderboard.length > 0) {
+            const table = document.createElement('div');
+            table.className = 'leaderboard-table';
+            
+            data.leaderboard.forEach(player => {
+                const row = document.createElement('div');
+                row.className = 'leaderboard-row';
+                row.innerHTML = `
+                    <span class="rank">#${player.rank}</span>
+                    <span class="player">${player.user_id}</span>
+                    <span class="points">${player.total_points} pts</span>
+                    <span class="level">Lv.${player.level}</span>
+                `;
+                table.appendChild(row);
+            });
+            
+            container.appendChild(table);
+        } else {
+            container.innerHTML += '<p>No players yet. Be the first!</p>';
+        }
+    } catch (error) {
+        showNotification('Failed to load leaderboard', 'error');
+    }
+}
+
+function resetChallenge() {
+    // Clear current challenge state
+    currentChallenge = null;
+    if (challengeTimer) {
+        clearInterval(challengeTimer);
+        challengeTimer = null;
+    }
+    
+    // Hide challenge area and show difficulty selector
+    document.getElementById('challengeArea').style.display = 'none';
+    document.getElementById('challengeResult').style.display = 'none';
+    
+    // Re-enable option buttons for next challenge
+    document.querySelectorAll('.option-btn').forEach(btn => {
+        btn.disabled = false;
+        btn.style.opacity = '1';
+    });
+    
+    // Reset timer display
+    document.getElementById('timer').style.color = '#28a745';
+}
+
+// Flashcard System Functions
+let currentFlashcards = [];
+let currentCardIndex = 0;
+let isFlipped = false;
+
+function showFlashcards() {
+    const topic = document.getElementById('topic').value;
+    const level = document.getElementById('level').value;
+    
+    if (!topic.trim()) {
+        showNotification('Please enter a topic to generate flashcards!', 'error');
+        return;
+    }
+    
+    const resultDiv = document.getElementById('result');
+    resultDiv.className = 'result-area format-flashcard';
+    
+    resultDiv.innerHTML = `
+        <h3>📚 FLASHCARDS - Study & Review</h3>
+        
+        <div class="flashcard-controls">
+            <button onclick="generateFlashcards()" class="generate-btn">Generate Flashcards</button>
+            <span class="card-counter" id="cardCounter">0 / 0</span>
+        </div>
+        
+        <div id="flashcardArea" class="flashcard-area" style="display: none;">
+            <div class="flashcard" id="flashcard" onclick="flipCard()">
+                <div class="flashcard-inner">
+                    <div class="flashcard-front">
+                        <div class="card-content" id="cardFront"></div>
+                        <div class="flip-hint">Click to flip</div>
+                    </div>
+                    <div class="flashcard-back">
+                        <div class="card-content" id="cardBack"></div>
+                        <div class="flip-hint">Click to flip back</div>
+                    </div>
+                </div>
+            </div>
+            
+            <div class="flashcard-navigation">
+                <button onclick="previousCard()" id="prevBtn" disabled>← Previous</button>
+                <button onclick="nextCard()" id="nextBtn" disabled>Next →</button>
+            </div>
+        </div>
+    `;
+    
+    setTimeout(() => {
+        resultDiv.classList.add('show');
+    }, 100);
+}
+
+async function generateFlashcards() {
+    const topic = document.getElementById('topic').value;
+    const level = document.getElementById('level').value;
+    
+    try {
+        showNotification('Generating flashcards...', 'info');
+        
+        const response = await fetch('/generate_flashcards', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                topic: topic,
+                level: level,
+                user_id: currentUserId
+            })
+        });
+        
+        const result = await response.json();
+        
+        if (result.success) {
+            currentFlashcards = result.flashcards;
+            currentCardIndex = 0;
+            displayFlashcards();
+            showNotification(`Generated ${currentFlashcards.length} flashcards!`, 'success');
+        } else {
+            showNotification(result.error || 'Failed to generate flashcards', 'error');
+        }
+    } catch (error) {
+        showNotification('Error generating flashcards', 'error');
+    }
+}
+
+function displayFlashcards() {
+    if (currentFlashcards.length === 0) return;
+    
+    document.getElementById('flashcardArea').style.display = 'block';
+    
+    const card = currentFlashcards[currentCardIndex];
+    document.getElementById('cardFront').textContent = card.question;
+    document.getElementById('cardBack').textContent = card.answer;
+    document.getElementById('cardCounter').textContent = `${currentCardIndex + 1} / ${currentFlashcards.length}`;
+    
+    // Reset flip state
+    isFlipped = false;
+    document.getElementById('flashcard').classList.remove('flipped');
+    
+    // Update navigation buttons
+    document.getElementById('prevBtn').disabled = currentCardIndex === 0;
+    document.getElementById('nextBtn').disabled = currentCardIndex === currentFlashcards.length - 1;
+}
+
+function flipCard() {
+    const flashcard = document.getElementById('flashcard');
+    isFlipped = !isFlipped;
+    
+    if (isFlipped) {
+        flashcard.classList.add('flipped');
+    } else {
+        flashcard.classList.remove('flipped');
+    }
+}
+
+function previousCard() {
+    if (currentCardIndex > 0) {
+        currentCardIndex--;
+        displayFlashcards();
+    }
+}
+
+function nextCard() {
+    if (currentCardIndex < currentFlashcards.length - 1) {
+        currentCardIndex++;
+        displayFlashcards();
+    }
+}
+
+// Blurting System Functions
+let blurtingTimer = null;
+let blurtingStartTime = 0;
+
+function showBlurting() {
+    const topic = document.getElementById('topic').value;
+    const level = document.getElementById('level').value;
+    
+    if (!topic.trim()) {
+        showNotification('Please enter a topic for blurting practice!', 'error');
+        return;
+    }
+    
+    const resultDiv = document.getElementById('result');
+    resultDiv.className = 'result-area format-blurt';
+    
+    resultDiv.innerHTML = `
+        <h3>📝 BLURTING MODE - Active Recall Practice</h3>
+        
+        <div class="blurt-instructions">
+            <p><strong>How Blurting Works:</strong></p>
+            <ul>
+                <li>Write everything you know about "${topic}" without looking at notes</li>
+                <li>Don't worry about organization - just brain dump!</li>
+                <li>After finishing, AI will analyze what you missed</li>
+                <li>Great for identifying knowledge gaps</li>
+            </ul>
+        </div>
+        
+        <div class="blurt-controls">
+            <button onclick="startBlurting()" class="start-blurt-btn" id="startBlurtBtn">Start Blurting Session</button>
+            <div class="blurt-timer" id="blurtTimer" style="display: none;">
+                <span>⏱️ Time: <span id="timeDisplay">00:00</span></span>
+            </div>
+        </div>
+        
+        <div id="blurtArea" class="blurt-area" style="display: none;">
+            <textarea id="blurtText" placeholder="Write everything you know about ${topic}...\n\nDon't think too much - just write whatever comes to mind!" rows="15"></textarea>
+            
+            <div class="blurt-actions">
+                <button onclick="finishBlurting()" class="finish-blurt-btn">Finish & Get AI Analysis</button>
+                <button onclick="resetBlurting()" class="reset-blurt-btn">Reset</button>
+            </div>
+        </div>
+        
+        <div id="blurtAnalysis" class="blurt-analysis" style="display: none;"></div>
+    `;
+    
+    setTimeout(() => {
+        resultDiv.classList.add('show');
+    }, 100);
+}
+
+function startBlurting() {
+    document.getElementById('startBlurtBtn').style.display = 'none';
+    document.getElementById('blurtTimer').style.display = 'block';
+    document.getElementById('blurtArea').style.display = 'block';
+    
+    // Focus on textarea
+    document.getElementById('blurtText').focus();
+    
+    // Start timer
+    blurtingStartTime = Date.now();
+    blurtingTimer = setInterval(updateBlurtTimer, 1000);
+    
+    showNotification('Blurting session started! Write everything you know.', 'info');
+}
+
+function updateBlurtTimer() {
+    const elapsed = Math.floor((Date.now() - blurtingStartTime) / 1000);
+    const minutes = Math.floor(elapsed / 60);
+    const seconds = elapsed % 60;
+    document.getElementById('timeDisplay').textContent = 
+        `${minutes.toString().padStart(2, '0')}:${seconds.toString().padStart(2, '0')}`;
+}
+
+async function finishBlurting() {
+    const topic = document.getElementById('topic').value;
+    const level = document.getElementById('level').value;
+    const blurtText = document.getElementById('blurtText').value;
+    
+    if (!blurtText.trim()) {
+        showNotification('Please write something before finishing!', 'error');
+        return;
+    }
+    
+    // Stop timer
+    if (blurtingTimer) {
+        clearInterval(blurtingTimer);
+        blurtingTimer = null;
+    }
+    
+    const timeSpent = Math.floor((Date.now() - blurtingStartTime) / 1000);
+    
+    try {
+        showNotification('Analyzing your blurting session...', 'info');
+        
+        const response = await fetch('/analyze_blurting', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                topic: topic,
+                level: level,
+                blurt_text: blurtText,
+                time_spent: timeSpent,
+                user_id: currentUserId
+            })
+        });
+        
+        const result = await response.json();
+        
+        if (result.success) {
+            displayBlurtAnalysis(result.analysis, timeSpent);
+            showNotification('Analysis complete! Check your knowledge gaps.', 'success');
+        } else {
+            showNotification('Failed to analyze blurting session', 'error');
+        }
+    } catch (error) {
+        showNotification('Error analyzing blurting session', 'error');
+    }
+}
+
+function displayBlurtAnalysis(analysis, timeSpent) {
+    const minutes = Math.floor(timeSpent / 60);
+    const seconds = timeSpent % 60;
+    
+    document.getElementById('blurtAnalysis').innerHTML = `
+        <h4>📊 Blurting Analysis Results</h4>
+        <div class="analysis-stats">
+            <p><strong>Time Spent:</strong> ${minutes}m ${seconds}s</p>
+            <p><strong>Words Written:</strong> ${document.getElementById('blurtText').value.split(' ').length}</p>
+        </div>
+        <div class="analysis-content">
+            ${analysis}
+        </div>
+        <button onclick="resetBlurting()" class="try-again-btn">Try Another Topic</button>
+    `;
+    document.getElementById('blurtAnalysis').style.display = 'block';
+}
+
+function resetBlurting() {
+    if (blurtingTimer) {
+        clearInterval(blurtingTimer);
+        blurtingTimer = null;
+    }
+    
+    document.getElementById('startBlurtBtn').style.display = 'block';
+    document.getElementById('blurtTimer').style.display = 'none';
+    document.getElementById('blurtArea').style.display = 'none';
+    document.getElementById('blurtAnalysis').style.display = 'none';
+    document.getElementById('blurtText').value = '';
+    document.getElementById('timeDisplay').textContent = '00:00';
+}
+
+// Study Forum Functions
+function showForum() {
+    const resultDiv = document.getElementById('result');
+    resultDiv.className = 'result-area format-forum';
+    
+    resultDiv.innerHTML = `
+        <h3>💬 STUDY FORUM - Learn Together</h3>
+        
+        <div class="forum-tabs">
+            <button class="tab-btn active" onclick="showForumTab('discussions')">Discussions</button>
+            <button class="tab-btn" onclick="showForumTab('leaderboard')">Leaderboard</button>
+            <button class="tab-btn" onclick="showForumTab('create')">New Post</button>
+        </div>
+        
+        <!-- Discussions Tab -->
+        <div id="discussionsTab" class="forum-tab">
+            <div class="forum-filters">
+                <select id="topicFilter">
+                    <option value="">All Topics</option>
+                    <option value="mathematics">Mathematics</option>
+                    <option value="science">Science</option>
+                    <option value="programming">Programming</option>
+                    <option value="languages">Languages</option>
+                </select>
+                <select id="levelFilter">
+                    <option value="">All Levels</option>
+                    <option value="primary">Primary</option>
+                    <option value="secondary">Secondary</option>
+                    <option value="foundation">Foundation</option>
+                    <option value="degree">Degree</option>
+                </select>
+                <button onclick="loadForumThreads()">Refresh</button>
+            </div>
+            <div id="forumThreads" class="forum-threads"></div>
+        </div>
+        
+        <!-- Leaderboard Tab -->
+        <div id="forumLeaderboardTab" class="forum-tab" style="display: none;">
+            <div class="leaderboard-filters">
+                <select id="leaderboardFilter">
+                    <option value="all">All Time</option>
+                    <option value="week">This Week</option>
+                    <option value="month">This Month</option>
+                </select>
+                <button onclick="loadForumLeaderboard()">Refresh</button>
+            </div>
+            <div id="leaderboardList" class="leaderboard-list"></div>
+        </div>
+        
+        <!-- Create Post Tab -->
+        <div id="createTab" class="forum-tab" style="display: none;">
+            <div class="create-post">
+                <input type="text" id="postTitle" placeholder="What's your question or topic?">
+                <textarea id="postContent" placeholder="Describe your question, share knowledge, or start a discussion..." rows="6"></textarea>
+                <div class="post-meta">
+                    <select id="postTopic">
+                        <option value="general">General</option>
+                        <option value="mathematics">Mathematics</option>
+                        <option value="science">Science</option>
+                        <option value="programming">Programming</option>
+                        <option value="languages">Languages</option>
+                    </select>
+                    <select id="postLevel">
+                        <option value="primary">Primary</option>
+                        <option value="secondary">Secondary</option>
+                        <option value="foundation">Foundation</option>
+                        <option value="degree">Degree</option>
+                    </select>
+                </div>
+                <button onclick="createForumPost()" class="create-post-btn">Post to Forum</button>
+            </div>
+        </div>
+    `;
+    
+    setTimeout(() => {
+        resultDiv.classList.add('show');
+        loadForumThreads();
+    }, 100);
+}
+
+function showForumTab(tabName) {
+    document.querySelectorAll('.forum-tab').forEach(tab => tab.style.display = 'none');
+    document.querySelectorAll('.forum-tabs .tab-btn').forEach(btn => btn.classList.remove('active'));
+    
+    if (tabName === 'discussions') {
+        document.getElementById('discussionsTab').style.display = 'block';
+    } else if (tabName === 'leaderboard') {
+        document.getElementById('forumLeaderboardTab').style.display = 'block';
+        loadForumLeaderboard();
+    } else if (tabName === 'create') {
+        document.getElementById('createTab').style.display = 'block';
+    }
+    event.target.classList.add('active');
+}
+
+async function loadForumThreads() {
+    try {
+        const response = await fetch('/forum/threads', { cache: 'no-cache' });
+        const data = await response.json();
+        
+        const container = document.getElementById('forumThreads');
+        container.innerHTML = '';
+        
+        if (data.success && data.threads && data.threads.length > 0) {
+            data.threads.forEach(thread => {
+                const threadDiv = document.createElement('div');
+                threadDiv.className = 'forum-thread';
+                threadDiv.innerHTML = `
+                    <div class="thread-header">
+                        <h5 class="thread-title">${thread.title}</h5>
+                        <div class="thread-meta">
+                            <span class="thread-topic">${thread.topic}</span>
+                            <span class="thread-level">${thread.level}</span>
+                            <span class="thread-date">${new Date(thread.created_at).toLocaleDateString()}</span>
+                        </div>
+                    </div>
+                    <p class="thread-content">${thread.content}</p>
+                    <div class="thread-actions">
+                        <button onclick="likePost('${thread.id}')" class="like-btn">
+                            ❤️ ${thread.likes || 0}
+                        </button>
+                        <span class="author">by ${thread.user_id}</span>
+                    </div>
+                `;
+                container.appendChild(threadDiv);
+            });
+        } else {
+            container.innerHTML = '<p class="no-threads">No discussions yet. Be the first to start one!</p>';
+        }
+    } catch (error) {
+        showNotification('Failed to load forum threads', 'error');
+    }
+}
+
+async function createForumPost() {
+    const title = document.getElementById('postTitle').value;
+    const content = document.getElementById('postContent').value;
+    const topic = document.getElementById('postTopic').value;
+    const level = document.getElementById('postLevel').value;
+    
+    if (!title.trim() || !content.trim()) {
+        showNotification('Please fill in title and content', 'error');
+        return;
+    }
+    
+    try {
+        const response = await fetch('/forum/create_thread', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({
+                user_id: currentUserId,
+                title: title,
+                content: content,
+                topic: topic,
+                level: level
+            })
+        });
+        
+        const result = await response.json();
+        if (result.success) {
+            showNotification('Post created successfully!', 'success');
+            document.getElementById('postTitle').value = '';
+            document.getElementById('postContent').value = '';
+            showForumTab('discussions');
+            loadForumThreads();
+        } else {
+            showNotification('Failed to create post', 'error');
+        }
+    } catch (error) {
+        showNotification('Error creating post', 'error');
+    }
+}
+
+async function likePost(threadId) {
+    try {
+        const response = await fetch('/forum/like_thread', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({
+                user_id: currentUserId,
+                thread_id: threadId
+            })
+        });
+        
+        const result = await response.json();
+        if (result.success) {
+            loadForumThreads(); // Refresh to show updated likes
+        }
+    } catch (error) {
+        showNotification('Failed to like post', 'error');
+    }
+}
+
+async function loadForumLeaderboard() {
+    const filter = document.getElementById('leaderboardFilter')?.value || 'all';
+    
+    try {
+        const response = await fetch(`/leaderboard/${filter}`, { cache: 'no-cache' });
+        const data = await response.json();
+        
+        const container = document.getElementById('leaderboardList');
+        container.innerHTML = '';
+        
+        if (data.success && data.leaderboard && data.leaderboard.length > 0) {
+            data.leaderboard.forEach((user, index) => {
+                const userDiv = document.createElement('div');
+                userDiv.className = `leaderboard-item ${index < 3 ? 'top-three' : ''}`;
+                
+                const medal = index === 0 ? '🥇' : index === 1 ? '🥈' : index === 2 ? '🥉' : `#${index + 1}`;
+                
+                userDiv.innerHTML = `
+                    <div class="rank">${medal}</div>
+                    <div class="user-info">
+                        <span class="username">${user.user_id}</span>
+                        <span class="user-level">${user.level || 'Student'}</span>
+                    </div>
+                    <div class="points">
+                        <span class="point-value">${user.total_points || 0}</span>
+                        <span class="point-label">points</span>
+                    </div>
+                    <div class="stats">
+                        <span>💬 ${user.posts || 0}</span>
+                        <span>❤️ ${user.likes_received || 0}</span>
+                    </div>
+                `;
+                container.appendChild(userDiv);
+            });
+        } else {
+            container.innerHTML = '<p>No leaderboard data available.</p>';
+        }
+    } catch (error) {
+        showNotification('Failed to load leaderboard', 'error');
+    }
+}
+
+// Forum System Functions
+async function loadForumThreads() {
+    try {
+        const response = await fetch('/forum/threads', { cache: 'no-cache' });
+        const data = await response.json();
+        
+        const container = document.getElementById('forumThreads');
+        container.innerHTML = '';
+        
+        if (data.threads && data.threads.length > 0) {
+            data.threads.forEach(thread => {
+                const threadDiv = document.createElement('div');
+                threadDiv.className = 'forum-thread';
+                threadDiv.innerHTML = `
+                    <div class="thread-header">
+                        <h5 onclick="openThread('${thread.id}')" class="thread-title">${thread.title}</h5>
+                        <div class="thread-meta">
+                            <span>💬 ${thread.replies || 0} replies</span>
+                            <span>👤 ${thread.author}</span>
+                            <span>📅 ${new Date(thread.created_at).toLocaleDateString()}</span>
+                        </div>
+                    </div>
+                    <p class="thread-preview">${thread.content.substring(0, 150)}...</p>
+                    <div class="thread-tags">
+                        <span class="tag">${thread.topic}</span>
+                        <span class="tag">${thread.level}</span>
+                    </div>
+                `;
+                container.appendChild(threadDiv);
+            });
+        } else {
+            container.innerHTML = '<p>No discussions yet. Start the first one!</p>';
+        }
+    } catch (error) {
+        showNotification('Failed to load forum threads', 'error');
+    }
+}
+
+function createNewThread() {
+    const topic = document.getElementById('topic').value || 'General';
+    const level = document.getElementById('level').value;
+    
+    const modal = document.createElement('div');
+    modal.className = 'thread-modal';
+    modal.innerHTML = `
+        <div class="modal-content">
+            <h4>Start New Discussion</h4>
+            <input type="text" id="threadTitle" placeholder="Discussion title..." value="Question about ${topic}">
+            <textarea id="threadContent" placeholder="What would you like to discuss about ${topic}?" rows="6"></textarea>
+            <div class="modal-actions">
+                <button onclick="submitThread()" class="submit-btn">Post Discussion</button>
+                <button onclick="closeModal()" class="cancel-btn">Cancel</button>
+            </div>
+        </div>
+    `;
+    document.body.appendChild(modal);
+}
+
+async function submitThread() {
+    const title = document.getElementById('threadTitle').value;
+    const content = document.getElementById('threadContent').value;
+    const topic = document.getElementById('topic').value || 'General';
+    const level = document.getElementById('level').value;
+    
+    if (!title || !content) {
+        showNotification('Please fill in title and content', 'error');
+        return;
+    }
+    
+    try {
+        const response = await fetch('/forum/create_thread', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({
+                user_id: currentUserId,
+                title: title,
+                content: content,
+                topic: topic,
+                level: level
+            })
+        });
+        
+        const result = await response.json();
+        if (result.success) {
+            showNotification('Discussion created!', 'success');
+            closeModal();
+            loadForumThreads();
+        } else {
+            showNotification('Failed to create discussion', 'error');
+        }
+    } catch (error) {
+        showNotification('Error creating discussion', 'error');
+    }
+}
+
+function closeModal() {
+    const modal = document.querySelector('.thread-modal');
+    if (modal) modal.remove();
+}
+
+async function loadLeaderboard() {
+    const filter = document.getElementById('leaderboardFilter')?.value || 'all';
+    
+    try {
+        const response = await fetch(`/leaderboard/${filter}`, { cache: 'no-cache' });
+        const data = await response.json();
+        
+        const container = document.getElementById('leaderboardList');
+        container.innerHTML = '';
+        
+        if (data.leaderboard && data.leaderboard.length > 0) {
+            data.leaderboard.forEach((user, index) => {
+                const userDiv = document.createElement('div');
+                userDiv.className = `leaderboard-item ${index < 3 ? 'top-three' : ''}`;
+                
+                const medal = index === 0 ? '🥇' : index === 1 ? '🥈' : index === 2 ? '🥉' : `#${index + 1}`;
+                
+                userDiv.innerHTML = `
+                    <div class="rank">${medal}</div>
+                    <div class="user-info">
+                        <span class="username">${user.username}</span>
+                        <span class="user-level">${user.level} Level</span>
+                    </div>
+                    <div class="points">
+                        <span class="point-value">${user.total_points}</span>
+                        <span class="point-label">points</span>
+                    </div>
+                    <div class="stats">
+                        <span>🎓 ${user.explanations_count}</span>
+                        <span>⬆️ ${user.upvotes_received}</span>
+                    </div>
+                `;
+                container.appendChild(userDiv);
+            });
+        } else {
+            container.innerHTML = '<p>No leaderboard data available.</p>';
+        }
+    } catch (error) {
+        showNotification('Failed to load leaderboard', 'error');
+    }
+}
@@ -0,0 +1,291 @@
+"""Document stores behind Storage: S3, SQLite or a local directory.
+
+Community, game and forum records are JSON documents under keys like
+'forum/threads/<id>.json', which is how they have always been laid out in
+the S3 bucket. Every backend stores the same keys, so data can be copied
+between them as-is and the same Storage code runs on each:
+
+- s3: one object per document (the default, shared by every server);
+- sqlite: one row per document in a local WAL database; listing a prefix
+  is a single indexed range query instead of a LIST plus a GET per object;
+- filesystem: one file per document under a directory.
+
+Choose with STORAGE_BACKEND=s3|sqlite|filesystem.
+"""
+
+import contextvars
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import connect_sqlite
+
+# Listing an S3 prefix fetches the documents concurrently on this pool
+_s3_get_executor = ThreadPoolExecutor(max_workers=int(os.getenv('S3_GET_CONCURRENCY', '16')),
+                                      thread_name_prefix='s3-get')
+
+
+class DocumentStore:
+    """Interface for JSON document storage keyed by '/'-separated paths.
+
+    `get` returns None for a missing key; `items` yields (key, document)
+    pairs in key order and skips documents that can't be read or parsed.
+    """
+
+    name = 'base'
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def put(self, key, document):
+        raise NotImplementedError
+
+    def put_many(self, items):
+        """Store many (key, document) pairs; backends may do it in one batch"""
+        for key, document in items:
+            self.put(key, document)
+
+    def exists(self, key):
+        return self.get(key) is not None
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def keys(self, prefix=''):
+        """Every key starting with `prefix`, sorted"""
+        raise NotImplementedError
+
+    def items(self, prefix=''):
+        for key in self.keys(prefix):
+            document = self.get(key)
+            if document is not None:
+                yield key, document
+
+    def count(self, prefix=''):
+        return len(self.keys(prefix))
+
+
+class S3DocumentStore(DocumentStore):
+    """One JSON object per document in an S3 bucket.
+
+    `source` is anything with `s3_client` and `bucket_name` attributes (an
+    S3Storage); they are read on every call, so the client can be swapped
+    for a fake after the store is created.
+    """
+
+    name = 's3'
+
+    def __init__(self, source):
+        self.source = source
+
+    def get(self, key):
+        try:
+            content = self.source.s3_client.get_object(Bucket=self.source.bucket_name, Key=key)
+        except Exception as e:
+            if _is_not_found(e):
+                return None
+            raise
+        return json.loads(content['Body'].read())
+
+    def put(self, key, document):
+        self.source.s3_client.put_object(
+            Bucket=self.source.bucket_name,
+            Key=key,
+            Body=json.dumps(document),
+            ContentType='application/json'
+        )
+
+    def exists(self, key):
+        try:
+            self.source.s3_client.head_object(Bucket=self.source.bucket_name, Key=key)
+            return True
+        except Exception as e:
+            if _is_not_found(e):
+                return False
+            raise
+
+    def delete(self, key):
+        self.source.s3_client.delete_object(Bucket=self.source.bucket_name, Key=key)
+
+    def keys(self, prefix=''):
+        keys = []
+        kwargs = {'Bucket': self.source.bucket_name, 'Prefix': prefix}
+        while True:
+            response = self.source.s3_client.list_objects_v2(**kwargs)
+            keys.extend(obj['Key'] for obj in response.get('Contents', []))
+            if not response.get('IsTruncated'):
+                return keys
+            kwargs['ContinuationToken'] = response['NextContinuationToken']
+
+    def items(self, prefix=''):
+        keys = self.keys(prefix)
+        # Copy the context so the GETs are still attributed to the request
+        futures = [_s3_get_executor.submit(contextvars.copy_context().run, self._get_quietly, key) for key in keys]
+        for key, future in zip(keys, futures):
+            document = future.result()
+            if document is not None:
+                yield key, document
+
+    def _get_quietly(self, key):
+        try:
+            return self.get(key)
+        except Exception:
+            return None
+
+
+def _is_not_found(error):
+    code = getattr(error, 'response', {}).get('Error', {}).get('Code')
+    return code in ('NoSuchKey', '404', 'NotFound')
+
+
+class SQLiteDocumentStore(DocumentStore):
+    """Documents as rows of a SQLite table, for single-server deployments and tests.
+
+    Keys are the primary key, so listing a prefix is a range scan that
+    returns every document in one query. Each thread has its own
+    connection; WAL lets readers run alongside the writer.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = connect_sqlite(self.db_path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS documents (
+                    key TEXT PRIMARY KEY,
+                    body TEXT NOT NULL
+                ) WITHOUT ROWID
+            ''')
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute('SELECT body FROM documents WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key, document):
+        self.put_many([(key, document)])
+
+    def put_many(self, items):
+        conn = self._connect()
+        with conn:
+            conn.executemany('INSERT OR REPLACE INTO documents (key, body) VALUES (?, ?)',
+                             ((key, json.dumps(document)) for key, document in items))
+
+    def exists(self, key):
+        return self._connect().execute('SELECT 1 FROM documents WHERE key = ?', (key,)).fetchone() is not None
+
+    def delete(self, key):
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM documents WHERE key = ?', (key,))
+
+    def keys(self, prefix=''):
+        sql, params = _prefix_range(prefix)
+        return [row[0] for row in self._connect().execute(f'SELECT key FROM documents {sql} ORDER BY key', params)]
+
+    def items(self, prefix=''):
+        sql, params = _prefix_range(prefix)
+        rows = self._connect().execute(f'SELECT key, body FROM documents {sql} ORDER BY key', params).fetchall()
+        for key, body in rows:
+            try:
+                yield key, json.loads(body)
+            except ValueError:
+                continue
+
+    def count(self, prefix=''):
+        sql, params = _prefix_range(prefix)
+        return self._connect().execute(f'SELECT COUNT(*) FROM documents {sql}', params).fetchone()[0]
+
+
+def _prefix_range(prefix):
+    """WHERE clause matching keys that start with `prefix`, usable by the primary key index"""
+    if not prefix:
+        return '', ()
+    # The smallest string greater than every key with this prefix
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return 'WHERE key >= ? AND key < ?', (prefix, upper)
+
+
+class FileDocumentStore(DocumentStore):
+    """One JSON file per document under `root`, e.g. root/forum/threads/<id>.json"""
+
+    name = 'filesystem'
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key):
+        parts = key.split('/')
+        if any(part in ('', '.', '..') for part in parts):
+            raise ValueError(f"Invalid document key: {key!r}")
+        return os.path.join(self.root, *parts)
+
+    def get(self, key):
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, document):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so readers never see half a document
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(document, f)
+        os.replace(tmp_path, path)
+
+    def exists(self, key):
+        return os.path.isfile(self._path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def keys(self, prefix=''):
+        # Only walk the deepest directory the prefix names
+        directory = os.path.join(self.root, *prefix.split('/')[:-1])
+        keys = []
+        for current, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                key = os.path.relpath(os.path.join(current, name), self.root).replace(os.sep, '/')
+                if key.startswith(prefix):
+                    keys.append(key)
+        return sorted(keys)
+
+    def items(self, prefix=''):
+        for key in self.keys(prefix):
+            try:
+                document = self.get(key)
+            except ValueError:
+                continue
+            if document is not None:
+                yield key, document
+
+
+def get_document_store(name, s3_source=None):
+    """Build the configured document store"""
+    if name == 'sqlite':
+        return SQLiteDocumentStore(os.getenv('STORAGE_DB_PATH', 'storage.db'))
+    if name == 'filesystem':
+        return FileDocumentStore(os.getenv('STORAGE_DIR', 'storage'))
+    if name == 's3':
+        return S3DocumentStore(s3_source)
+    raise ValueError(f"Unknown STORAGE_BACKEND {name!r}; use s3, sqlite or filesystem")
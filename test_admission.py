@@ -0,0 +1,109 @@
+import threading
+import time
+from botocore.exceptions import ClientError
+from admission import AdmissionController, AdmissionRejected, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+
+def wait_until_queued(controller, count):
+    deadline = time.monotonic() + 2
+    while controller.queued < count:
+        assert time.monotonic() < deadline, f"Only {controller.queued} callers queued"
+        time.sleep(0.005)
+
+def throttling_error():
+    return ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'}}, 'InvokeModel')
+
+def test_interactive_callers_served_first():
+    controller = AdmissionController(initial_limit=1, max_limit=1)
+    controller.acquire()
+    order = []
+
+    def caller(name, priority):
+        controller.acquire(priority, timeout=2)
+        order.append(name)
+        controller.release()
+
+    threads = []
+    # Background callers queue first, yet the interactive one still goes ahead of them
+    for name, priority in (('background-1', PRIORITY_BACKGROUND), ('background-2', PRIORITY_BACKGROUND),
+                           ('interactive', PRIORITY_INTERACTIVE)):
+        thread = threading.Thread(target=caller, args=(name, priority))
+        thread.start()
+        threads.append(thread)
+        wait_until_queued(controller, len(threads))
+
+    controller.release()
+    for thread in threads:
+        thread.join(2)
+    assert order == ['interactive', 'background-1', 'background-2'], f"Served in order {order}"
+    stats = controller.stats()
+    assert stats['in_flight'] == 0 and stats['queued'] == 0 and stats['queue_wait_count'] == 3, stats
+    print("SUCCESS: Interactive callers jump the queue, equal priorities stay first in, first out")
+
+def test_deadline_and_queue_full_rejections():
+    controller = AdmissionController(initial_limit=1, max_limit=1, queue_size=1)
+    controller.acquire()
+
+    started = time.monotonic()
+    try:
+        controller.acquire(timeout=0.05)
+        raise AssertionError("Caller admitted while the only slot was held")
+    except AdmissionRejected:
+        pass
+    waited = time.monotonic() - started
+    assert 0.05 <= waited < 0.5, f"Deadline rejection after {waited:.3f}s"
+
+    waiter = threading.Thread(target=lambda: controller.acquire(timeout=0.5) or controller.release())
+    waiter.start()
+    wait_until_queued(controller, 1)
+    started = time.monotonic()
+    try:
+        controller.acquire(timeout=1)
+        raise AssertionError("Caller queued beyond queue_size")
+    except AdmissionRejected:
+        pass
+    assert time.monotonic() - started < 0.05, "Full queue did not reject immediately"
+
+    # The timed-out caller left no stale slot behind: the queued one still gets in
+    controller.release()
+    waiter.join(1)
+    stats = controller.stats()
+    assert stats['rejected_deadline'] == 1 and stats['rejected_queue_full'] == 1, stats
+    assert stats['in_flight'] == 0 and stats['queued'] == 0 and stats['admitted']['interactive'] == 2, stats
+    print("SUCCESS: Callers are turned away at their deadline and when the queue is full")
+
+def test_limit_halves_on_throttling_and_regrows():
+    controller = AdmissionController(initial_limit=8, min_limit=1, max_limit=8)
+    for expected in (4, 2, 1, 1):
+        try:
+            with controller.slot():
+                raise throttling_error()
+        except ClientError:
+            pass
+        assert controller.limit == expected, f"Limit {controller.limit} after throttling, expected {expected}"
+
+    # Other errors leave the limit alone
+    try:
+        with controller.slot():
+            raise ValueError('bad response')
+    except ValueError:
+        pass
+    assert controller.limit == 1
+
+    # Additive increase: about `limit` successes to gain one slot
+    successes = 0
+    while controller.limit < 4:
+        with controller.slot():
+            pass
+        successes += 1
+    assert 5 <= successes <= 8, f"Took {successes} successes to grow from 1 to 4"
+    for _ in range(200):
+        with controller.slot():
+            pass
+    assert controller.limit == 8 and controller.stats()['throttled'] == 4, controller.stats()
+    print(f"SUCCESS: Limit halved down to the floor on throttling, regrew to 4 in {successes} calls and capped at 8")
+
+if __name__ == "__main__":
+    print("Testing admission control...")
+    test_interactive_callers_served_first()
+    test_deadline_and_queue_full_rejections()
+    test_limit_halves_on_throttling_and_regrows()
@@ -0,0 +1,64 @@
+import gzip
+import os
+import tempfile
+from flask import Flask, render_template_string
+import assets
+
+def make_static():
+    static_dir = tempfile.mkdtemp()
+    with open(os.path.join(static_dir, 'app.js'), 'w') as f:
+        f.write("function greet() { console.log('hello'); }\n" * 200)
+    with open(os.path.join(static_dir, 'notes.txt'), 'w') as f:
+        f.write('not an asset')
+    return static_dir, os.path.join(static_dir, 'dist')
+
+def test_build_fingerprints_and_compresses():
+    static_dir, dist_dir = make_static()
+    manifest, sizes = assets.build(static_dir, dist_dir)
+    hashed = manifest.get('app.js', '')
+    assert list(manifest) == ['app.js'] and hashed.startswith('app.') and hashed != 'app.js', \
+        f"Unexpected manifest {manifest}"
+    with open(os.path.join(dist_dir, hashed + '.gz'), 'rb') as f:
+        unpacked = gzip.decompress(f.read())
+    with open(os.path.join(static_dir, 'app.js'), 'rb') as f:
+        original = f.read()
+    assert unpacked == original, "gzip variant doesn't match the source"
+    assert sizes['app.js']['gzip'] < len(original) / 5, f"gzip variant barely smaller: {sizes}"
+    # Same content, same name
+    assert assets.build(static_dir, dist_dir)[0] == manifest, "Rebuilding unchanged files changed their names"
+    print(f"SUCCESS: app.js -> {hashed}, {len(original)} -> {sizes['app.js']['gzip']} bytes gzipped")
+
+def test_serves_precompressed_immutable():
+    static_dir, dist_dir = make_static()
+    manifest, _ = assets.build(static_dir, dist_dir)
+    app = Flask(__name__, static_folder=static_dir, static_url_path='/static')
+    assets.init_app(app, dist_dir)
+    client = app.test_client()
+
+    with app.test_request_context():
+        url = render_template_string("{{ asset_url('app.js') }}")
+    zipped = client.get(url, headers={'Accept-Encoding': 'gzip, deflate'})
+    plain = client.get(url)
+    assert url == f"/assets/{manifest['app.js']}", f"Linked {url}"
+    assert zipped.headers.get('Content-Encoding') == 'gzip', zipped.headers.get('Content-Encoding')
+    assert 'immutable' in zipped.headers.get('Cache-Control', ''), dict(zipped.headers)
+    assert 'Accept-Encoding' in zipped.headers.get('Vary', ''), dict(zipped.headers)
+    assert not plain.headers.get('Content-Encoding') and gzip.decompress(zipped.data) == plain.data, \
+        "Identity and gzip variants differ"
+    assert client.get('/assets/manifest.json').status_code == 404, "Files outside the manifest are served"
+    print(f"SUCCESS: {url} served gzipped and immutable, identity when not accepted")
+
+def test_falls_back_without_build():
+    static_dir, dist_dir = make_static()
+    app = Flask(__name__, static_folder=static_dir, static_url_path='/static')
+    assets.init_app(app, dist_dir)
+    with app.test_request_context():
+        url = render_template_string("{{ asset_url('app.js') }}")
+    assert url == '/static/app.js', f"Got {url}"
+    print("SUCCESS: Unbuilt assets are linked from /static")
+
+if __name__ == "__main__":
+    print("Testing static asset pipeline...")
+    test_build_fingerprints_and_compresses()
+    test_serves_precompressed_immutable()
+    test_falls_back_without_build()
@@ -0,0 +1,70 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from bedrock_provider import BedrockProvider, text_breaker
+from circuit_breaker import CircuitBreaker, CircuitOpenError, hedged_call
+from fake_aws import FakeBedrockClient
+
+def test_breaker_fails_fast():
+    text_breaker.reset()
+    try:
+        provider = BedrockProvider(bedrock_client=FakeBedrockClient(latency=0.05, failure_rate=1.0))
+
+        # Enough failures to trip the breaker
+        for _ in range(text_breaker.min_calls):
+            provider.get_ai_response("photosynthesis", "primary", "chat")
+        assert text_breaker.state == CircuitBreaker.OPEN, f"Breaker still {text_breaker.state} after repeated failures"
+
+        calls_before = provider.bedrock_client.calls
+        started = time.monotonic()
+        result = provider.get_ai_response("photosynthesis", "primary", "chat")
+        elapsed = time.monotonic() - started
+        assert result is None and provider.bedrock_client.calls == calls_before and elapsed < 0.05, \
+            f"Open breaker still called Bedrock (result={result!r}, {elapsed:.3f}s)"
+        print(f"SUCCESS: Open breaker skipped Bedrock in {elapsed * 1000:.1f}ms")
+    finally:
+        text_breaker.reset()
+
+def test_breaker_recovers():
+    breaker = CircuitBreaker('test', min_calls=2, open_seconds=0.1)
+    client = FakeBedrockClient(failure_rate=1.0)
+    provider = BedrockProvider(bedrock_client=client)
+
+    for _ in range(2):
+        try:
+            breaker.call(provider._invoke_model, 0, modelId=provider.model_id, body='{"messages": [{"content": [{"text": "hi"}]}]}')
+        except Exception:
+            pass
+
+    try:
+        breaker.call(lambda: None)
+        raise AssertionError("Breaker did not open")
+    except CircuitOpenError:
+        pass
+
+    # Upstream heals; the half-open probe should close the breaker
+    time.sleep(0.15)
+    breaker.call(lambda: None)
+    assert breaker.state == CircuitBreaker.CLOSED, f"Breaker stuck in {breaker.state}"
+    print("SUCCESS: Breaker closed after successful probe")
+
+def test_hedged_call():
+    executor = ThreadPoolExecutor(max_workers=2)
+    attempts = []
+
+    def flaky():
+        # First attempt hangs, the hedge answers quickly
+        attempts.append(1)
+        time.sleep(0.5 if len(attempts) == 1 else 0.01)
+        return len(attempts)
+
+    started = time.monotonic()
+    result = hedged_call(flaky, 0.05, executor)
+    elapsed = time.monotonic() - started
+    executor.shutdown(wait=True)
+    assert result == 2 and elapsed < 0.3, f"Hedge did not cut latency (result={result}, {elapsed:.3f}s)"
+    print(f"SUCCESS: Hedged attempt won in {elapsed * 1000:.0f}ms")
+
+if __name__ == "__main__":
+    test_breaker_fails_fast()
+    test_breaker_recovers()
+    test_hedged_call()
@@ -0,0 +1,72 @@
+import gzip
+import json
+import zlib
+from flask import Flask, Response, jsonify
+import compression
+
+def make_client():
+    app = Flask(__name__)
+    compression.init_app(app)
+
+    @app.route('/big')
+    def big():
+        response = jsonify({'threads': [{'title': f'Thread {n}', 'content': 'Why is the sky blue?'} for n in range(200)]})
+        response.set_etag('abc123')
+        return response
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @app.route('/events')
+    def events():
+        def generate():
+            for n in range(3):
+                yield f"data: {json.dumps({'step': n, 'text': 'Plants make sugar from sunlight. ' * 20})}\n\n"
+        return Response(generate(), mimetype='text/event-stream')
+
+    return app.test_client()
+
+def test_large_responses_are_compressed():
+    client = make_client()
+    zipped = client.get('/big', headers={'Accept-Encoding': 'gzip'})
+    plain = client.get('/big')
+    small = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert zipped.headers.get('Content-Encoding') == 'gzip' and gzip.decompress(zipped.data) == plain.data, \
+        f"/big came back with encoding {zipped.headers.get('Content-Encoding')!r}"
+    assert not plain.headers.get('Content-Encoding') and not small.headers.get('Content-Encoding'), \
+        "Compressed a response the client didn't accept or that was below the threshold"
+    assert 'Accept-Encoding' in plain.headers.get('Vary', ''), f"Vary {plain.headers.get('Vary')!r}"
+    assert zipped.headers.get('ETag') == 'W/"abc123"', f"ETag {zipped.headers.get('ETag')!r}"
+    print(f"SUCCESS: {len(plain.data)} bytes compressed to {len(zipped.data)}, weak ETag, Vary set")
+
+def test_streams_flush_each_chunk():
+    client = make_client()
+    response = client.get('/events', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    decoder = zlib.decompressobj(31)
+    events = []
+    for piece in response.response:
+        text = decoder.decompress(piece).decode()
+        if text:
+            # Each chunk decodes on its own, so the client sees every event as it's sent
+            events.append(json.loads(text[len('data: '):])['step'])
+    response.close()
+    assert response.headers.get('Content-Encoding') == 'gzip' and events == [0, 1, 2], \
+        f"Got events {events} with encoding {response.headers.get('Content-Encoding')!r}"
+    print("SUCCESS: Streamed events compressed and decodable one at a time")
+
+def test_brotli_preferred_when_available():
+    if compression.brotli is None:
+        print("SUCCESS: Brotli not installed, skipped")
+        return
+    client = make_client()
+    response = client.get('/big', headers={'Accept-Encoding': 'gzip, deflate, br'})
+    assert response.headers.get('Content-Encoding') == 'br', f"Got encoding {response.headers.get('Content-Encoding')!r}"
+    assert json.loads(compression.brotli.decompress(response.data))['threads'][0]['title'] == 'Thread 0'
+    print("SUCCESS: Brotli chosen when the client accepts it")
+
+if __name__ == "__main__":
+    print("Testing response compression...")
+    test_large_responses_are_compressed()
+    test_streams_flush_each_chunk()
+    test_brotli_preferred_when_available()
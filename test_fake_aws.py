@@ -0,0 +1,57 @@
+import tempfile
+import time
+from botocore.exceptions import ClientError
+from fake_aws import FakeS3Client, FakeTranscribeClient
+from s3_storage import S3Storage
+from transcription_backends import AWSTranscribeBackend
+
+def test_s3_listing_matches_s3():
+    for root in (None, tempfile.mkdtemp()):
+        client = FakeS3Client(root=root)
+        for key in ('challenges/primary/Science/a.json', 'challenges/primary/Maths/b.json',
+                    'forum/threads/1.json', 'forum/threads/2.json', 'forum/threads/3.json'):
+            client.put_object(Bucket='b', Key=key, Body='{}')
+
+        first = client.list_objects_v2(Bucket='b', Prefix='forum/threads/', MaxKeys=2)
+        rest = client.list_objects_v2(Bucket='b', Prefix='forum/threads/',
+                                      ContinuationToken=first['NextContinuationToken'])
+        keys = [obj['Key'] for obj in first['Contents'] + rest['Contents']]
+        assert keys == ['forum/threads/1.json', 'forum/threads/2.json', 'forum/threads/3.json'], \
+            f"Paginated listing returned {keys}"
+        assert not rest['IsTruncated']
+
+        grouped = client.list_objects_v2(Bucket='b', Prefix='challenges/primary/', Delimiter='/')
+        prefixes = [p['Prefix'] for p in grouped['CommonPrefixes']]
+        assert prefixes == ['challenges/primary/Maths/', 'challenges/primary/Science/'] and 'Contents' not in grouped, \
+            f"Delimiter listing returned {grouped}"
+
+        try:
+            client.head_object(Bucket='b', Key='missing.json')
+            raise AssertionError("head_object found a missing key")
+        except ClientError:
+            pass
+
+    assert client.operations['PutObject'] == 5 and client.operations['ListObjectsV2'] == 3, \
+        f"Unexpected call counts {dict(client.operations)}"
+    print("SUCCESS: Fake S3 pages, groups and counts like S3")
+
+def test_transcribe_job_round_trip():
+    s3_client = FakeS3Client()
+    storage = S3Storage()
+    storage.bucket_name = 'fake-bucket'
+    storage.s3_client = s3_client
+    backend = AWSTranscribeBackend(FakeTranscribeClient(s3_client, latency=0.1, transcript='Hello there.'), storage)
+
+    backend.start('job1', b'RIFF', 'clip.wav')
+    status, _ = backend.check('job1')
+    assert status == 'IN_PROGRESS', f"New job is {status}"
+    time.sleep(0.15)
+    status, uri = backend.check('job1')
+    transcript = backend.fetch_transcript(uri)
+    assert status == 'COMPLETED' and transcript == 'Hello there.', f"Got {status} / {transcript!r}"
+    print("SUCCESS: Fake Transcribe job completes and its transcript is read from S3")
+
+if __name__ == "__main__":
+    print("Testing fake AWS clients...")
+    test_s3_listing_matches_s3()
+    test_transcribe_job_round_trip()
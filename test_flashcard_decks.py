@@ -0,0 +1,40 @@
+import os
+import tempfile
+from flashcard_decks import FlashcardDeckStore, FlashcardPregenerator, normalize_topic, parse_deck
+
+def test_parse_deck():
+    response = ('Here are your cards:\n'
+                '[{"question": "What is H2O?", "answer": "Water [liquid]"}]\n'
+                'Note: see also [1] for details.')
+    deck = parse_deck(response)
+    assert deck == [{'question': 'What is H2O?', 'answer': 'Water [liquid]'}], f"Unexpected deck {deck}"
+    assert parse_deck('[{"question": "Missing answer"}]') is None, "Accepted a card without an answer"
+    print("SUCCESS: Deck parsed despite trailing brackets")
+
+def test_store_and_pregenerate():
+    db_path = os.path.join(tempfile.mkdtemp(), 'decks.db')
+    store = FlashcardDeckStore(db_path, ttl=3600)
+    deck = [{'question': 'What is gravity?', 'answer': 'A force'}]
+
+    assert store.get('Gravity', 'primary') is None, "Empty store returned a deck"
+    store.put('gravity', 'primary', deck)
+    assert store.get('  GRAVITY! ', 'primary') == deck, "Deck not found by normalized topic"
+    assert store.get('gravity', 'secondary') is None, "Deck found at another level"
+
+    # "Photosynthesis" was requested but has no deck yet
+    store.get('Photosynthesis', 'primary')
+    store.get('photosynthesis', 'primary')
+    generated = []
+    pregenerator = FlashcardPregenerator(store, lambda topic, level: generated.append((topic, level)) or deck)
+    pregenerator.run_once()
+
+    # The secondary-level gravity lookup above also counts as a request without a deck
+    assert sorted(generated) == [('gravity', 'secondary'), ('photosynthesis', 'primary')], \
+        f"Pre-generation refreshed {generated}"
+    assert store.get('photosynthesis', 'primary') == deck
+    print(f"SUCCESS: Deck store hit after pre-generation ({normalize_topic('  GRAVITY! ')!r} key)")
+
+if __name__ == "__main__":
+    print("Testing flashcard decks...")
+    test_parse_deck()
+    test_store_and_pregenerate()
@@ -0,0 +1,128 @@
+import contextvars
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from bedrock_provider import BedrockProvider
+from fake_aws import FakeBedrockClient
+from grading_batcher import GradingBatcher
+
+def test_concurrent_grading_is_batched():
+    scores_text = '\n'.join(f"{number}: 7" for number in range(1, 9))
+    client = FakeBedrockClient(latency=0.1, text=scores_text)
+    provider = BedrockProvider(bedrock_client=client)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        scores = list(pool.map(
+            lambda i: provider.grade_explanation("photosynthesis", "primary", f"Plants make food from light ({i})"),
+            range(16)
+        ))
+
+    assert scores == [7] * 16, f"Unexpected scores {scores}"
+    assert client.calls <= 4, f"{client.calls} model calls for 16 explanations"
+    print(f"SUCCESS: 16 explanations graded with {client.calls} model calls")
+
+def test_missing_scores_default():
+    def grade_batch(items):
+        # Model only answered for the first explanation
+        return [6]
+
+    batcher = GradingBatcher(grade_batch, max_batch=4, max_wait=0.2)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(batcher.grade, "gravity", "primary", f"Things fall ({i})") for i in range(3)]
+        time.sleep(0.05)
+        scores = sorted(f.result() for f in futures if f.result() is not None)
+
+    assert scores == [6], f"Unexpected scores {scores}"
+    print("SUCCESS: Unanswered items resolve to None")
+
+def test_batches_run_concurrently_in_caller_context():
+    route = contextvars.ContextVar('route', default=None)
+    lock = threading.Lock()
+    running, peak, routes = [0], [0], []
+
+    def grade_batch(items):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            routes.append(route.get())
+        time.sleep(0.2)
+        with lock:
+            running[0] -= 1
+        return [5] * len(items)
+
+    def submit(i):
+        route.set('POST /submit_explanation')
+        return batcher.grade("gravity", "primary", f"Things fall ({i})")
+
+    batcher = GradingBatcher(grade_batch, max_batch=2, max_wait=0.01, max_concurrency=3)
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        scores = list(pool.map(submit, range(6)))
+    elapsed = time.monotonic() - started
+
+    assert scores == [5] * 6, f"Unexpected scores {scores}"
+    assert peak[0] > 1 and elapsed < 0.5, f"{peak[0]} batches in flight at once, took {elapsed:.2f}s"
+    assert routes and all(name == 'POST /submit_explanation' for name in routes), f"Batches ran with routes {routes}"
+    print(f"SUCCESS: {peak[0]} grading batches in flight at once, each in its caller's context")
+
+def test_pending_grading_is_requeued():
+    import app as app_module
+    from storage import Storage
+    from storage_backends import SQLiteDocumentStore
+
+    store = SQLiteDocumentStore(os.path.join(tempfile.mkdtemp(), 'storage.db'))
+    restarted, other_worker = app_module.AILearningPlatform(), app_module.AILearningPlatform()
+    for platform in (restarted, other_worker):
+        platform.ai_provider = BedrockProvider(bedrock_client=FakeBedrockClient(text='8'))
+        platform.storage = Storage(store)
+    # Saved by a worker that was restarted before grading it
+    explanation = restarted.storage.submit_explanation('alice12345', 'Gravity', 'primary', 'Things fall down.')
+
+    assert restarted.requeue_pending_grading(older_than=60) == 0, "Re-queued an explanation that was just submitted"
+    assert restarted.requeue_pending_grading(older_than=0) == 1
+    # Claimed by the first worker, so another one sweeping now leaves it alone
+    assert other_worker.requeue_pending_grading(older_than=60) == 0, "Two workers re-queued the same explanation"
+    status = restarted.get_explanation_status(explanation['id'], wait=5)
+    assert status == {'id': explanation['id'], 'grading_status': 'graded', 'clarity_score': 8}, status
+    assert restarted.requeue_pending_grading(older_than=0) == 0, "Re-queued a graded explanation"
+    print("SUCCESS: Explanations left pending are graded by the next sweep, once")
+
+def test_status_poll_is_short():
+    import app as app_module
+    from storage import Storage
+    from storage_backends import SQLiteDocumentStore
+
+    platform = app_module.get_platform()
+    original = platform.__dict__.get('storage')
+    platform.storage = Storage(SQLiteDocumentStore(os.path.join(tempfile.mkdtemp(), 'storage.db')))
+    explanation = platform.storage.submit_explanation('bob1234567', 'Tides', 'primary', 'The moon pulls water.')
+    # Queued but never graded, so the request waits as long as the route allows
+    with platform._grading_lock:
+        platform._grading_done[explanation['id']] = threading.Event()
+    try:
+        client = app_module.create_app().test_client()
+        started = time.monotonic()
+        status = client.get(f"/explanation_status/{explanation['id']}?wait=20").get_json()
+        elapsed = time.monotonic() - started
+    finally:
+        with platform._grading_lock:
+            platform._grading_done.pop(explanation['id'], None)
+        # Other tests use the shared platform's own storage
+        if original is None:
+            del platform.storage
+        else:
+            platform.storage = original
+
+    assert status['grading_status'] == 'pending', status
+    assert elapsed <= app_module.EXPLANATION_STATUS_MAX_WAIT + 0.5, f"Status request held for {elapsed:.1f}s"
+    print(f"SUCCESS: A status poll asking for 20s returned after {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    print("Testing grading batcher...")
+    test_concurrent_grading_is_batched()
+    test_missing_scores_default()
+    test_batches_run_concurrently_in_caller_context()
+    test_pending_grading_is_requeued()
+    test_status_poll_is_short()
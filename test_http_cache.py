@@ -0,0 +1,72 @@
+import os
+import tempfile
+from fake_aws import FakeS3Client
+from data_versions import SQLiteDataVersions
+
+def make_client():
+    import app as app_module
+    from http_cache import response_cache
+
+    response_cache.clear()
+    s3 = FakeS3Client()
+    storage = app_module.get_platform().s3_storage
+    storage.bucket_name = 'bucket'
+    storage.s3_client = s3
+    return app_module.create_app().test_client(), storage, s3
+
+def test_conditional_requests_skip_s3():
+    client, storage, s3 = make_client()
+    storage.create_forum_thread('alice12345', 'Gravity?', 'Why do apples fall?', 'gravity', 'primary')
+
+    first = client.get('/forum/threads')
+    etag = first.headers.get('ETag')
+    assert first.status_code == 200 and etag, f"First response {first.status_code} with ETag {etag!r}"
+    assert 'max-age' in first.headers.get('Cache-Control', ''), first.headers.get('Cache-Control')
+
+    calls = s3.calls
+    repeat = client.get('/forum/threads')
+    conditional = client.get('/forum/threads', headers={'If-None-Match': etag})
+    assert repeat.get_json() == first.get_json(), "Repeat request returned different data"
+    assert conditional.status_code == 304 and not conditional.data, f"Conditional gave {conditional.status_code}"
+    assert s3.calls == calls, f"Cached responses made {s3.calls - calls} S3 calls"
+    print("SUCCESS: Repeat and conditional requests answered without S3")
+
+def test_writes_invalidate():
+    client, storage, s3 = make_client()
+    first = client.get('/forum/threads')
+    storage.create_forum_thread('bob1234567', 'Photosynthesis', 'How do leaves eat?', 'biology', 'primary')
+
+    after = client.get('/forum/threads', headers={'If-None-Match': first.headers['ETag']})
+    titles = [thread['title'] for thread in after.get_json()['threads']]
+    assert after.status_code == 200 and 'Photosynthesis' in titles, f"After a write got {after.status_code} with {titles}"
+    assert after.headers['ETag'] != first.headers['ETag'], "ETag unchanged after a write"
+    print("SUCCESS: A new thread invalidated the cached list")
+
+def test_errors_are_not_cached():
+    client, storage, s3 = make_client()
+    storage.get_forum_threads = lambda: 1 / 0
+    try:
+        failed = client.get('/forum/threads')
+    finally:
+        del storage.get_forum_threads
+    recovered = client.get('/forum/threads')
+    assert 'ETag' not in failed.headers, f"Error response was cached: {failed.get_json()}"
+    assert recovered.get_json().get('success'), f"Got {recovered.get_json()} after recovering"
+    print("SUCCESS: Error responses are not cached")
+
+def test_sqlite_versions_are_shared():
+    path = os.path.join(tempfile.mkdtemp(), 'versions.db')
+    writer, reader = SQLiteDataVersions(path), SQLiteDataVersions(path)
+    before = reader.get(('forum', 'players'))
+    writer.bump('forum')
+    writer.bump('forum')
+    after = reader.get(('forum', 'players'))
+    assert before == (0, 0) and after == (2, 0), f"Versions went from {before} to {after}"
+    print("SUCCESS: SQLite data versions are shared between instances")
+
+if __name__ == "__main__":
+    print("Testing HTTP response caching...")
+    test_conditional_requests_skip_s3()
+    test_writes_invalidate()
+    test_errors_are_not_cached()
+    test_sqlite_versions_are_shared()
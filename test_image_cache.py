@@ -0,0 +1,57 @@
+import os
+import tempfile
+from fake_aws import FakeS3Client
+from image_cache import ImageCache
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 100
+
+def test_workers_share_the_directory():
+    directory = tempfile.mkdtemp()
+    first, second = ImageCache(directory), ImageCache(directory)
+    key = ImageCache.key_for('amazon.nova-canvas-v1:0', {'text': 'photosynthesis'})
+    first.put(key, PNG)
+
+    # The second worker never generated it but finds the file without S3
+    assert second.contains(key), "Image in the shared directory not found by another worker"
+    assert second.stats()['entries'] == 1 and second.stats()['hits'] == 1, second.stats()
+
+    # Evicted by the first worker: the second one's index entry is stale
+    os.remove(first.path(key))
+    assert not second.contains(key), "Stale index entry reported as a hit"
+    assert second.stats()['entries'] == 0 and second.stats()['bytes'] == 0, second.stats()
+    print("SUCCESS: Images written by one worker are served by another, removed ones miss")
+
+def test_s3_fallback():
+    s3 = FakeS3Client()
+    key = ImageCache.key_for('amazon.nova-canvas-v1:0', {'text': 'gravity'})
+    ImageCache(tempfile.mkdtemp(), s3_client=s3, bucket_name='bucket').put(key, PNG)
+
+    other = ImageCache(tempfile.mkdtemp(), s3_client=s3, bucket_name='bucket')
+    assert other.contains(key), "Image not fetched from S3"
+    with open(other.path(key), 'rb') as f:
+        assert f.read() == PNG
+    gets = s3.operations['GetObject']
+    assert other.contains(key) and s3.operations['GetObject'] == gets, "Fetched from S3 again"
+    assert not other.contains('0' * 64)
+    print("SUCCESS: Images from another host are pulled from S3 once")
+
+def test_evicts_least_recently_used():
+    directory = tempfile.mkdtemp()
+    cache = ImageCache(directory, max_entries=2)
+    keys = [ImageCache.key_for('model', {'n': n}) for n in range(3)]
+    cache.put(keys[0], PNG)
+    cache.put(keys[1], PNG)
+    cache.contains(keys[0])
+    cache.put(keys[2], PNG)
+
+    assert not os.path.exists(cache.path(keys[1])), "Evicted the recently used image instead"
+    assert os.path.exists(cache.path(keys[0])) and os.path.exists(cache.path(keys[2]))
+    # A restarted worker rebuilds the index from the files left behind
+    assert ImageCache(directory, max_entries=2).stats()['entries'] == 2
+    print("SUCCESS: Least recently used image evicted, index rebuilt on restart")
+
+if __name__ == "__main__":
+    print("Testing image cache...")
+    test_workers_share_the_directory()
+    test_s3_fallback()
+    test_evicts_least_recently_used()
@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+from bench_import_time import DEFERRED_MODULES, import_profile
+
+def test_app_import_is_lazy():
+    _, loaded = import_profile('app')
+    eager = [name for name in DEFERRED_MODULES if name in loaded]
+    assert not eager, f"Importing app loaded {', '.join(eager)}"
+    print("SUCCESS: Importing app defers AWS clients and optional dependencies")
+
+def test_create_app_without_aws():
+    # A request that doesn't need AWS must work without building any client
+    code = ("import sys, app; client = app.create_app().test_client(); "
+            "assert client.get('/formats').status_code == 200; "
+            "assert 'boto3' not in sys.modules")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr.strip()
+    print("SUCCESS: App serves requests without creating AWS clients")
+
+def test_shared_canvas_cache_services():
+    # With CANVAS_CACHE_S3 the provider wires the canvas cache to the bucket of s3_storage,
+    # which in turn hands the provider to storage for AI challenges
+    code = ("import app; from bedrock_provider import canvas_cache; platform = app.get_platform(); "
+            "provider = platform.ai_provider; storage = platform.s3_storage; "
+            "assert storage.ai_provider is provider; "
+            "assert canvas_cache.s3_client is storage.s3_client")
+    env = dict(os.environ, CANVAS_CACHE_S3='true', AWS_REGION='us-east-1', AWS_DEFAULT_REGION='us-east-1')
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=env)
+    assert result.returncode == 0, result.stderr.strip()[-2000:]
+    print("SUCCESS: ai_provider and s3_storage build each other's dependencies without recursion")
+
+def test_metrics_scrape_creates_nothing():
+    # Monitoring polls /metrics on a fresh worker before any user request
+    code = ("import sys, threading, app; client = app.create_app().test_client(); "
+            "metrics = client.get('/metrics').get_json(); "
+            "created = vars(app.get_platform()); "
+            "assert not {'ai_provider', 'flashcard_decks', 'topic_cache'} & set(created), sorted(created); "
+            "assert metrics['flashcard_decks'] is None and metrics['topic_cache'] is None, metrics; "
+            "assert 'boto3' not in sys.modules; "
+            "assert threading.active_count() == 1, threading.enumerate()")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr.strip()
+    print("SUCCESS: /metrics reports only services that already exist")
+
+if __name__ == "__main__":
+    print("Testing import time...")
+    test_app_import_is_lazy()
+    test_create_app_without_aws()
+    test_shared_canvas_cache_services()
+    test_metrics_scrape_creates_nothing()
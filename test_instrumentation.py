@@ -0,0 +1,64 @@
+import os
+import tempfile
+import boto3
+from botocore.stub import Stubber
+from flask import Flask
+import instrumentation
+from fake_aws import FakeS3Client
+from instrumentation import connect_sqlite, instrument_client, route_metrics
+from s3_storage import S3Storage
+
+def build_app():
+    app = Flask(__name__)
+    instrumentation.init_app(app)
+    return app
+
+def test_boto3_and_sqlite_calls_are_attributed():
+    client = instrument_client(boto3.client('s3', region_name='us-east-1',
+                                            aws_access_key_id='test', aws_secret_access_key='test'))
+    stubber = Stubber(client)
+    stubber.add_response('list_objects_v2', {'KeyCount': 0, 'IsTruncated': False})
+    stubber.activate()
+    db_path = os.path.join(tempfile.mkdtemp(), 'probe.db')
+
+    app = build_app()
+
+    @app.route('/probe/<name>')
+    def probe(name):
+        client.list_objects_v2(Bucket='bucket', Prefix=name)
+        conn = connect_sqlite(db_path)
+        conn.execute('CREATE TABLE IF NOT EXISTS t (x)')
+        conn.execute('SELECT * FROM t').fetchall()
+        conn.close()
+        return 'ok'
+
+    app.test_client().get('/probe/first')
+    calls = route_metrics.stats()['GET /probe/<name>']['calls_per_request']
+    assert calls == {'s3.ListObjectsV2': 1, 'sqlite.CREATE': 1, 'sqlite.SELECT': 1}, f"Unexpected calls {calls}"
+    print("SUCCESS: boto3 and SQLite calls counted against the route")
+
+def test_n_plus_one_shows_in_call_counts():
+    storage = S3Storage()
+    storage.bucket_name = 'bucket'
+    storage.s3_client = instrument_client(FakeS3Client(), 's3')
+    for i in range(12):
+        storage.create_forum_thread(f'user{i:04d}', 'Title', 'Content', 'Gravity', 'primary')
+
+    app = build_app()
+
+    @app.route('/threads')
+    def threads():
+        return {'threads': storage.get_forum_threads()}
+
+    client = app.test_client()
+    client.get('/threads')
+    client.get('/threads')
+    route = route_metrics.stats()['GET /threads']
+    assert route['count'] == 2, f"Unexpected route metrics {route}"
+    assert route['calls_per_request'] == {'s3.GetObject': 12, 's3.ListObjectsV2': 1}, f"Unexpected route metrics {route}"
+    print("SUCCESS: One GET per thread shows up as 12 S3 reads per request")
+
+if __name__ == "__main__":
+    print("Testing request instrumentation...")
+    test_boto3_and_sqlite_calls_are_attributed()
+    test_n_plus_one_shows_in_call_counts()
@@ -0,0 +1,42 @@
+from keyword_matcher import KeywordMatcher
+from topics import get_topic_response, TOPICS
+
+def test_matches_all_keywords():
+    matcher = KeywordMatcher([('he', 'he'), ('she', 'she'), ('hers', 'hers'), ('his', 'his')])
+    found = matcher.find_all('ushers and this', word_start=False)
+    assert found == ['she', 'he', 'hers', 'his'], f"Unexpected matches {found}"
+
+    categories = KeywordMatcher([('ai', 'tech'), ('data', 'tech'), ('physics', 'science')])
+    assert categories.first('Physics of AI') == 'tech', "Catalogue order is wrong"
+    assert categories.first('chairs') is None, "Matched a keyword in the middle of a word"
+    print("SUCCESS: Overlapping keywords found in one pass")
+
+def test_fallback_keywords_are_whole_words():
+    import app as app_module
+
+    platform = app_module.AILearningPlatform()
+    tech = "is like a smart helper that uses computers"
+    for topic in ('air pressure', 'aim of history', 'Chairs in history', 'pythonic poetry'):
+        answer = platform.get_smart_fallback(topic, 'primary', 'chat')
+        assert tech not in answer and not answer.startswith('Python is'), f"{topic!r} got {answer!r}"
+    for topic in ('AI ethics', 'Sorting algorithms', 'data science'):
+        assert tech in platform.get_smart_fallback(topic, 'primary', 'chat'), f"{topic!r} lost the tech answer"
+    assert platform.get_smart_fallback('python basics', 'primary', 'chat').startswith('Python is')
+
+    categories = KeywordMatcher([('ai', 'tech'), ('algorithm', 'tech')])
+    assert categories.first('air pressure', word_end=True) is None
+    assert categories.first('air pressure') == 'tech', "Prefix matching changed without word_end"
+    print("SUCCESS: Fallback answers need whole keywords ('ai' is not 'air')")
+
+def test_topic_response():
+    expected = TOPICS['kubernetes']['advanced']
+    assert get_topic_response('Scaling apps with Kubernetes', 'advanced') == expected
+    assert get_topic_response('kube', 'advanced') == expected
+    assert get_topic_response('gardening', 'advanced') is None
+    print("SUCCESS: Topic responses found by name and prefix")
+
+if __name__ == "__main__":
+    print("Testing keyword matcher...")
+    test_matches_all_keywords()
+    test_fallback_keywords_are_whole_words()
+    test_topic_response()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Equivalence corpus for the streaming markdown renderer"""
+
+from bench_markdown import legacy_format_response, sample_markdown
+from markdown_renderer import MarkdownRenderer, render_markdown
+
+# Inputs the old regex passes handled correctly: the output must not change
+BASELINE_CORPUS = [
+    "",
+    "Plain text with no markup at all",
+    "**Photosynthesis** turns *light* into sugar.",
+    "# Title\n## Section\n### Subsection\n#### Detail",
+    "##### Too deep\n####### Deeper\n##No space",
+    "- first\n- second\n\nAfter the list",
+    "• bullet one\n• bullet two",
+    "## Steps\n- **Light**: absorbed\n- **Water**: split\n### Next",
+    "Text\n- item\n## Heading right after a list",
+    "- **unclosed bold\n- *unclosed em",
+    "a * b * c and 2 * 3",
+    "Trailing newline\n",
+    "    <div class=\"visual\">*indented* html</div>\n  - indented dash",
+    "Line one\n\n\nLine four",
+]
+
+# Inputs the old code got wrong ('* ' bullets were turned into <em>), with the intended output
+FIXED_CORPUS = [
+    ("* star bullet\n* another", "<ul>\n<li>star bullet</li>\n<li>another</li>\n</ul>"),
+    ("* **bold** item", "<ul>\n<li><strong>bold</strong> item</li>\n</ul>"),
+]
+
+
+def test_matches_baseline():
+    """Test render_markdown against the legacy renderer and the fixed cases"""
+    cases = BASELINE_CORPUS + [sample_markdown(size, seed) for size in (500, 5000) for seed in (1, 2)]
+    for text in cases:
+        assert render_markdown(text) == legacy_format_response(text), \
+            f"{text[:60]!r}: {render_markdown(text)[:80]!r} != {legacy_format_response(text)[:80]!r}"
+    for text, expected in FIXED_CORPUS:
+        assert render_markdown(text) == expected, f"{text!r} rendered as {render_markdown(text)!r}"
+    print(f"SUCCESS: {len(cases)} inputs match the baseline, {len(FIXED_CORPUS)} star-bullet cases fixed")
+
+
+def test_streaming_matches_batch():
+    """Test that feeding chunks then closing gives exactly the batch output"""
+    texts = BASELINE_CORPUS + [text for text, _ in FIXED_CORPUS] + [sample_markdown(3000)]
+    for text in texts:
+        for chunk_size in (1, 3, 7, 37, 1000):
+            renderer = MarkdownRenderer()
+            pieces = [renderer.feed(text[i:i + chunk_size]) for i in range(0, len(text), chunk_size)]
+            streamed = ''.join(pieces) + renderer.close()
+            assert streamed == render_markdown(text), \
+                f"{text[:40]!r} streamed in {chunk_size}-char chunks: {streamed[:80]!r}"
+    print("SUCCESS: Streaming output matches batch output")
+
+
+def test_complete_lines_are_emitted_early():
+    """Test that feed returns finished lines before the response ends"""
+    renderer = MarkdownRenderer()
+    assert renderer.feed("## Light reac") == ''
+    assert renderer.feed("tions\n- wat") == '<h2>Light reactions</h2>'
+    assert renderer.feed("er is split\nOxygen") == '\n<ul>\n<li>water is split</li>'
+    # The list is closed once the line after it is complete
+    assert renderer.close() == '\n</ul>\nOxygen'
+    print("SUCCESS: Each line is rendered as soon as it is complete")
+
+
+if __name__ == "__main__":
+    print("Testing markdown renderer...")
+    test_matches_baseline()
+    test_streaming_matches_batch()
+    test_complete_lines_are_emitted_early()
@@ -0,0 +1,123 @@
+import io
+import os
+import tempfile
+from fake_aws import FakeS3Client
+from migrate_storage import Checkpoint, migrate
+from s3_storage import S3Storage
+from storage_backends import FileDocumentStore, SQLiteDocumentStore
+
+def make_s3(count):
+    """S3-backed store holding `count` documents under each of a few prefixes"""
+    storage = S3Storage()
+    storage.bucket_name = 'bucket'
+    storage.s3_client = FakeS3Client()
+    for n in range(count):
+        storage.store.put(f'users/user{n:03d}_stats.json', {'total_points': n})
+        storage.store.put(f'forum/threads/thread{n:03d}.json', {'title': f'Thread {n}'})
+    return storage
+
+class FailingStore(SQLiteDocumentStore):
+    """Fails the write after `batches` successful ones, like a crash mid-run"""
+
+    def __init__(self, db_path, batches):
+        super().__init__(db_path)
+        self.batches = batches
+
+    def put_many(self, items):
+        if self.batches == 0:
+            raise RuntimeError('disk full')
+        self.batches -= 1
+        super().put_many(items)
+
+class FlakyStore(SQLiteDocumentStore):
+    """Fails reads of `broken` keys, and the first read of every `flaky` key"""
+
+    def __init__(self, db_path, flaky=(), broken=()):
+        super().__init__(db_path)
+        self.flaky, self.broken = set(flaky), set(broken)
+        self.reads = []
+
+    def get(self, key):
+        self.reads.append(key)
+        if key in self.broken or key in self.flaky:
+            self.flaky.discard(key)
+            raise ConnectionError('connection reset')
+        return super().get(key)
+
+def test_unreadable_keys_are_retried():
+    workdir = tempfile.mkdtemp()
+    source_path = os.path.join(workdir, 'source.db')
+    SQLiteDocumentStore(source_path).put_many([(f'users/user{n:03d}_stats.json', {'total_points': n})
+                                               for n in range(30)])
+    checkpoint_path = os.path.join(workdir, 'checkpoint.json')
+    destination = SQLiteDocumentStore(os.path.join(workdir, 'destination.db'))
+    flaky = [f'users/user{n:03d}_stats.json' for n in (3, 17)]
+    broken = ['users/user011_stats.json', 'users/user025_stats.json']
+
+    source = FlakyStore(source_path, flaky=flaky, broken=broken)
+    result = migrate(source, destination, ['users/'], Checkpoint(checkpoint_path, 'sqlite', 'sqlite'),
+                     batch_size=10, retry_delay=0.01, out=io.StringIO())
+    # Transient errors are retried in place; persistent ones are recorded rather than skipped
+    assert result['copied'] == 28 and result['failed'] == 2 and result['skipped'] == 0, result
+    assert destination.get(flaky[0]) == {'total_points': 3}, "Transiently failing key not retried"
+    assert os.path.exists(checkpoint_path), "Checkpoint removed with unread keys left"
+
+    # The next run reads only the keys that failed
+    source = FlakyStore(source_path)
+    result = migrate(source, destination, ['users/'], Checkpoint(checkpoint_path, 'sqlite', 'sqlite'),
+                     batch_size=10, retry_delay=0.01, out=io.StringIO())
+    assert sorted(source.reads) == broken, f"Second run read {source.reads}"
+    assert result['copied'] == 2 and not result['failed'] and not result['missing'], result
+    assert destination.count('users/') == 30 and not os.path.exists(checkpoint_path)
+    print("SUCCESS: Failed reads retried with backoff, then only the unread keys on the next run")
+
+def test_resumes_after_interruption():
+    workdir = tempfile.mkdtemp()
+    s3 = make_s3(25)
+    db_path = os.path.join(workdir, 'storage.db')
+    checkpoint_path = os.path.join(workdir, 'checkpoint.json')
+    prefixes = ['users/', 'forum/threads/']
+
+    try:
+        migrate(s3.store, FailingStore(db_path, batches=4), prefixes,
+                Checkpoint(checkpoint_path, 's3', 'sqlite'), batch_size=10, out=io.StringIO())
+        raise AssertionError("Interrupted migration did not raise")
+    except RuntimeError:
+        pass
+    assert os.path.exists(checkpoint_path), "No checkpoint left behind"
+
+    gets_before = s3.s3_client.operations['GetObject']
+    result = migrate(s3.store, SQLiteDocumentStore(db_path), prefixes,
+                     Checkpoint(checkpoint_path, 's3', 'sqlite'), batch_size=10, out=io.StringIO())
+    fetched = s3.s3_client.operations['GetObject'] - gets_before
+    destination = SQLiteDocumentStore(db_path)
+    # users/ and one batch of forum/threads/ were committed before the failure,
+    # so only the other 15 documents are fetched again
+    assert not result['missing'] and fetched == 15 and result['copied'] == 15, \
+        f"Resumed run fetched {fetched} and copied {result['copied']}, {result['missing']} missing"
+    assert destination.count('users/') == 25 and destination.get('users/user007_stats.json') == {'total_points': 7}, \
+        "SQLite is missing documents"
+    assert not os.path.exists(checkpoint_path), "Checkpoint kept after a verified run"
+    print(f"SUCCESS: Resumed after {result['copied']} remaining documents, counts verified")
+
+def test_round_trip_back_to_s3():
+    workdir = tempfile.mkdtemp()
+    s3 = make_s3(12)
+    sqlite = SQLiteDocumentStore(os.path.join(workdir, 'storage.db'))
+    files = FileDocumentStore(os.path.join(workdir, 'documents'))
+    back = make_s3(0)
+
+    migrate(s3.store, sqlite, batch_size=5, out=io.StringIO())
+    migrate(sqlite, files, batch_size=5, out=io.StringIO())
+    result = migrate(files, back.store, batch_size=5, out=io.StringIO())
+    assert not result['missing'] and result['copied'] == 24, \
+        f"Round trip copied {result['copied']}, {result['missing']} missing"
+    assert list(back.store.items('forum/threads/')) == list(s3.store.items('forum/threads/')), \
+        "Documents changed on the way through"
+    print(f"SUCCESS: S3 -> SQLite -> filesystem -> S3 kept all {result['copied']} documents")
+
+if __name__ == "__main__":
+    print("Testing storage migration...")
+    test_resumes_after_interruption()
+    test_unreadable_keys_are_retried()
+    test_round_trip_back_to_s3()
@@ -0,0 +1,133 @@
+import os
+import tempfile
+from flask import Blueprint, Flask
+import rate_limiter
+from rate_limiter import SQLiteTokenBucketLimiter, TokenBucketLimiter, rate_limited
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_buckets_refill():
+    for make in (lambda clock: TokenBucketLimiter(rate=1.0, capacity=3, clock=clock),
+                 lambda clock: SQLiteTokenBucketLimiter(os.path.join(tempfile.mkdtemp(), 'rl.db'),
+                                                        rate=1.0, capacity=3, clock=clock)):
+        clock = FakeClock()
+        limiter = make(clock)
+        name = type(limiter).__name__
+        results = [limiter.hit('user:a', 1) for _ in range(4)]
+        assert results[:3] == [0.0, 0.0, 0.0] and abs(results[3] - 1.0) < 1e-9, f"{name} burst gave {results}"
+        assert limiter.hit('user:b', 2) == 0.0, "Buckets are not per key"
+        clock.now += 2.5
+        assert limiter.hit('user:a', 2) == 0.0 and limiter.hit('user:a', 1) != 0.0, \
+            f"{name} did not refill at the configured rate"
+    print("SUCCESS: Memory and SQLite buckets allow bursts and refill over time")
+
+def test_limited_route_returns_429():
+    original = rate_limiter.rate_limiter
+    rate_limiter.rate_limiter = TokenBucketLimiter(rate=0.1, capacity=2)
+    try:
+        app = Flask(__name__)
+        bp = Blueprint('probe', __name__)
+
+        @bp.route('/expensive', methods=['POST'])
+        @rate_limited(cost=2)
+        def expensive():
+            return {'success': True}
+
+        app.register_blueprint(bp)
+        client = app.test_client()
+        first = client.post('/expensive', data={'user_id': 'alice'})
+        second = client.post('/expensive', data={'user_id': 'alice'})
+        other = client.post('/expensive', json={'user_id': 'bob'})
+    finally:
+        rate_limiter.rate_limiter = original
+
+    assert first.status_code == 200 and other.status_code == 200, \
+        f"First requests got {first.status_code} / {other.status_code}"
+    assert second.status_code == 429 and second.headers.get('Retry-After') == '20', \
+        f"Got {second.status_code} with Retry-After {second.headers.get('Retry-After')}"
+    print("SUCCESS: Over-limit user gets 429 with Retry-After; other users unaffected")
+
+def test_users_behind_one_address_get_own_buckets():
+    original = rate_limiter.rate_limiter
+    rate_limiter.rate_limiter = TokenBucketLimiter(rate=0.1, capacity=1)
+    try:
+        app = Flask(__name__)
+        bp = Blueprint('probe', __name__)
+
+        @bp.route('/challenge')
+        @rate_limited(cost=1)
+        def challenge():
+            return {'success': True}
+
+        app.register_blueprint(bp)
+        client = app.test_client()
+        # A classroom shares one IP: each pupil's GET is keyed on the user_id query argument
+        statuses = [client.get(f'/challenge?user_id=pupil{n}').status_code for n in range(5)]
+        repeat = client.get('/challenge?user_id=pupil0').status_code
+    finally:
+        rate_limiter.rate_limiter = original
+
+    assert statuses == [200] * 5 and repeat == 429, f"Got {statuses} then {repeat}"
+    print("SUCCESS: Users sharing an IP are limited separately by user_id")
+
+def test_rotating_user_ids_hit_the_ip_limit():
+    original = rate_limiter.rate_limiter, rate_limiter.ip_rate_limiter
+    rate_limiter.rate_limiter = TokenBucketLimiter(rate=0.1, capacity=2)
+    rate_limiter.ip_rate_limiter = TokenBucketLimiter(rate=0.1, capacity=6)
+    try:
+        app = Flask(__name__)
+        bp = Blueprint('probe', __name__)
+
+        @bp.route('/learn', methods=['POST'])
+        @rate_limited(cost=2)
+        def learn():
+            return {'success': True}
+
+        app.register_blueprint(bp)
+        client = app.test_client()
+        # A fresh user_id each time gets a fresh user bucket, but the address runs dry
+        statuses = [client.post('/learn', data={'user_id': f'user_{n}'}).status_code for n in range(5)]
+        other_address = client.post('/learn', data={'user_id': 'user_9'},
+                                    environ_base={'REMOTE_ADDR': '10.0.0.2'}).status_code
+        ip_stats = rate_limiter.ip_rate_limiter.stats()
+    finally:
+        rate_limiter.rate_limiter, rate_limiter.ip_rate_limiter = original
+
+    assert statuses == [200, 200, 200, 429, 429], f"Rotating user ids got {statuses}"
+    assert other_address == 200 and ip_stats['limited'] == 2, (other_address, ip_stats)
+    print("SUCCESS: A new user_id per request is still limited by the client IP")
+
+def test_sqlite_limiters_share_a_file():
+    db_path = os.path.join(tempfile.mkdtemp(), 'rl.db')
+    clock = FakeClock()
+    users = SQLiteTokenBucketLimiter(db_path, rate=1.0, capacity=1, clock=clock)
+    addresses = SQLiteTokenBucketLimiter(db_path, rate=1.0, capacity=5, clock=clock, table='rate_limit_ip_buckets')
+    assert users.hit('ip:1.2.3.4') == 0.0 and users.hit('ip:1.2.3.4') > 0
+    assert addresses.hit('ip:1.2.3.4') == 0.0, "IP bucket shares rows with the user buckets"
+    print("SUCCESS: User and IP buckets are kept apart in one SQLite file")
+
+def test_frontend_sends_user_id_to_limited_routes():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'app.js')) as f:
+        script = f.read()
+    # Each call is checked from the start of its function to the end of the fetch statement
+    calls = {'/learn': "fetch('/learn'", '/analyze_blurting': "fetch('/analyze_blurting'",
+             '/generate_flashcards': "fetch('/generate_flashcards'", '/game/challenge': "fetch(`${url}"}
+    for route, call in calls.items():
+        position = script.index(call)
+        start, end = script.rindex('async function', 0, position), script.index(';', position)
+        assert 'currentUserId' in script[start:end], f"{route} is called without user_id"
+    print("SUCCESS: Every rate-limited call from app.js carries the user_id")
+
+if __name__ == "__main__":
+    print("Testing rate limiting...")
+    test_buckets_refill()
+    test_limited_route_returns_429()
+    test_users_behind_one_address_get_own_buckets()
+    test_rotating_user_ids_hit_the_ip_limit()
+    test_sqlite_limiters_share_a_file()
+    test_frontend_sends_user_id_to_limited_routes()
@@ -0,0 +1,69 @@
+from semantic_cache import SemanticCache
+
+def test_reworded_topic_hits():
+    cache = SemanticCache()
+    if not cache.enabled:
+        print("SUCCESS: numpy not installed, cache disabled")
+        return
+
+    cache.put("photosynthesis in plants", "primary", "chat", "answer")
+    hits = [cache.get(topic, "primary", "chat") for topic in
+            ("How does photosynthesis in plants work?", "Photosynthesis in plants", "photosynthesis in plant")]
+    misses = [cache.get("photosynthesis in plants", "secondary", "chat"),
+              cache.get("photosynthesis in plants", "primary", "visual"),
+              cache.get("photosynthesis in algae", "primary", "chat"),
+              cache.get("cellular respiration", "primary", "chat")]
+
+    assert hits == ["answer"] * 3, f"hits={hits}"
+    assert misses == [None] * 4, f"misses={misses}"
+    print("SUCCESS: Reworded topics hit, other topics, levels and formats miss")
+
+def test_similar_looking_topics_miss():
+    cache = SemanticCache()
+    if not cache.enabled:
+        return
+
+    pairs = [("aerobic respiration", "anaerobic respiration"), ("DNA replication", "RNA replication"),
+             ("hypothermia", "hyperthermia"), ("mitosis", "meiosis"), ("ionic bonds", "covalent bonds"),
+             ("photosynthesis", "photosynthesis in plants")]
+    for cached, asked in pairs:
+        cache.put(cached, "primary", "chat", cached)
+    served = {asked: cache.get(asked, "primary", "chat") for _, asked in pairs}
+
+    assert all(value is None for value in served.values()), f"Wrong topic served: {served}"
+    print("SUCCESS: Topics that differ by a word or a few letters miss")
+
+def test_typos_and_plurals_hit():
+    cache = SemanticCache()
+    if not cache.enabled:
+        return
+
+    cache.put("photosynthesis in plants", "primary", "chat", "photosynthesis")
+    cache.put("cellular respiration", "primary", "chat", "respiration")
+    cache.put("Newton's laws of motion", "primary", "chat", "newton")
+    asked = {"photosynthsis in plants": "photosynthesis", "Plants photosynthesis": "photosynthesis",
+             "celular respiration": "respiration", "respiration cellular": "respiration",
+             "what is newtons law of motion": "newton", "Newton law motion": "newton"}
+    served = {topic: cache.get(topic, "primary", "chat") for topic in asked}
+
+    assert served == asked, f"served={served}"
+    print("SUCCESS: Misspelt, reordered and plural topics hit")
+
+def test_size_bound():
+    cache = SemanticCache(max_entries=50)
+    if not cache.enabled:
+        return
+
+    for i in range(200):
+        cache.put(f"topic number {i}", "primary", "chat", i)
+    entries = cache.stats()['entries']
+    assert entries == 50, f"{entries} entries kept"
+    assert cache.get("topic number 199", "primary", "chat") == 199
+    print("SUCCESS: Partition stays within max_entries")
+
+if __name__ == "__main__":
+    print("Testing semantic cache...")
+    test_reworded_topic_hits()
+    test_similar_looking_topics_miss()
+    test_typos_and_plurals_hit()
+    test_size_bound()
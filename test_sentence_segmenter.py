@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Correctness corpus for the sentence boundary trimmer"""
+
+from sentence_segmenter import SentenceSegmenter, ensure_natural_ending
+
+# (input, expected output of ensure_natural_ending)
+CORPUS = [
+    ("Water boils at 100 degrees. It then turns into", "Water boils at 100 degrees."),
+    ("Pi is roughly 3.14159 and e is about 2.718. More on that lat",
+     "Pi is roughly 3.14159 and e is about 2.718."),
+    ("See https://example.com/docs.html for details. The next par",
+     "See https://example.com/docs.html for details."),
+    ("Plants need light, e.g. sunlight. Animals, i.e. consumers, do not. Dr. Smith sa",
+     "Plants need light, e.g. sunlight. Animals, i.e. consumers, do not."),
+    ("The book by J. K. Rowling is popular. Another auth", "The book by J. K. Rowling is popular."),
+    ("Steps:\n1. Mix the water\n2. Heat it\n3. Wa", "Steps:\n1. Mix the water\n2. Heat it"),
+    ('He said "Stop!" and left. Then', 'He said "Stop!" and left.'),
+    ("Energy is conserved (see Fig. 2). Mass is", "Energy is conserved (see Fig. 2)."),
+    ("Is it alive? Yes! It gr", "Is it alive? Yes!"),
+    ("The formula is E = mc^2 (mass-energy equivalence)", "The formula is E = mc^2 (mass-energy equivalence)"),
+    ("no terminator in this text at all", "no terminator in this text at all"),
+    ("A complete answer.   \n\n", "A complete answer."),
+    ("", ""),
+    ("Einstein published special relativity in 1905. It changed how physicists thought about spa",
+     "Einstein published special relativity in 1905."),
+    ("Water has 2 hydrogen atoms and 1 oxygen. Together they for", "Water has 2 hydrogen atoms and 1 oxygen."),
+    ("The short answer is no. Plants still need some wat", "The short answer is no."),
+    ("Ask the co. Then wait", "Ask the co."),
+    ("Read page No. 5 of the notes. Then fin", "Read page No. 5 of the notes."),
+    ("Steps:\n  10. Mix it all\n  11. Wa", "Steps:\n  10. Mix it all"),
+    # A complete last line without a full stop: list items, headings and long lines stay
+    ("Plants need three things:\n- Sunlight for energy\n- Water from the soil\n- Carbon dioxide from the air",
+     "Plants need three things:\n- Sunlight for energy\n- Water from the soil\n- Carbon dioxide from the air"),
+    ("## Key facts\n**Photosynthesis** happens in chloroplasts",
+     "## Key facts\n**Photosynthesis** happens in chloroplasts"),
+    ("Photosynthesis makes sugar.\n## Key facts", "Photosynthesis makes sugar.\n## Key facts"),
+    ("Steps:\n1. Mix the water\n2. Heat it until it boils", "Steps:\n1. Mix the water\n2. Heat it until it boils"),
+    ("Plants need light.\nThey also ne", "Plants need light."),
+    ("Plants need light. They also need water and carbon dioxide fr",
+     "Plants need light."),
+]
+
+
+def test_corpus():
+    """Test ensure_natural_ending against the corpus"""
+    failures = []
+    for text, expected in CORPUS:
+        actual = ensure_natural_ending(text)
+        if actual != expected:
+            failures.append(f"{text!r}\n  expected {expected!r}\n  got      {actual!r}")
+    assert not failures, '\n'.join(failures)
+    print(f"SUCCESS: {len(CORPUS)} corpus cases trimmed correctly")
+
+
+def test_streaming_matches_batch():
+    """Test that feeding chunks gives the same text as trimming the whole response"""
+    for text, _ in CORPUS:
+        for chunk_size in (1, 3, 7, 50):
+            segmenter = SentenceSegmenter()
+            pieces = [segmenter.feed(text[i:i + chunk_size]) for i in range(0, len(text), chunk_size)]
+            streamed = (''.join(pieces) + segmenter.close()).rstrip()
+            assert streamed == ensure_natural_ending(text), \
+                f"streamed {streamed!r} != batch {ensure_natural_ending(text)!r} (chunk size {chunk_size})"
+    print("SUCCESS: Streaming output matches batch output")
+
+
+if __name__ == "__main__":
+    print("Testing sentence segmenter...")
+    test_corpus()
+    test_streaming_matches_batch()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fake_aws import FakeBedrockClient
+from single_flight import SingleFlight
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    def generate():
+        calls.append(1)
+        time.sleep(0.2)
+        return ['card']
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: flight.do(('flashcards', 'gravity', 'primary'), generate), range(8)))
+    assert len(calls) == 1 and all(result == ['card'] for result in results), \
+        f"{len(calls)} calls for 8 identical requests, results {results}"
+    # Once it has finished, the next caller starts a new call
+    flight.do(('flashcards', 'gravity', 'primary'), generate)
+    stats = flight.stats()
+    assert len(calls) == 2 and stats['in_flight'] == 0 and stats['kinds']['flashcards']['shared'] == 7, \
+        f"Unexpected state after the call finished: {len(calls)} calls, {stats}"
+    print("SUCCESS: 8 concurrent identical requests made 1 call")
+
+def test_errors_and_timeouts_reach_waiters():
+    flight = SingleFlight(timeout=0.05)
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.2)
+        raise ValueError('model unavailable')
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        leader = pool.submit(flight.do, ('learn', 'x'), failing)
+        started.wait()
+        waiter = pool.submit(flight.do, ('learn', 'x'), failing, 1.0)
+        impatient = pool.submit(flight.do, ('learn', 'x'), failing)
+        outcomes = []
+        for future in (leader, waiter, impatient):
+            try:
+                future.result()
+                outcomes.append(None)
+            except Exception as e:
+                outcomes.append(type(e).__name__)
+
+    assert outcomes == ['ValueError', 'ValueError', 'SingleFlightTimeout'], f"Got {outcomes}"
+    print("SUCCESS: Leader's error re-raised to waiters, slow wait timed out")
+
+def test_flashcard_requests_coalesce():
+    import app as app_module
+    from bedrock_provider import BedrockProvider
+    from flashcard_decks import FlashcardDeckStore
+
+    fake = FakeBedrockClient(latency=0.2, text='[{"question": "What is gravity?", "answer": "A force"}]')
+    platform = app_module.AILearningPlatform()
+    platform.ai_provider = BedrockProvider(bedrock_client=fake)
+    platform.flashcard_decks = FlashcardDeckStore(os.path.join(tempfile.mkdtemp(), 'decks.db'))
+    topic = f"coalescing test {time.time()}"
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        decks = list(pool.map(lambda _: platform.get_flashcards(topic, 'primary'), range(5)))
+    assert fake.calls == 1, f"{fake.calls} Bedrock calls"
+    assert all(deck == decks[0] and deck[0]['answer'] == 'A force' for deck in decks), f"Decks {decks}"
+    print("SUCCESS: 5 concurrent flashcard requests made 1 Bedrock call")
+
+if __name__ == "__main__":
+    print("Testing single-flight coalescing...")
+    test_concurrent_callers_share_one_call()
+    test_errors_and_timeouts_reach_waiters()
+    test_flashcard_requests_coalesce()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+from fake_aws import FakeS3Client
+from s3_storage import S3Storage
+from storage import Storage
+from storage_backends import FileDocumentStore, SQLiteDocumentStore
+
+def make_storages():
+    """The same Storage on each backend, all empty"""
+    workdir = tempfile.mkdtemp()
+    s3 = S3Storage()
+    s3.bucket_name = 'bucket'
+    s3.s3_client = FakeS3Client()
+    return {
+        's3': s3,
+        'sqlite': Storage(SQLiteDocumentStore(os.path.join(workdir, 'storage.db'))),
+        'filesystem': Storage(FileDocumentStore(os.path.join(workdir, 'documents'))),
+    }
+
+def test_backends_behave_the_same():
+    results = {}
+    for name, storage in make_storages().items():
+        storage.create_forum_thread('alice12345', 'Gravity?', 'Why do apples fall?', 'Gravity', 'primary')
+        explanation = storage.submit_explanation('bob1234567', 'Photosynthesis', 'primary', 'Plants eat light.', 8)
+        first = storage.upvote_explanation('carol12345', explanation['id'])
+        again = storage.upvote_explanation('carol12345', explanation['id'])
+        storage.store.put('challenges/primary/Science/c1.json', {
+            'id': 'c1', 'question': '2 + 2?', 'options': ['3', '4'], 'correct_answer': '4', 'points': 10})
+        answer = storage.submit_challenge_answer('dave123456', 'c1', '4', 5)
+
+        results[name] = {
+            'threads': [thread['title'] for thread in storage.get_forum_threads()],
+            'explanations': [(e['topic'], e['upvotes']) for e in storage.get_community_explanations('photo')],
+            'upvotes': (first['success'], again['success']),
+            'knowledge': [(u['username'], u['total_points']) for u in storage.get_knowledge_leaderboard()],
+            'answer': (answer['is_correct'], answer['points_earned']),
+            'player': storage.get_player_stats('dave123456')['total_points'],
+            'game': [p['total_points'] for p in storage.get_leaderboard()],
+            'categories': storage.get_categories(),
+            'challenge': storage.get_random_challenge('primary', 'Science')['id'],
+            'missing_user': storage.get_user_stats('nobody')['total_points'],
+            'missing_explanation': storage.get_explanation('nope'),
+        }
+
+    expected = results['s3']
+    assert expected['upvotes'] == (True, False) and expected['categories'] == ['Science'] and expected['player'] == 9, \
+        f"Unexpected S3 results {expected}"
+    for name, result in results.items():
+        assert result == expected, f"{name} differs from s3: {result} vs {expected}"
+    print(f"SUCCESS: {', '.join(results)} backends return the same data")
+
+def test_listing_stops_at_prefix():
+    for name, storage in make_storages().items():
+        store = storage.store
+        store.put_many([('users/a_stats.json', {'n': 1}), ('users/b_stats.json', {'n': 2}),
+                        ('users_extra/c.json', {'n': 3}), ('userz.json', {'n': 4})])
+        keys = store.keys('users/')
+        assert keys == ['users/a_stats.json', 'users/b_stats.json'] and store.count('users/') == 2, \
+            f"{name} listed {keys}"
+        assert [doc['n'] for _, doc in store.items('users/')] == [1, 2], f"{name} items did not match its keys"
+        store.delete('users/a_stats.json')
+        assert store.get('users/a_stats.json') is None and not store.exists('users/a_stats.json'), \
+            f"{name} still has a deleted document"
+    print("SUCCESS: Every backend lists exactly the prefix and deletes")
+
+if __name__ == "__main__":
+    print("Testing storage backends...")
+    test_backends_behave_the_same()
+    test_listing_stops_at_prefix()
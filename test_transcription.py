@@ -0,0 +1,102 @@
+import io
+import time
+from fake_aws import FakeS3Client, FakeTranscribeClient
+from s3_storage import S3Storage
+from transcription_backends import AWSTranscribeBackend, TranscriptionBackend, get_transcription_backend
+from transcription_jobs import COMPLETED, FAILED, TranscriptionJobManager
+
+class EchoBackend(TranscriptionBackend):
+    """Synchronous backend that returns the audio as text, or fails on b'bad'"""
+
+    name = 'echo'
+
+    def transcribe(self, audio_bytes):
+        if audio_bytes == b'bad':
+            raise ValueError('unreadable audio')
+        return audio_bytes.decode()
+
+def make_aws_backend(latency=0.1, failure_rate=0.0):
+    s3_client = FakeS3Client()
+    storage = S3Storage()
+    storage.bucket_name = 'fake-bucket'
+    storage.s3_client = s3_client
+    client = FakeTranscribeClient(s3_client, latency=latency, failure_rate=failure_rate, transcript='Hello there.')
+    return AWSTranscribeBackend(client, storage), client
+
+def wait_for(manager, job_id, timeout=3):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = manager.get(job_id)
+        if job['status'] in (COMPLETED, FAILED) or time.monotonic() > deadline:
+            return job
+        time.sleep(0.02)
+
+def test_route_submit_then_poll_until_completed():
+    import app as app_module
+
+    backend, client = make_aws_backend(latency=0.2)
+    platform = app_module.get_platform()
+    platform.transcription_jobs = TranscriptionJobManager(backend, poll_initial=0.05, poll_max=0.1)
+    test_client = app_module.create_app().test_client()
+
+    submitted = test_client.post('/transcribe_audio', data={'audio': (io.BytesIO(b'RIFF'), 'clip.wav')},
+                                 content_type='multipart/form-data').get_json()
+    assert submitted['success'] and submitted['status'] == 'QUEUED', submitted
+    job_id = submitted['job_id']
+
+    # Poll the way static/app.js does, with the id from the submit response
+    polls = []
+    deadline = time.monotonic() + 3
+    result = submitted
+    while result['success'] and result['status'] != COMPLETED:
+        assert time.monotonic() < deadline, f"Job still {result['status']} after 3s"
+        time.sleep(0.05)
+        response = test_client.get(f'/transcribe_audio/{job_id}')
+        assert response.status_code == 200, f"Poll got {response.status_code}"
+        result = response.get_json()
+        polls.append(result)
+
+    assert len(polls) > 1, "Job finished before a second poll; the test no longer covers repeat polls"
+    assert all(poll['job_id'] == job_id for poll in polls), "A status response is missing job_id"
+    assert result['success'] and result['transcript'] == 'Hello there.', result
+    assert test_client.get('/transcribe_audio/unknown').status_code == 404
+    print(f"SUCCESS: Transcript returned after {len(polls)} polls of /transcribe_audio/<job_id>")
+
+def test_synchronous_backend_jobs():
+    manager = TranscriptionJobManager(EchoBackend(), workers=2)
+    good = manager.submit(b'Plants need light.', 'a.wav')
+    bad = manager.submit(b'bad', 'b.wav')
+    assert wait_for(manager, good)['transcript'] == 'Plants need light.'
+    failed = wait_for(manager, bad)
+    assert failed['status'] == FAILED and 'unreadable audio' in failed['error'], failed
+    assert manager.get('missing') is None
+    print("SUCCESS: Synchronous backend jobs complete or fail with the error")
+
+def test_async_job_failure_and_expiry():
+    backend, client = make_aws_backend(latency=0.05, failure_rate=1.0)
+    manager = TranscriptionJobManager(backend, poll_initial=0.02, poll_max=0.05, result_ttl=0.2)
+    job_id = manager.submit(b'RIFF', 'clip.wav')
+    job = wait_for(manager, job_id)
+    assert job['status'] == FAILED and job['error'].startswith('Transcription failed'), job
+
+    # Results nobody fetched are dropped after result_ttl
+    time.sleep(0.25)
+    assert client.operations['DeleteTranscriptionJob'] == 1, dict(client.operations)
+    assert manager.get(job_id) is None, "Finished job kept past result_ttl"
+    print("SUCCESS: Failed AWS jobs are reported, cleaned up and expire")
+
+def test_backend_selection():
+    assert get_transcription_backend('aws', None) is None
+    backend = get_transcription_backend('aws', object(), object())
+    assert isinstance(backend, AWSTranscribeBackend)
+    # Without faster-whisper installed, 'local' falls back to AWS Transcribe
+    fallback = get_transcription_backend('local', object(), object())
+    assert fallback.name in ('local', 'aws'), fallback
+    print(f"SUCCESS: Backends selected by name ('local' gave {fallback.name})")
+
+if __name__ == "__main__":
+    print("Testing transcription jobs...")
+    test_route_submit_then_poll_until_completed()
+    test_synchronous_backend_jobs()
+    test_async_job_failure_and_expiry()
+    test_backend_selection()
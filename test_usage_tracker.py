@@ -0,0 +1,66 @@
+import os
+import tempfile
+from flask import Flask
+import instrumentation
+from admission import AdmissionController, AdmissionRejected, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+from bedrock_provider import BedrockProvider
+from fake_aws import FakeBedrockClient
+from usage_tracker import UsageTracker, usage_tracker
+
+def test_usage_rollup_and_query():
+    tracker = UsageTracker(os.path.join(tempfile.mkdtemp(), 'usage.db'), flush_interval=0)
+    tracker.record('amazon.nova-pro-v1:0', 1000, 500, latency=0.4, route='POST /learn', level='primary', format='visual')
+    tracker.record('amazon.nova-pro-v1:0', 1000, 500, latency=0.6, route='POST /learn', level='primary', format='visual')
+    tracker.flush()
+    # Added onto the flushed row, not a new one
+    tracker.record('amazon.nova-pro-v1:0', 1000, 500, latency=0.5, route='POST /learn', level='primary', format='visual')
+    tracker.record('amazon.nova-canvas-v1:0', images=1, latency=2.0, route='POST /learn', format='visual')
+    tracker.record('amazon.nova-pro-v1:0', 200, 100, route='POST /generate_flashcards', user_id='u1')
+
+    by_route = {row['route']: row for row in tracker.query(['route'])}
+    learn = by_route['POST /learn']
+    expected_cost = 3 * (1.0 * 0.0008 + 0.5 * 0.0032) + 0.04
+    assert learn['calls'] == 4 and learn['input_tokens'] == 3000 and abs(learn['cost_usd'] - expected_cost) < 1e-6, \
+        f"Unexpected /learn usage {learn}"
+
+    by_model = tracker.query(['model_id'], format='visual')
+    assert [(row['model_id'], row['calls']) for row in by_model] == \
+        [('amazon.nova-canvas-v1:0', 1), ('amazon.nova-pro-v1:0', 3)], f"Unexpected per-model usage {by_model}"
+
+    by_user = tracker.query(['user_id'], user_id='u1')
+    assert len(by_user) == 1 and by_user[0]['calls'] == 1, f"Unexpected per-user usage {by_user}"
+    print("SUCCESS: Usage rolls up and can be grouped and filtered")
+
+def test_request_labels_and_token_budget():
+    app = Flask(__name__)
+    instrumentation.init_app(app)
+    provider = BedrockProvider(bedrock_client=FakeBedrockClient(text="A short answer."))
+    usage_tracker.db_path = os.path.join(tempfile.mkdtemp(), 'usage.db')
+    usage_tracker._db_ready = False
+
+    @app.route('/ask')
+    def ask():
+        instrumentation.tag(level='degree', format='chat')
+        return provider._get_bedrock_response('What is entropy?')
+
+    app.test_client().get('/ask')
+    rows = usage_tracker.query(['route', 'level', 'format'], route='GET /ask')
+    assert len(rows) == 1 and (rows[0]['level'], rows[0]['format'], rows[0]['calls']) == ('degree', 'chat', 1), \
+        f"Unexpected labelled usage {rows}"
+
+    controller = AdmissionController(tokens_per_minute=1000, background_token_share=0.5)
+    controller.record_tokens(600)
+    with controller.slot(PRIORITY_INTERACTIVE):
+        pass
+    try:
+        with controller.slot(PRIORITY_BACKGROUND):
+            pass
+        raise AssertionError("Background call admitted over the token budget")
+    except AdmissionRejected:
+        pass
+    print("SUCCESS: Usage is labelled by request and background calls respect the token budget")
+
+if __name__ == "__main__":
+    print("Testing usage tracking...")
+    test_usage_rollup_and_query()
+    test_request_labels_and_token_budget()
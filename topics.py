@@ -1,5 +1,7 @@
 """Comprehensive topic database for specific responses"""
 
+from keyword_matcher import KeywordMatcher
+
 TOPICS = {
     'react': {
         'beginner': "React is a JavaScript library created by Facebook in 2013. It helps build websites by breaking them into reusable pieces called components. Think of it like LEGO blocks - you create small pieces and combine them to build bigger things.",
@@ -28,6 +30,9 @@ TOPICS = {
     }
 }
 
+# Compiled once: finds every topic name inside a query in one pass
+TOPIC_MATCHER = KeywordMatcher((key, key) for key in TOPICS)
+
 def get_topic_response(topic, level):
     """Get specific response for a topic and level"""
     topic_key = topic.lower().strip()
@@ -36,9 +41,9 @@ def get_topic_response(topic, level):
     if topic_key in TOPICS:
         return TOPICS[topic_key].get(level, TOPICS[topic_key]['beginner'])
     
-    # Partial match
-    for key in TOPICS:
-        if key in topic_key or topic_key in key:
-            return TOPICS[key].get(level, TOPICS[key]['beginner'])
+    # Partial match: a topic named in the query, or a topic the query is the start of
+    key = TOPIC_MATCHER.first(topic_key) or (TOPIC_MATCHER.completion(topic_key) if topic_key else None)
+    if key:
+        return TOPICS[key].get(level, TOPICS[key]['beginner'])
     
-    return None
\ No newline at end of file
+    return None
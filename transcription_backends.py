@@ -0,0 +1,138 @@
+import importlib.util
+import io
+import json
+import os
+import threading
+
+
+class TranscriptionBackend:
+    """Interface for speech-to-text engines used by TranscriptionJobManager.
+
+    Synchronous backends implement `transcribe(audio_bytes)` and are run
+    on the job manager's worker pool. Asynchronous backends set
+    `synchronous = False` and implement `start`, `check`,
+    `fetch_transcript` and `cleanup` so the manager can poll them.
+    """
+
+    name = 'base'
+    synchronous = True
+
+    def transcribe(self, audio_bytes):
+        """Return the transcript text for the given audio"""
+        raise NotImplementedError
+
+    def start(self, job_name, audio_bytes, filename):
+        raise NotImplementedError
+
+    def check(self, job_name):
+        """Return (status, transcript_uri_or_error) for a started job"""
+        raise NotImplementedError
+
+    def fetch_transcript(self, transcript_uri):
+        raise NotImplementedError
+
+    def cleanup(self, job_name):
+        pass
+
+
+class AWSTranscribeBackend(TranscriptionBackend):
+    """Upload to S3, run an AWS Transcribe job, then download the transcript"""
+
+    name = 'aws'
+    synchronous = False
+
+    def __init__(self, transcribe_client, s3_storage):
+        self.transcribe_client = transcribe_client
+        self.s3_storage = s3_storage
+
+    def start(self, job_name, audio_bytes, filename):
+        s3_key = f"audio/{filename}"
+        self.s3_storage.s3_client.upload_fileobj(io.BytesIO(audio_bytes), self.s3_storage.bucket_name, s3_key)
+        audio_url = f"s3://{self.s3_storage.bucket_name}/{s3_key}"
+
+        print(f"Starting transcription job: {job_name}")
+        self.transcribe_client.start_transcription_job(
+            TranscriptionJobName=job_name,
+            Media={'MediaFileUri': audio_url},
+            MediaFormat='wav',
+            LanguageCode='en-US'
+        )
+
+    def check(self, job_name):
+        response = self.transcribe_client.get_transcription_job(TranscriptionJobName=job_name)
+        job = response['TranscriptionJob']
+        status = job['TranscriptionJobStatus']
+        if status == 'COMPLETED':
+            return status, job['Transcript']['TranscriptFileUri']
+        if status == 'FAILED':
+            return status, job.get('FailureReason', 'Unknown error')
+        return status, None
+
+    def fetch_transcript(self, transcript_uri):
+        if transcript_uri.startswith('s3://'):
+            # Transcript in our own bucket: read it with our S3 credentials
+            bucket, key = transcript_uri[len('s3://'):].split('/', 1)
+            content = self.s3_storage.s3_client.get_object(Bucket=bucket, Key=key)
+            transcript_data = json.loads(content['Body'].read())
+        else:
+            import requests
+            transcript_data = requests.get(transcript_uri, timeout=10).json()
+        return transcript_data['results']['transcripts'][0]['transcript']
+
+    def cleanup(self, job_name):
+        try:
+            self.transcribe_client.delete_transcription_job(TranscriptionJobName=job_name)
+        except Exception:
+            pass
+
+
+class LocalWhisperBackend(TranscriptionBackend):
+    """CPU-only Whisper (faster-whisper, int8) transcribing straight from memory"""
+
+    name = 'local'
+
+    def __init__(self, model_size='base.en', cpu_threads=4, num_workers=2):
+        # Only check it is installed; importing it is slow and waits for the model load
+        if importlib.util.find_spec('faster_whisper') is None:
+            raise RuntimeError("faster-whisper is not installed")
+        self.model_size = model_size
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        # Loading the weights takes seconds, so do it on first use only
+        with self._lock:
+            if self._model is None:
+                from faster_whisper import WhisperModel
+                print(f"Loading local Whisper model: {self.model_size}")
+                self._model = WhisperModel(
+                    self.model_size,
+                    device='cpu',
+                    compute_type='int8',
+                    cpu_threads=self.cpu_threads,
+                    num_workers=self.num_workers
+                )
+            return self._model
+
+    def transcribe(self, audio_bytes):
+        segments, _ = self.model.transcribe(io.BytesIO(audio_bytes), language='en', beam_size=1, vad_filter=True)
+        return ' '.join(segment.text.strip() for segment in segments).strip()
+
+
+def get_transcription_backend(name, transcribe_client=None, s3_storage=None):
+    """Build the configured backend, falling back to AWS Transcribe if local is unavailable"""
+    if name == 'local':
+        try:
+            return LocalWhisperBackend(
+                model_size=os.getenv('LOCAL_WHISPER_MODEL', 'base.en'),
+                cpu_threads=int(os.getenv('LOCAL_WHISPER_THREADS', '4'))
+            )
+        except Exception as e:
+            print(f"Local transcription unavailable ({e}), using AWS Transcribe")
+
+    if transcribe_client is None:
+        return None
+    return AWSTranscribeBackend(transcribe_client, s3_storage)
@@ -0,0 +1,167 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+QUEUED = 'QUEUED'
+IN_PROGRESS = 'IN_PROGRESS'
+COMPLETED = 'COMPLETED'
+FAILED = 'FAILED'
+
+
+class TranscriptionJobManager:
+    """Runs transcription jobs off the request thread.
+
+    `submit` only records the job and returns its id. A small worker pool
+    runs synchronous backends directly, or starts the job for
+    asynchronous ones (AWS Transcribe), and a single poller thread checks
+    running async jobs with per-job exponential backoff. Results are kept
+    in memory for `result_ttl` seconds so clients can fetch them from the
+    status endpoint.
+    """
+
+    def __init__(self, backend, workers=4, poll_initial=1.0,
+                 poll_max=8.0, job_timeout=300, result_ttl=600):
+        self.backend = backend
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self.job_timeout = job_timeout
+        self.result_ttl = result_ttl
+
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='transcribe')
+        self._poller = None
+
+    def submit(self, audio_bytes, filename):
+        """Queue audio for transcription and return the job id"""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                'id': job_id,
+                'status': QUEUED,
+                'backend': self.backend.name,
+                'transcript': None,
+                'error': None,
+                'created_at': time.time(),
+                'finished_at': None,
+                'job_name': f"transcribe_{filename.replace('.', '_')}_{int(datetime.now().timestamp())}",
+                'next_poll_at': None,
+                'poll_delay': self.poll_initial
+            }
+        if self.backend.synchronous:
+            self._executor.submit(self._run_job, job_id, audio_bytes)
+        else:
+            self._ensure_poller()
+            self._executor.submit(self._start_job, job_id, audio_bytes, filename)
+        return job_id
+
+    def get(self, job_id):
+        """Public view of a job, or None if unknown or expired"""
+        with self._lock:
+            self._expire_finished()
+            job = self._jobs.get(job_id)
+            if not job:
+                return None
+            return {key: job[key] for key in ('id', 'status', 'backend', 'transcript', 'error')}
+
+    def _run_job(self, job_id, audio_bytes):
+        with self._lock:
+            self._jobs[job_id]['status'] = IN_PROGRESS
+        try:
+            self._finish(job_id, transcript=self.backend.transcribe(audio_bytes))
+        except Exception as e:
+            print(f"Transcription error: {e}")
+            self._finish(job_id, error=f"Error: {str(e)}")
+
+    def _start_job(self, job_id, audio_bytes, filename):
+        try:
+            self.backend.start(self._jobs[job_id]['job_name'], audio_bytes, filename)
+            with self._lock:
+                job = self._jobs[job_id]
+                job['status'] = IN_PROGRESS
+                job['next_poll_at'] = time.monotonic() + job['poll_delay']
+            self._wakeup.set()
+        except Exception as e:
+            print(f"Transcription error: {e}")
+            self._finish(job_id, error=f"Error: {str(e)}")
+
+    def _ensure_poller(self):
+        with self._lock:
+            if self._poller and self._poller.is_alive():
+                return
+            self._poller = threading.Thread(target=self._poll_loop, name='transcribe-poller', daemon=True)
+            self._poller.start()
+
+    def _poll_loop(self):
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                due = [job_id for job_id, job in self._jobs.items()
+                       if job['status'] == IN_PROGRESS and job['next_poll_at'] <= now]
+
+            for job_id in due:
+                self._poll_job(job_id)
+
+            # Sleep until the next job is due, or until a new job starts
+            with self._lock:
+                pending = [job['next_poll_at'] for job in self._jobs.values()
+                           if job['status'] == IN_PROGRESS]
+            timeout = min(pending + [time.monotonic() + self.poll_max]) - time.monotonic()
+            self._wakeup.wait(max(0.05, timeout))
+            self._wakeup.clear()
+
+    def _poll_job(self, job_id):
+        job_name = self._jobs[job_id]['job_name']
+        try:
+            status, detail = self.backend.check(job_name)
+
+            if status == COMPLETED:
+                with self._lock:
+                    self._jobs[job_id]['next_poll_at'] = float('inf')
+                self._executor.submit(self._fetch_transcript, job_id, detail)
+                return
+            if status == FAILED:
+                print(f"Transcription failed: {detail}")
+                self._finish(job_id, error=f"Transcription failed: {detail}")
+                return
+        except Exception as e:
+            print(f"Error polling transcription job {job_name}: {e}")
+
+        with self._lock:
+            job = self._jobs[job_id]
+            timed_out = time.time() - job['created_at'] > self.job_timeout
+            if not timed_out:
+                job['poll_delay'] = min(self.poll_max, job['poll_delay'] * 2)
+                job['next_poll_at'] = time.monotonic() + job['poll_delay']
+        if timed_out:
+            self._finish(job_id, error='Transcription timed out')
+
+    def _fetch_transcript(self, job_id, transcript_uri):
+        try:
+            self._finish(job_id, transcript=self.backend.fetch_transcript(transcript_uri))
+        except Exception as e:
+            print(f"Error fetching transcript: {e}")
+            self._finish(job_id, error=f"Error: {str(e)}")
+
+    def _finish(self, job_id, transcript=None, error=None):
+        with self._lock:
+            job = self._jobs[job_id]
+            job['status'] = FAILED if error else COMPLETED
+            job['transcript'] = transcript
+            job['error'] = error
+            job['finished_at'] = time.time()
+            job_name = job['job_name']
+
+        if not self.backend.synchronous:
+            self.backend.cleanup(job_name)
+
+    def _expire_finished(self):
+        """Drop results nobody fetched in time (lock held)"""
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['finished_at'] and job['finished_at'] < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
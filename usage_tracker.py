@@ -0,0 +1,265 @@
+"""Bedrock token, latency and cost accounting.
+
+Every model invocation is added to an in-memory rollup keyed by hour,
+model, route, level, format and user. A background thread flushes the
+rollup to SQLite every `flush_interval` seconds, adding onto existing
+rows, so the store grows with the number of distinct keys per hour
+rather than with traffic.
+
+Report from the command line:
+    python usage_tracker.py --group-by route,format [--since 2026-10-01] [--user-id abc]
+"""
+
+import argparse
+import atexit
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# USD per 1,000 input/output tokens, or per generated image (on-demand, us-east-1)
+MODEL_PRICES = {
+    'amazon.nova-pro-v1:0': {'input': 0.0008, 'output': 0.0032},
+    'amazon.nova-lite-v1:0': {'input': 0.00006, 'output': 0.00024},
+    'amazon.nova-micro-v1:0': {'input': 0.000035, 'output': 0.00014},
+    'amazon.nova-canvas-v1:0': {'image': 0.04},
+}
+
+DIMENSIONS = ('hour', 'model_id', 'route', 'level', 'format', 'user_id')
+MEASURES = ('calls', 'input_tokens', 'output_tokens', 'images', 'latency_ms', 'cost_usd')
+
+
+def call_cost(model_id, input_tokens=0, output_tokens=0, images=0, prices=MODEL_PRICES):
+    """Estimated USD cost of one invocation; 0 for models without a known price"""
+    price = prices.get(model_id, {})
+    return (input_tokens * price.get('input', 0.0) + output_tokens * price.get('output', 0.0)) / 1000 \
+        + images * price.get('image', 0.0)
+
+
+class UsageTracker:
+    """Hourly rollup of model usage, flushed to SQLite in the background"""
+
+    def __init__(self, db_path='usage.db', flush_interval=30, prices=MODEL_PRICES):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.prices = prices
+        self._pending = {}
+        self._totals = dict.fromkeys(MEASURES, 0)
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db_ready = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record(self, model_id, input_tokens=0, output_tokens=0, images=0, latency=0.0, **labels):
+        """Add one model invocation labelled with route/level/format/user_id; returns its estimated cost"""
+        cost = call_cost(model_id, input_tokens, output_tokens, images, self.prices)
+        hour = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H')
+        # '' rather than NULL so the key columns can be a primary key; other labels are ignored
+        key = (hour, model_id) + tuple(str(labels.get(name) or '') for name in DIMENSIONS[2:])
+        values = (1, input_tokens, output_tokens, images, latency * 1000, cost)
+        with self._lock:
+            row = self._pending.get(key)
+            self._pending[key] = values if row is None else tuple(a + b for a, b in zip(row, values))
+            for name, value in zip(MEASURES, values):
+                self._totals[name] += value
+        self.start()
+        return cost
+
+    def start(self):
+        if self._thread is None and self.flush_interval:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='usage-flush', daemon=True)
+                    self._thread.start()
+                    # The thread is a daemon, so write what is left when the process exits
+                    atexit.register(self._flush_quietly)
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+    def flush(self):
+        """Write pending rollups to SQLite, returning how many rows were touched"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            with self._db_lock:
+                conn = self._connect()
+                try:
+                    conn.executemany('''
+                        INSERT INTO usage (hour, model_id, route, level, format, user_id,
+                                           calls, input_tokens, output_tokens, images, latency_ms, cost_usd)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (hour, model_id, route, level, format, user_id) DO UPDATE SET
+                            calls = calls + excluded.calls,
+                            input_tokens = input_tokens + excluded.input_tokens,
+                            output_tokens = output_tokens + excluded.output_tokens,
+                            images = images + excluded.images,
+                            latency_ms = latency_ms + excluded.latency_ms,
+                            cost_usd = cost_usd + excluded.cost_usd
+                    ''', [key + values for key, values in pending.items()])
+                    conn.commit()
+                finally:
+                    conn.close()
+        except Exception:
+            # Put the rows back so the next flush retries them
+            with self._lock:
+                for key, values in pending.items():
+                    row = self._pending.get(key)
+                    self._pending[key] = values if row is None else tuple(a + b for a, b in zip(row, values))
+            raise
+        return len(pending)
+
+    def query(self, group_by=('route',), since=None, until=None, **filters):
+        """Usage totals grouped by any of DIMENSIONS, most expensive first.
+
+        `since`/`until` are hours like '2026-10-19T14' (or any prefix, e.g.
+        '2026-10-19'); other keyword arguments filter on a dimension, e.g.
+        format='visual'. Pending usage is flushed first.
+        """
+        unknown = [name for name in list(group_by) + list(filters) if name not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unknown usage dimensions: {', '.join(unknown)}")
+
+        self.flush()
+        where, params = [], []
+        if since:
+            where.append('hour >= ?')
+            params.append(since)
+        if until:
+            # Compare on the same prefix length so '2026-10-19' includes that whole day
+            where.append('substr(hour, 1, ?) <= ?')
+            params.extend([len(until), until])
+        for name, value in filters.items():
+            where.append(f'{name} = ?')
+            params.append(value or '')
+
+        columns = ', '.join(group_by)
+        sql = f'''
+            SELECT {columns + ',' if columns else ''}
+                   SUM(calls), SUM(input_tokens), SUM(output_tokens), SUM(images),
+                   SUM(latency_ms), SUM(cost_usd)
+            FROM usage
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+            {'GROUP BY ' + columns if columns else ''}
+            ORDER BY SUM(cost_usd) DESC
+        '''
+        with self._db_lock:
+            conn = self._connect()
+            try:
+                rows = conn.execute(sql, params).fetchall()
+            finally:
+                conn.close()
+
+        results = []
+        for row in rows:
+            result = dict(zip(group_by, row[:len(group_by)]))
+            calls, input_tokens, output_tokens, images, latency_ms, cost = row[len(group_by):]
+            if not calls:
+                continue
+            result.update({
+                'calls': calls,
+                'input_tokens': input_tokens,
+                'output_tokens': output_tokens,
+                'images': images,
+                'avg_latency_ms': round(latency_ms / calls, 1),
+                'avg_output_tokens': round(output_tokens / calls, 1),
+                'cost_usd': round(cost, 6)
+            })
+            results.append(result)
+        return results
+
+    def stats(self):
+        """Totals since the process started, for /metrics"""
+        with self._lock:
+            totals = dict(self._totals)
+            pending = len(self._pending)
+        calls = totals['calls']
+        return {
+            'calls': calls,
+            'input_tokens': totals['input_tokens'],
+            'output_tokens': totals['output_tokens'],
+            'images': totals['images'],
+            'avg_latency_ms': round(totals['latency_ms'] / calls, 1) if calls else 0.0,
+            'cost_usd': round(totals['cost_usd'], 6),
+            'pending_rows': pending
+        }
+
+    def _connect(self):
+        # Plain sqlite3: flushes run on the background thread, not in requests
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        if not self._db_ready:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS usage (
+                    hour TEXT,
+                    model_id TEXT,
+                    route TEXT,
+                    level TEXT,
+                    format TEXT,
+                    user_id TEXT,
+                    calls INTEGER,
+                    input_tokens INTEGER,
+                    output_tokens INTEGER,
+                    images INTEGER,
+                    latency_ms REAL,
+                    cost_usd REAL,
+                    PRIMARY KEY (hour, model_id, route, level, format, user_id)
+                )
+            ''')
+            conn.commit()
+            self._db_ready = True
+        return conn
+
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Usage flush error: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self._flush_quietly()
+
+
+# Shared by every BedrockProvider in the process; the database is opened on first flush
+usage_tracker = UsageTracker(
+    os.getenv('USAGE_DB_PATH', 'usage.db'),
+    flush_interval=float(os.getenv('USAGE_FLUSH_INTERVAL', '30'))
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bedrock usage and estimated cost')
+    parser.add_argument('--group-by', default='route', help=f"comma separated: {', '.join(DIMENSIONS)}")
+    parser.add_argument('--since', help="first hour to include, e.g. 2026-10-01 or 2026-10-19T14")
+    parser.add_argument('--until', help='last hour to include')
+    for name in DIMENSIONS[1:]:
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, help=f'only this {name}')
+    args = parser.parse_args()
+
+    group_by = [name for name in args.group_by.split(',') if name]
+    filters = {name: getattr(args, name) for name in DIMENSIONS[1:] if getattr(args, name) is not None}
+    rows = usage_tracker.query(group_by, since=args.since, until=args.until, **filters)
+    if not rows:
+        print('No usage recorded')
+        return
+
+    headers = group_by + ['calls', 'input_tokens', 'output_tokens', 'images', 'avg_latency_ms', 'cost_usd']
+    cells = [[str(row[h]) if row[h] not in (None, '') else '-' for h in headers] for row in rows]
+    widths = [max(len(h), *(len(line[i]) for line in cells)) for i, h in enumerate(headers)]
+    print('  '.join(h.ljust(w) for h, w in zip(headers, widths)))
+    for line in cells:
+        print('  '.join(cell.ljust(w) for cell, w in zip(line, widths)))
+    print(f"Total: {sum(row['calls'] for row in rows)} calls, ${sum(row['cost_usd'] for row in rows):.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,7 @@
+"""WSGI entry point for production servers (see gunicorn.conf.py)"""
+
+from app import create_app, get_platform
+
+app = create_app()
+# Each worker picks up explanations whose grading was lost when a worker restarted
+get_platform().start_grading_sweeper()